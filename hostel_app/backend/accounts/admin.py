@@ -2,9 +2,19 @@ from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 from django.contrib.auth.models import User
 from .models import Student, OtpVerification
+from .passwords import queue_password_reset
+from django.conf import settings
 from django.utils.html import format_html
-from django.urls import reverse
+from django.urls import path, reverse
 from django.db.models import Count
+from django.core.exceptions import PermissionDenied, ValidationError
+from django.template.response import TemplateResponse
+from .forms import StudentImportForm
+from django.shortcuts import redirect
+from django.core.files.storage import default_storage
+from jobs.models import Job
+from jobs.queue import enqueue
+from .importer import ImportResult, count_lines, import_students, read_rows
 
 @admin.register(Student)
 class StudentAdmin(admin.ModelAdmin):
@@ -33,10 +43,13 @@ class StudentAdmin(admin.ModelAdmin):
     actions = ['reset_password_to_default']
     
     def reset_password_to_default(self, request, queryset):
-        for student in queryset:
-            student.user.set_password('changeme@123')
-            student.user.save()
-        self.message_user(request, f"Successfully reset password for {queryset.count()} student(s)")
+        # Hashing is slow on purpose; reset_passwords does it in the background
+        job = queue_password_reset(queryset.values_list('user_id', flat=True), requested_by=request.user)
+        url = reverse('admin:jobs_job_change', args=[job.pk])
+        self.message_user(
+            request,
+            format_html('Password reset queued for {} student(s). <a href="{}">Track progress</a>', job.total, url)
+        )
     reset_password_to_default.short_description = "Reset password to default"
 
     def save_model(self, request, obj, form, change):
@@ -45,7 +58,7 @@ class StudentAdmin(admin.ModelAdmin):
             user = User.objects.create_user(
                 username=obj.email,
                 email=obj.email,
-                password='changeme@123',
+                password=settings.PASSWORD_RESET['DEFAULT_PASSWORD'],
                 first_name=obj.name,
                 is_staff=False,
                 is_superuser=False
@@ -53,6 +66,49 @@ class StudentAdmin(admin.ModelAdmin):
             obj.user = user
         super().save_model(request, obj, form, change)
 
+    def get_urls(self):
+        urls = super().get_urls()
+        custom_urls = [
+            path('import/', self.admin_site.admin_view(self.import_students_view),
+                 name='accounts_student_import'),
+        ]
+        return custom_urls + urls
+
+    def import_students_view(self, request):
+        """Import small files straight away; queue larger ones as an accounts.import_students job"""
+        if not self.has_add_permission(request):
+            raise PermissionDenied
+        form = StudentImportForm(request.POST or None, request.FILES or None)
+        result = None
+        job = Job.objects.filter(pk=request.GET.get('job') or None, name='accounts.import_students').first()
+        if job and job.status == 'Done':
+            result = ImportResult.from_json(job.result)
+        if request.method == 'POST' and form.is_valid():
+            upload = form.cleaned_data['file']
+            try:
+                rows = read_rows(upload, upload.name)
+                lines = count_lines(upload, upload.name)
+                if lines - 1 <= settings.JOBS['INLINE_LIMIT']:
+                    result = import_students(rows, requested_by=request.user)
+                else:
+                    path = default_storage.save(f'imports/{upload.name}', upload)
+                    job = enqueue(
+                        'accounts.import_students', requested_by=request.user, total=lines,
+                        path=path, filename=upload.name
+                    )
+                    return redirect(f"{reverse('admin:accounts_student_import')}?job={job.pk}")
+            except ValidationError as e:
+                form.add_error('file', e)
+        context = {
+            **self.admin_site.each_context(request),
+            'title': 'Import students',
+            'form': form,
+            'result': result,
+            'job': job,
+            'opts': self.model._meta,
+        }
+        return TemplateResponse(request, 'admin/accounts/student/import.html', context)
+
     def get_form(self, request, obj=None, **kwargs):
         form = super().get_form(request, obj, **kwargs)
         if 'name' in form.base_fields:
@@ -87,4 +143,4 @@ class StudentAdmin(admin.ModelAdmin):
     class Media:
         css = {
             'all': ('admin/css/custom_admin.css',)
-        }
\ No newline at end of file
+        }
@@ -0,0 +1,5 @@
+from django import forms
+
+
+class StudentImportForm(forms.Form):
+    file = forms.FileField(help_text='CSV or XLSX with a header row. Required columns: email, gender.')
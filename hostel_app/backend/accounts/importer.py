@@ -0,0 +1,264 @@
+import csv
+import io
+import os
+import zipfile
+from dataclasses import dataclass, field
+from itertools import islice
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from activity.log import entry, record_many
+from stats.counters import STUDENTS, bump, registrations_key
+from .models import Student
+from .passwords import queue_password_reset
+
+# Rows validated and inserted per transaction
+IMPORT_CHUNK_SIZE = 500
+
+REQUIRED_COLUMNS = ('email', 'gender')
+OPTIONAL_COLUMNS = (
+    'first_name', 'last_name', 'name', 'department', 'year',
+    'roll_number', 'phone_number', 'parent_phone_number',
+)
+
+
+@dataclass
+class ImportResult:
+    created: int = 0
+    errors: list = field(default_factory=list)  # (line, message)
+    password_job: object = None
+    stopped_at: int = None  # line the file became unreadable at, if it did
+
+    def to_json(self):
+        """The result as stored on an accounts.import_students job"""
+        return {
+            'created': self.created,
+            'errors': self.errors,
+            'password_job': self.password_job.pk if self.password_job else None,
+            'stopped_at': self.stopped_at,
+        }
+
+    @classmethod
+    def from_json(cls, data):
+        from jobs.models import Job
+        return cls(
+            created=data['created'],
+            errors=[tuple(error) for error in data['errors']],
+            password_job=Job.objects.filter(pk=data['password_job']).first() if data['password_job'] else None,
+            stopped_at=data['stopped_at'],
+        )
+
+
+def unreadable(line, message):
+    """A file-level error: nothing from ``line`` on can be read"""
+    return ValidationError(message.replace('%', '%%'), code='unreadable', params={'line': line})
+
+
+def decoded_lines(file):
+    """Decode a binary file line by line, so a bad byte is reported on its own line"""
+    for line, raw in enumerate(file, start=1):
+        try:
+            text = raw.decode('utf-8-sig' if line == 1 else 'utf-8')
+        except UnicodeDecodeError:
+            raise unreadable(line, 'the file is not UTF-8 text; save it as "CSV UTF-8" and upload it again')
+        yield text
+
+
+def read_csv(file):
+    """Yield (line, row) pairs from a CSV file object, text or binary.
+
+    Undecodable or malformed input raises a ValidationError with code
+    ``unreadable`` carrying the line number, once the rows before it have
+    been yielded.
+    """
+    if not isinstance(file, io.TextIOBase):
+        file = decoded_lines(file)
+    # Strict, so a stray quote is an error rather than swallowing the rows after it
+    reader = csv.DictReader(file, strict=True)
+    try:
+        for row in reader:
+            yield reader.line_num, row
+    except csv.Error as e:
+        # DictReader only copies line_num after a good row; the inner reader has the bad one
+        raise unreadable(reader.reader.line_num, f'malformed CSV ({e})')
+
+
+def read_xlsx(file):
+    """Yield (line, row) pairs from the first sheet of an XLSX workbook"""
+    try:
+        from openpyxl import load_workbook
+        from openpyxl.utils.exceptions import InvalidFileException
+    except ImportError:
+        raise ValidationError('Reading XLSX files needs openpyxl: pip install openpyxl')
+    try:
+        workbook = load_workbook(file, read_only=True, data_only=True)
+    except (InvalidFileException, zipfile.BadZipFile, KeyError, OSError):
+        raise unreadable(1, 'the file is not a valid XLSX workbook')
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = [str(cell or '') for cell in next(rows, ())]
+        for line, values in enumerate(rows, start=2):
+            if any(value not in (None, '') for value in values):
+                yield line, dict(zip(header, values))
+    finally:
+        workbook.close()
+
+
+def count_lines(file, filename):
+    """Lines (CSV) or sheet rows (XLSX) in a file, header included, leaving it rewound.
+
+    Line numbers reported while importing run up to this, so it serves as
+    the total of an import job.
+    """
+    if os.path.splitext(filename)[1].lower() == '.xlsx':
+        try:
+            from openpyxl import load_workbook
+            workbook = load_workbook(file, read_only=True)
+            lines = workbook.worksheets[0].max_row or 0
+            workbook.close()
+        except Exception:
+            # Unreadable or no openpyxl: the import itself reports why
+            lines = 0
+    else:
+        lines = 0
+        last = b'\n'
+        while block := file.read(64 * 1024):
+            lines += block.count(b'\n')
+            last = block[-1:]
+        lines += last != b'\n'
+    file.seek(0)
+    return lines
+
+
+def read_rows(file, filename):
+    """Stream rows from an uploaded or opened file, picking the reader by extension"""
+    extension = os.path.splitext(filename)[1].lower()
+    if extension == '.xlsx':
+        return read_xlsx(file)
+    if extension == '.csv':
+        return read_csv(file)
+    raise ValidationError(f'Unsupported file type "{extension}", use .csv or .xlsx')
+
+
+def clean_row(row):
+    """Normalise one raw row into Student field values, or raise ValidationError"""
+    row = {
+        str(key).strip().lower().replace(' ', '_'): str(value).strip()
+        for key, value in row.items() if key is not None and value is not None
+    }
+    missing = [column for column in REQUIRED_COLUMNS if not row.get(column)]
+    if missing:
+        raise ValidationError(f"Missing {', '.join(missing)}")
+
+    data = {column: row[column] for column in OPTIONAL_COLUMNS if row.get(column)}
+    data['email'] = row['email'].lower()
+    validate_email(data['email'])
+    genders = {choice.lower(): choice for choice, _ in Student.GENDER_CHOICES}
+    data['gender'] = genders.get(row['gender'].lower())
+    if not data['gender']:
+        raise ValidationError(f"Unknown gender \"{row['gender']}\"")
+    if 'year' in data and data['year'] not in dict(Student.YEAR_CHOICES):
+        raise ValidationError(f"Unknown year \"{data['year']}\"")
+    data.setdefault('name', f"{data.get('first_name', '')} {data.get('last_name', '')}".strip() or data['email'])
+
+    for name, value in data.items():
+        max_length = Student._meta.get_field(name).max_length
+        if max_length and len(value) > max_length:
+            raise ValidationError(f'{name} is longer than {max_length} characters')
+    return data
+
+
+def insert_students(rows):
+    """Create the users and students of validated rows in one transaction.
+
+    Users start with an unusable password; the caller queues the real one.
+    Returns the created User objects.
+    """
+    unusable = make_password(None)
+    with transaction.atomic():
+        users = User.objects.bulk_create([
+            User(username=data['email'], email=data['email'], first_name=data['name'][:150], password=unusable)
+            for _, data in rows
+        ])
+        students = Student.objects.bulk_create([Student(user=user, **data) for user, (_, data) in zip(users, rows)])
+        bump({STUDENTS: len(users), registrations_key(timezone.localdate()): len(users)})
+        record_many([entry('Registration', student, student.payment_status, at=student.created_at) for student in students])
+    return users
+
+
+def import_chunk(chunk, seen, result):
+    """Validate and insert one chunk, recording errors instead of raising"""
+    valid = []
+    for line, row in chunk:
+        try:
+            data = clean_row(row)
+        except ValidationError as e:
+            result.errors.append((line, '; '.join(e.messages)))
+            continue
+        if data['email'] in seen:
+            result.errors.append((line, f"{data['email']} appears earlier in the file"))
+            continue
+        seen.add(data['email'])
+        valid.append((line, data))
+
+    emails = [data['email'] for _, data in valid]
+    taken = set(Student.objects.filter(email__in=emails).values_list('email', flat=True))
+    taken |= set(User.objects.filter(username__in=emails).values_list('username', flat=True))
+    for line, data in valid:
+        if data['email'] in taken:
+            result.errors.append((line, f"{data['email']} is already registered"))
+    valid = [(line, data) for line, data in valid if data['email'] not in taken]
+    if not valid:
+        return []
+
+    try:
+        return insert_students(valid)
+    except IntegrityError:
+        # Someone registered one of these meanwhile: insert row by row to find out who
+        users = []
+        for line, data in valid:
+            try:
+                users += insert_students([(line, data)])
+            except IntegrityError:
+                result.errors.append((line, f"{data['email']} is already registered"))
+        return users
+
+
+def import_students(rows, chunk_size=IMPORT_CHUNK_SIZE, requested_by=None, progress=None):
+    """Create students from a stream of (line, row) pairs, chunk by chunk.
+
+    Bad rows are reported in the result and never stop the import. A file
+    that becomes unreadable part way stops it: the rows read so far are
+    still imported, and the result records the line it stopped at. The
+    default password of every created user is hashed by a queued
+    accounts.reset_passwords job, so the slow part runs in the background.
+    ``progress`` is called with the last line read after every chunk.
+    """
+    result = ImportResult()
+    seen = set()
+    user_ids = []
+    rows = iter(rows)
+    while True:
+        chunk = []
+        try:
+            chunk.extend(islice(rows, chunk_size))
+        except ValidationError as e:
+            if e.code != 'unreadable':
+                raise
+            result.stopped_at = e.params['line']
+            result.errors.append((result.stopped_at, f'{e.messages[0]}; the import stopped here'))
+        if chunk:
+            users = import_chunk(chunk, seen, result)
+            user_ids += [user.pk for user in users]
+            result.created += len(users)
+            if progress:
+                progress(chunk[-1][0])
+        if result.stopped_at or len(chunk) < chunk_size:
+            break
+    result.errors.sort()
+    if user_ids:
+        result.password_job = queue_password_reset(user_ids, requested_by=requested_by)
+    return result
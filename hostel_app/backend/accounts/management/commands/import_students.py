@@ -0,0 +1,40 @@
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from accounts.importer import IMPORT_CHUNK_SIZE, import_students, read_rows
+from jobs.queue import run_job, start_job
+
+class Command(BaseCommand):
+    help = 'Create students in bulk from a CSV or XLSX file, reporting bad rows without stopping'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or XLSX file with at least email and gender columns')
+        parser.add_argument('--chunk-size', type=int, default=IMPORT_CHUNK_SIZE,
+                            help='Rows validated and inserted per transaction')
+        parser.add_argument('--workers', type=int, default=None,
+                            help='Processes hashing the default passwords (default: PASSWORD_RESET["WORKERS"])')
+        parser.add_argument('--defer-passwords', action='store_true',
+                            help='Leave password hashing to `run_jobs` instead of doing it now')
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['path'], 'rb') as file:
+                result = import_students(read_rows(file, options['path']), options['chunk_size'])
+        except OSError as e:
+            raise CommandError(e)
+        except ValidationError as e:
+            raise CommandError('; '.join(e.messages))
+
+        for line, message in result.errors:
+            self.stderr.write(f'Line {line}: {message}')
+        self.stdout.write(self.style.SUCCESS(f'Created {result.created} student(s), skipped {len(result.errors)} row(s)'))
+
+        job = result.password_job
+        if job and not options['defer_passwords'] and start_job(job):
+            self.stdout.write('Hashing default passwords...')
+            if options['workers']:
+                job.kwargs['workers'] = options['workers']
+            run_job(job)
+            self.stdout.write(self.style.SUCCESS(f'Password reset job {job.pk}: {job.status}'))
+
+        if result.stopped_at:
+            raise CommandError(f'Stopped at line {result.stopped_at}; the rows before it were imported')
@@ -1,10 +1,14 @@
+from django.conf import settings
 from django.db import models
 from django.contrib.auth.models import User
-from django.db.models.signals import pre_save
+from django.db.models.signals import post_delete, pre_save
 from django.dispatch import receiver
+from hostel_management.tracking import TrackChangesMixin
+from rooms.services import adjust_occupancy
+from collections import Counter
 import os
 
-class Student(models.Model):
+class Student(TrackChangesMixin, models.Model):
     GENDER_CHOICES = (
         ('Male', 'Male'),
         ('Female', 'Female')
@@ -55,7 +59,15 @@ class Student(models.Model):
         # Auto-generate full name if not explicitly set
         if not self.name:
             self.name = f"{self.first_name} {self.last_name}".strip()
+        # Read the room move before saving refreshes the loaded values
+        moved = self._state.adding or self.has_changed('room')
+        old_room_id = None if self._state.adding else self.initial_value('room')
         super().save(*args, **kwargs)
+        if moved:
+            changes = Counter()
+            changes[old_room_id] -= 1
+            changes[self.room_id] += 1
+            adjust_occupancy(changes)
 
 @receiver(pre_save, sender=Student)
 def create_user_for_student(sender, instance, **kwargs):
@@ -63,11 +75,15 @@ def create_user_for_student(sender, instance, **kwargs):
         user = User.objects.create_user(
             username=instance.email,
             email=instance.email,
-            password='changeme@123',
+            password=settings.PASSWORD_RESET['DEFAULT_PASSWORD'],
             first_name=instance.name
         )
         instance.user = user
 
+@receiver(post_delete, sender=Student)
+def release_occupancy(sender, instance, **kwargs):
+    adjust_occupancy({instance.room_id: -1})
+
 class OtpVerification(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     otp = models.CharField(max_length=6)
@@ -0,0 +1,53 @@
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from itertools import islice, repeat
+import django
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from jobs.queue import enqueue
+
+
+def password_reset_settings():
+    return settings.PASSWORD_RESET
+
+
+def queue_password_reset(user_ids, requested_by=None):
+    """Queue a reset to the default password as an accounts.reset_passwords job"""
+    user_ids = list(user_ids)
+    return enqueue('accounts.reset_passwords', requested_by=requested_by, total=len(user_ids), ids=user_ids)
+
+
+def hashing_pool(workers):
+    """A process pool for hashing, or none at all when one worker is asked for"""
+    if workers == 1:
+        return nullcontext()
+    # Workers started with spawn rather than fork need Django set up first
+    return ProcessPoolExecutor(max_workers=workers, initializer=django.setup)
+
+
+def set_default_passwords(user_ids, workers=None, chunk_size=None, progress=None):
+    """Hash the default password for every given user and write it back.
+
+    Hashes are produced by a process pool while earlier chunks are written,
+    each chunk with one bulk UPDATE, after which ``progress`` is called with
+    the number of users done. Every user still gets a fresh salt. Returns
+    the number of users reset.
+    """
+    config = password_reset_settings()
+    workers = workers or config['WORKERS']
+    chunk_size = chunk_size or config['CHUNK_SIZE']
+    done = 0
+    with hashing_pool(workers) as pool:
+        mapper = pool.map if pool else map
+        hashes = mapper(make_password, repeat(config['DEFAULT_PASSWORD'], len(user_ids)))
+        for start in range(0, len(user_ids), chunk_size):
+            chunk = user_ids[start:start + chunk_size]
+            users = list(User.objects.filter(pk__in=chunk).only('pk'))
+            for user, password in zip(users, islice(hashes, len(chunk))):
+                user.password = password
+            User.objects.bulk_update(users, ['password'])
+            done += len(users)
+            if progress:
+                progress(start + len(chunk))
+    return done
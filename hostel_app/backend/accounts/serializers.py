@@ -21,4 +21,7 @@ class StudentSerializer(serializers.ModelSerializer):
 
 class ChangePasswordSerializer(serializers.Serializer):
     old_password = serializers.CharField(required=True)
-    new_password = serializers.CharField(required=True, min_length=8) 
\ No newline at end of file
+    new_password = serializers.CharField(required=True, min_length=8) 
+
+class StudentIdsSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), allow_empty=False)
@@ -0,0 +1,23 @@
+from django.core.files.storage import default_storage
+from jobs.queue import task
+from .importer import IMPORT_CHUNK_SIZE, import_students, read_rows
+from .passwords import set_default_passwords
+
+
+@task('accounts.reset_passwords')
+def reset_passwords(job, ids, workers=None):
+    count = set_default_passwords(ids, workers, progress=job.set_progress)
+    return f"Reset the password of {count} user(s)"
+
+
+@task('accounts.import_students')
+def import_students_file(job, path, filename, chunk_size=IMPORT_CHUNK_SIZE):
+    """Import an uploaded file kept in the default storage, then delete it"""
+    with default_storage.open(path, 'rb') as file:
+        result = import_students(
+            read_rows(file, filename), chunk_size, requested_by=job.requested_by, progress=job.set_progress
+        )
+    # Kept until here so a job reclaimed from a dead worker can read it again
+    default_storage.delete(path)
+    job.result = result.to_json()
+    return f"Created {result.created} student(s), skipped {len(result.errors)} row(s)"
@@ -1,3 +1,288 @@
-from django.test import TestCase
+import io
+import tempfile
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from hostel_management.testing import ChangelistQueryCountMixin
+from rooms.models import Room
+from payments.models import Payment
+from bookings.models import BookingRequest
+from jobs.models import Job
+from jobs.queue import enqueue, run_pending_jobs
+from .models import Student
+from .importer import import_students, read_csv
 
-# Create your tests here.
+
+class PaymentClientMixin:
+    SEATS = 1
+
+    def setUp(self):
+        self.room = Room.objects.create(
+            category='2 AC A', location='BH2', menu='Veg',
+            rooms_count=self.SEATS, pax_per_room=1, capacity=self.SEATS,
+            available_seats=self.SEATS, price=18000
+        )
+        self.client = APIClient()
+        self.student = self.make_student('first@example.com')
+
+    def make_student(self, email):
+        user = User.objects.create(username=email, email=email)
+        return Student.objects.create(user=user, name=email, email=email, gender='Male')
+
+    def pay(self, student, transaction_id, **headers):
+        self.client.force_authenticate(student.user)
+        return self.client.post(
+            reverse('make-payment'),
+            {'room_id': self.room.id, 'transaction_id': transaction_id},
+            format='json',
+            headers=headers
+        )
+
+
+class MakePaymentTests(PaymentClientMixin, TestCase):
+    def test_payment_reserves_seat(self):
+        response = self.pay(self.student, 'TXN1')
+        self.assertEqual(response.status_code, 200)
+        self.room.refresh_from_db()
+        self.assertEqual(self.room.available_seats, 0)
+        self.student.refresh_from_db()
+        self.assertEqual(self.student.payment_status, 'Pending')
+        self.assertEqual(self.student.room, self.room)
+
+    def test_sold_out_room_is_rejected(self):
+        self.pay(self.student, 'TXN1')
+        other = self.make_student('second@example.com')
+        response = self.pay(other, 'TXN2')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['code'], 'sold_out')
+        self.assertFalse(Payment.objects.filter(student=other).exists())
+        self.room.refresh_from_db()
+        self.assertEqual(self.room.available_seats, 0)
+
+    def test_paying_again_cancels_the_pending_booking(self):
+        self.pay(self.student, 'TXN1')
+        response = self.pay(self.student, 'TXN2')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            list(BookingRequest.objects.order_by('id').values_list('status', 'payment__status')),
+            [('Cancelled', 'Failed'), ('Pending', 'Pending')]
+        )
+        self.student.refresh_from_db()
+        self.assertEqual((self.student.payment_status, self.student.room), ('Pending', self.room))
+        self.room.refresh_from_db()
+        self.assertEqual(self.room.available_seats, 0)
+
+
+class StudentChangelistTests(ChangelistQueryCountMixin, TestCase):
+    model = Student
+
+    def setUp(self):
+        self.room = Room.objects.create(
+            category='6 Non AC C', location='Habitat', menu='Non Veg',
+            rooms_count=300, pax_per_room=6, capacity=1800, available_seats=1800
+        )
+        self.client.force_login(User.objects.create_superuser('registrar', 'registrar@example.com', 'x'))
+
+    def add_rows(self, count):
+        start = Student.objects.count()
+        users = User.objects.bulk_create([User(username=f'st{start + i}') for i in range(count)])
+        Student.objects.bulk_create([
+            Student(user=user, name=user.username, email=f'{user.username}@example.com',
+                    gender='Male', room=self.room, payment_status='Confirmed')
+            for user in users
+        ])
+
+
+class IdempotentPaymentTests(PaymentClientMixin, TestCase):
+    SEATS = 5
+
+    def test_retry_replays_the_original_result(self):
+        first = self.pay(self.student, 'TXN1', Idempotency_Key='abc')
+        with self.assertNumQueries(1):
+            retry = self.pay(self.student, 'TXN1', Idempotency_Key='abc')
+        self.assertEqual(retry.status_code, 200)
+        self.assertEqual(retry.data['payment_id'], first.data['payment_id'])
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(Payment.objects.count(), 1)
+        self.assertEqual(BookingRequest.objects.count(), 1)
+        self.room.refresh_from_db()
+        self.assertEqual(self.room.available_seats, 4)
+
+    def test_retry_without_key_is_deduplicated_on_transaction_id(self):
+        first = self.pay(self.student, 'TXN1')
+        retry = self.pay(self.student, 'TXN1')
+        self.assertEqual(retry.data['payment_id'], first.data['payment_id'])
+        self.assertEqual(Payment.objects.count(), 1)
+
+    def test_transaction_id_of_another_student_conflicts(self):
+        self.pay(self.student, 'TXN1')
+        response = self.pay(self.make_student('second@example.com'), 'TXN1')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(Payment.objects.count(), 1)
+
+    def test_reusing_a_key_for_another_transaction_conflicts(self):
+        self.pay(self.student, 'TXN1', Idempotency_Key='abc')
+        response = self.pay(self.student, 'TXN2', Idempotency_Key='abc')
+        self.assertEqual(response.status_code, 409)
+
+    def test_oversized_key_is_rejected(self):
+        response = self.pay(self.student, 'TXN1', Idempotency_Key='k' * 65)
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Payment.objects.exists())
+        self.assertEqual(self.pay(self.student, 'TXN1', Idempotency_Key='k' * 64).status_code, 200)
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class BulkPasswordResetTests(TestCase):
+    def setUp(self):
+        self.admin_user = User.objects.create_superuser('registrar', 'registrar@example.com', 'x')
+        self.client.force_login(self.admin_user)
+        users = User.objects.bulk_create([User(username=f'st{i}', password='old') for i in range(25)])
+        self.students = Student.objects.bulk_create([
+            Student(user=user, name=user.username, email=f'{user.username}@example.com', gender='Male')
+            for user in users
+        ])
+
+    def test_admin_action_only_queues_the_job(self):
+        response = self.client.post(reverse('admin:accounts_student_changelist'), {
+            'action': 'reset_password_to_default',
+            '_selected_action': [student.pk for student in self.students],
+        })
+        self.assertEqual(response.status_code, 302)
+        job = Job.objects.get()
+        self.assertEqual((job.name, job.status, job.total, job.requested_by), ('accounts.reset_passwords', 'Pending', 25, self.admin_user))
+        self.assertFalse(User.objects.filter(student__isnull=False, password__startswith='md5$').exists())
+
+    def run_reset(self, workers):
+        enqueue(
+            'accounts.reset_passwords', total=len(self.students),
+            ids=[student.user_id for student in self.students], workers=workers
+        )
+        # Stale job check, claim, three chunks of read + write + progress, finish, then an empty claim
+        with self.assertNumQueries(2 + 4 + 3 * 3 + 1 + 3), self.settings(PASSWORD_RESET={**settings.PASSWORD_RESET, 'CHUNK_SIZE': 10}):
+            self.assertEqual(run_pending_jobs(), 1)
+        job = Job.objects.get()
+        self.assertEqual((job.status, job.processed, job.progress), ('Done', 25, 100))
+        passwords = list(User.objects.filter(student__isnull=False).values_list('password', flat=True))
+        # Every user gets their own salt
+        self.assertEqual(len(set(passwords)), 25)
+        user = User.objects.get(username='st7')
+        self.assertTrue(user.check_password('changeme@123'))
+
+    def test_reset_in_the_worker_process(self):
+        self.run_reset(workers=1)
+
+    def test_reset_across_a_process_pool(self):
+        self.run_reset(workers=2)
+
+    def test_api_queues_the_job(self):
+        client = APIClient()
+        client.force_authenticate(self.admin_user)
+        response = client.post(
+            reverse('admin-student-reset-passwords'), {'ids': [s.pk for s in self.students[:5]]}, format='json'
+        )
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(Job.objects.get(pk=response.data['job']).total, 5)
+
+    def test_api_rejects_bad_ids(self):
+        client = APIClient()
+        client.force_authenticate(self.admin_user)
+        for ids in ([], ['abc'], [self.students[0].pk, None], 'all'):
+            response = client.post(reverse('admin-student-reset-passwords'), {'ids': ids}, format='json')
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('ids', response.data)
+        self.assertFalse(Job.objects.exists())
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class StudentImportTests(TestCase):
+    CSV = (
+        'Email,Gender,First Name,Last Name,Year,Department\n'
+        'asha@example.com,female,Asha,R,2,CSE\n'
+        'bad-email,Male,,,1,ECE\n'
+        'ravi@example.com,Male,Ravi,K,1,ECE\n'
+        'taken@example.com,Male,Old,Timer,3,MECH\n'
+        'ASHA@example.com,Female,Asha,Again,2,CSE\n'
+        'kiran@example.com,Other,Kiran,S,1,CSE\n'
+        'meena@example.com,Female,Meena,P,9,IT\n'
+        'sam@example.com,Male,Sam,T,PG1,MBA\n'
+    )
+
+    def setUp(self):
+        user = User.objects.create(username='taken@example.com', email='taken@example.com')
+        Student.objects.create(user=user, name='Taken', email='taken@example.com', gender='Male')
+
+    def test_bad_rows_are_reported_and_the_rest_imported(self):
+        rows = read_csv(io.StringIO(self.CSV))
+        # Two lookups per chunk, a savepoint, three INSERTs (users, students,
+        # activity) and a counter UPDATE when anything is left, then the job
+        with self.assertNumQueries(8 + 2 + 8 + 1):
+            result = import_students(rows, chunk_size=3)
+        self.assertEqual(result.created, 3)
+        self.assertEqual([line for line, _ in result.errors], [3, 5, 6, 7, 8])
+        self.assertIn('already registered', dict(result.errors)[5])
+        self.assertIn('earlier in the file', dict(result.errors)[6])
+        asha = Student.objects.get(email='asha@example.com')
+        self.assertEqual((asha.name, asha.gender, asha.year, asha.user.username), ('Asha R', 'Female', '2', 'asha@example.com'))
+        self.assertFalse(asha.user.has_usable_password())
+
+        self.assertEqual(result.password_job.total, 3)
+        run_pending_jobs()
+        asha.user.refresh_from_db()
+        self.assertTrue(asha.user.check_password('changeme@123'))
+
+    def test_admin_upload(self):
+        self.client.force_login(User.objects.create_superuser('registrar', 'registrar@example.com', 'x'))
+        upload = SimpleUploadedFile('intake.csv', self.CSV.encode('utf-8-sig'), content_type='text/csv')
+        response = self.client.post(reverse('admin:accounts_student_import'), {'file': upload})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['result'].created, 3)
+        self.assertContains(response, 'Unknown gender')
+
+    def test_large_admin_upload_is_imported_by_a_job(self):
+        self.client.force_login(User.objects.create_superuser('registrar', 'registrar@example.com', 'x'))
+        upload = SimpleUploadedFile('intake.csv', self.CSV.encode('utf-8-sig'), content_type='text/csv')
+        with tempfile.TemporaryDirectory() as media, self.settings(
+            MEDIA_ROOT=media, JOBS={**settings.JOBS, 'INLINE_LIMIT': 5}
+        ):
+            response = self.client.post(reverse('admin:accounts_student_import'), {'file': upload})
+            job = Job.objects.get(name='accounts.import_students')
+            self.assertRedirects(response, f"{reverse('admin:accounts_student_import')}?job={job.pk}")
+            self.assertEqual((job.total, Student.objects.count()), (9, 1))
+
+            # The upload job, then the password job it queues
+            self.assertEqual(run_pending_jobs(), 2)
+            job.refresh_from_db()
+            self.assertEqual((job.status, job.processed, job.message), ('Done', 9, 'Created 3 student(s), skipped 5 row(s)'))
+            self.assertFalse(default_storage.exists(job.kwargs['path']))
+
+            response = self.client.get(reverse('admin:accounts_student_import'), {'job': job.pk})
+        self.assertEqual(response.context['result'].created, 3)
+        self.assertContains(response, 'Unknown gender')
+        self.assertTrue(Student.objects.get(email='asha@example.com').user.check_password('changeme@123'))
+
+    def test_unreadable_files_stop_with_a_line_number(self):
+        latin1 = 'email,gender,name\nasha@example.com,Female,Asha\nrene@example.com,Male,René\nsam@example.com,Male,Sam\n'
+        self.client.force_login(User.objects.create_superuser('registrar', 'registrar@example.com', 'x'))
+        upload = SimpleUploadedFile('intake.csv', latin1.encode('latin-1'), content_type='text/csv')
+        response = self.client.post(reverse('admin:accounts_student_import'), {'file': upload})
+        self.assertEqual(response.status_code, 200)
+        result = response.context['result']
+        self.assertEqual((result.created, result.stopped_at), (1, 3))
+        self.assertContains(response, 'could not be read past line 3')
+
+        malformed = io.StringIO('email,gender\nkiran@example.com,Male\n"unterminated,Male\n')
+        result = import_students(read_csv(malformed))
+        self.assertEqual((result.created, result.stopped_at), (1, 3))
+        self.assertIn('malformed CSV', dict(result.errors)[3])
+
+    def test_admin_upload_rejects_other_file_types(self):
+        self.client.force_login(User.objects.create_superuser('registrar', 'registrar@example.com', 'x'))
+        upload = SimpleUploadedFile('intake.txt', b'email,gender\n')
+        response = self.client.post(reverse('admin:accounts_student_import'), {'file': upload})
+        self.assertFormError(response.context['form'], 'file', 'Unsupported file type ".txt", use .csv or .xlsx')
+        self.assertEqual(Student.objects.count(), 1)
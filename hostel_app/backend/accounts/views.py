@@ -6,18 +6,23 @@ from django.contrib.auth.models import User
 from django.utils import timezone
 from datetime import timedelta
 from .models import Student, OtpVerification
-from .serializers import StudentSerializer, UserSerializer, ChangePasswordSerializer
+from .passwords import queue_password_reset
+from .serializers import StudentSerializer, UserSerializer, ChangePasswordSerializer, StudentIdsSerializer
 from django.contrib.auth.password_validation import validate_password
 from django.core.exceptions import ValidationError
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 import random
 import string
-from django.core.mail import send_mail
+from notifications.outbox import enqueue_email
 from django.conf import settings
+from django.db import IntegrityError, transaction
 from rooms.models import Room
+from rooms.services import reserve_seat
 from payments.models import Payment
 from bookings.models import BookingRequest
+from bookings.services import bookings_for_payments, hold_seat, transition_bookings
+from bookings.admission import HasAdmission
 
 # Create your views here.
 
@@ -157,10 +162,22 @@ class AdminStudentViewSet(viewsets.ModelViewSet):
     def reset_password(self, request, pk=None):
         student = self.get_object()
         user = student.user
-        user.set_password('changeme@123')
+        user.set_password(settings.PASSWORD_RESET['DEFAULT_PASSWORD'])
         user.save()
         return Response({'detail': 'Password reset to default'}, status=status.HTTP_200_OK)
 
+    @action(detail=False, methods=['post'])
+    def reset_passwords(self, request):
+        """Queue a reset to the default password for many students at once"""
+        serializer = StudentIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        user_ids = Student.objects.filter(pk__in=serializer.validated_data['ids']).values_list('user_id', flat=True)
+        job = queue_password_reset(user_ids, requested_by=request.user)
+        return Response(
+            {'detail': 'Password reset queued', 'job': job.pk, 'total': job.total},
+            status=status.HTTP_202_ACCEPTED
+        )
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def verify_student(request):
@@ -187,16 +204,7 @@ def request_otp(request):
         otp = ''.join(random.choices(string.digits, k=6))
         print(f"Generated OTP: {otp}")
         
-        # Save OTP to database
-        print("Creating OTP verification record...")
-        OtpVerification.objects.create(
-            user=request.user,
-            otp=otp
-        )
-        print("OTP record created successfully")
-        
-        # Send email with OTP
-        print("Sending email...")
+        # Save the OTP and its email together; send_outbox delivers it
         subject = 'Student Portal - Room Booking Verification'
         message = f'''
         Hello {student.name},
@@ -208,19 +216,12 @@ def request_otp(request):
         Regards,
         Student Hostel Management Team
         '''
-        
-        try:
-            send_mail(
-                subject,
-                message, 
-                settings.DEFAULT_FROM_EMAIL,
-                [email],
-                fail_silently=False,
+        with transaction.atomic():
+            OtpVerification.objects.create(
+                user=request.user,
+                otp=otp
             )
-            print("Email sent successfully")
-        except Exception as e:
-            print(f"Email error: {e}")
-            print(f"OTP for testing: {otp}")  # Print OTP to console for testing
+            enqueue_email(subject, message, [email])
         
         return Response({'detail': 'OTP sent successfully'})
     
@@ -292,11 +293,93 @@ def verify_otp(request):
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
 
+def _payment_submitted(payment_id, replayed=False):
+    response = Response({
+        'detail': 'Payment submitted successfully. Your booking request is pending admin approval.',
+        'payment_id': payment_id
+    })
+    if replayed:
+        response['Idempotent-Replayed'] = 'true'
+    return response
+
+def _replay_payment(user, transaction_id, idempotency_key):
+    """Return the original response for a repeated submission, a conflict
+    if the transaction ID or key belongs to another submission, or None"""
+    previous = Payment.objects.filter(transaction_id=transaction_id).values(
+        'id', 'student__user_id', 'idempotency_key'
+    ).first()
+    
+    if previous is None:
+        if idempotency_key and Payment.objects.filter(
+            student__user=user, idempotency_key=idempotency_key
+        ).exists():
+            return Response(
+                {'detail': 'This idempotency key was already used for a different transaction.'},
+                status=status.HTTP_409_CONFLICT
+            )
+        return None
+    
+    if previous['student__user_id'] != user.id or (
+        idempotency_key and previous['idempotency_key'] not in (None, idempotency_key)
+    ):
+        return Response(
+            {'detail': 'This transaction ID has already been used.'},
+            status=status.HTTP_409_CONFLICT
+        )
+    return _payment_submitted(previous['id'], replayed=True)
+
+@transaction.atomic
+def _submit_payment(student, room, transaction_id, idempotency_key):
+    """Reserve a seat and record the pending payment and booking request.
+    
+    Returns the new payment, or None (with nothing changed) if the room is sold out.
+    """
+    # If student has a pending payment, cancel its booking first; this
+    # fails the payment and gives the seat back
+    if student.payment_status == 'Pending':
+        pending_payments = Payment.objects.filter(student=student, status='Pending')
+        transition_bookings(bookings_for_payments(pending_payments), 'Cancelled')
+        student.refresh_from_db(fields=['payment_status', 'room'])
+    
+    # Take a seat in one conditional UPDATE; rolls back the
+    # cancellation above if the room sold out in the meantime
+    if not reserve_seat(room):
+        transaction.set_rollback(True)
+        return None
+    
+    # Create new payment with room price
+    payment = Payment.objects.create(
+        student=student,
+        room=room,
+        amount=room.price,  # Using the room's price
+        transaction_id=transaction_id,
+        idempotency_key=idempotency_key,
+        status='Pending'
+    )
+    hold_seat(payment)
+    
+    # Update student status
+    student.payment_status = 'Pending'
+    student.room = room  # Temporarily assign room
+    student.save()
+    
+    # Create booking request
+    BookingRequest.objects.create(
+        student=student,
+        room=room,
+        amount=room.price,
+        transaction_id=transaction_id,
+        payment=payment,
+        status='Pending'
+    )
+    return payment
+
 @api_view(['POST'])
-@permission_classes([IsAuthenticated])
+@permission_classes([IsAuthenticated, HasAdmission])
 def make_payment(request):
     room_id = request.data.get('room_id')
-    transaction_id = request.data.get('transaction_id')
+    transaction_id = str(request.data.get('transaction_id') or '').strip()
+    idempotency_key = request.headers.get('Idempotency-Key') or None
     
     if not all([room_id, transaction_id]):
         return Response(
@@ -304,20 +387,22 @@ def make_payment(request):
             status=status.HTTP_400_BAD_REQUEST
         )
     
+    key_length = Payment._meta.get_field('idempotency_key').max_length
+    if idempotency_key and len(idempotency_key) > key_length:
+        return Response(
+            {'detail': f'Idempotency-Key must be at most {key_length} characters'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    # A retried submission gets the original result back without side effects
+    replay = _replay_payment(request.user, transaction_id, idempotency_key)
+    if replay is not None:
+        return replay
+    
     try:
         student = Student.objects.get(user=request.user)
         room = Room.objects.get(id=room_id)
         
-        # Use the room's price as the payment amount
-        amount = room.price
-        
-        # Check if room has available seats
-        if room.available_seats <= 0:
-            return Response(
-                {'detail': 'This room has no available seats.'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
         # Check if student already has a room and payment is confirmed
         if student.room and student.payment_status == 'Confirmed':
             return Response(
@@ -325,55 +410,21 @@ def make_payment(request):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # If student has a pending payment, cancel it first
-        if student.payment_status == 'Pending':
-            # Find and cancel any pending payments
-            pending_payments = Payment.objects.filter(student=student, status='Pending')
-            for payment in pending_payments:
-                payment.status = 'Failed'
-                payment.save()
-                
-                # If a room was reserved, release it
-                if payment.room:
-                    payment.room.available_seats += 1
-                    payment.room.save()
-            
-            # Reset student's payment status
-            student.payment_status = 'No Request'
-            student.save()
-        
-        # Create new payment with room price
-        payment = Payment.objects.create(
-            student=student,
-            room=room,
-            amount=amount,  # Using the room's price
-            transaction_id=transaction_id,
-            status='Pending'
-        )
-        
-        # Update room's available seats
-        room.available_seats -= 1
-        room.save()
-        
-        # Update student status
-        student.payment_status = 'Pending'
-        student.room = room  # Temporarily assign room
-        student.save()
-        
-        # Create booking request
-        BookingRequest.objects.create(
-            student=student,
-            room=room,
-            amount=amount,
-            transaction_id=transaction_id,
-            payment=payment,
-            status='Pending'
-        )
+        try:
+            payment = _submit_payment(student, room, transaction_id, idempotency_key)
+        except IntegrityError:
+            # A concurrent retry got in first; answer with its result
+            replay = _replay_payment(request.user, transaction_id, idempotency_key)
+            if replay is None:
+                raise
+            return replay
         
-        return Response({
-            'detail': 'Payment submitted successfully. Your booking request is pending admin approval.',
-            'payment_id': payment.id
-        })
+        if payment is None:
+            return Response(
+                {'detail': 'This room has no available seats.', 'code': 'sold_out'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return _payment_submitted(payment.id)
         
     except Student.DoesNotExist:
         return Response(
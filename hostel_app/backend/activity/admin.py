@@ -0,0 +1,47 @@
+from django.contrib import admin
+from django.core.exceptions import PermissionDenied
+from django.template.response import TemplateResponse
+from django.urls import path
+from .log import feed_page
+from .models import Activity
+
+
+@admin.register(Activity)
+class ActivityAdmin(admin.ModelAdmin):
+    list_display = ('created_at', 'action', 'student_name', 'status')
+    list_filter = ('action',)
+    search_fields = ('student_name',)
+    # The log only grows; skip counting all of it on every changelist page
+    show_full_result_count = False
+
+    def get_urls(self):
+        urls = super().get_urls()
+        custom_urls = [
+            path('feed/', self.admin_site.admin_view(self.feed_view), name='activity_activity_feed'),
+        ]
+        return custom_urls + urls
+
+    def feed_view(self, request):
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        try:
+            entries, cursor = feed_page(request.GET.get('before'))
+        except ValueError:
+            entries, cursor = feed_page()
+        context = {
+            **self.admin_site.each_context(request),
+            'title': 'Activity feed',
+            'entries': entries,
+            'cursor': cursor,
+            'opts': self.model._meta,
+        }
+        return TemplateResponse(request, 'admin/activity/activity/feed.html', context)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,68 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.db.models import Subquery
+from accounts.models import Student
+from .models import Activity
+
+# Entries per feed page unless the caller asks for fewer
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def entry(action, student, status='', at=None):
+    """An unsaved feed entry; pass several to record_many"""
+    fields = {'created_at': at} if at else {}
+    return Activity(action=action, student=student, student_name=student.name, status=status, **fields)
+
+
+def record(action, owner, status=''):
+    """Log an action on a row belonging to a student (a payment, a booking).
+
+    When the owner's student is not loaded, its name is read by a subquery
+    inside the INSERT rather than by a separate SELECT.
+    """
+    if owner._meta.get_field('student').is_cached(owner):
+        name = owner.student.name
+    else:
+        name = Subquery(Student.objects.filter(pk=owner.student_id).values('name')[:1])
+    Activity.objects.create(action=action, student_id=owner.student_id, student_name=name, status=status)
+
+
+def record_many(entries):
+    """Append many entries with one INSERT (per backend batch)"""
+    if entries:
+        Activity.objects.bulk_create(entries, batch_size=500)
+
+
+def encode_cursor(activity):
+    """Opaque position after ``activity``: its timestamp in microseconds and its id"""
+    return f"{(activity.created_at - EPOCH) // timedelta(microseconds=1)}.{activity.pk}"
+
+
+def decode_cursor(cursor):
+    """Inverse of encode_cursor; raises ValueError for anything it did not produce"""
+    micros, _, pk = cursor.partition('.')
+    pk = int(pk)
+    if not 0 < pk < 2**63:
+        raise ValueError(f'Cursor id out of range: {pk}')
+    try:
+        return EPOCH + timedelta(microseconds=int(micros)), pk
+    except OverflowError as e:
+        raise ValueError(f'Cursor time out of range: {micros}') from e
+
+
+def feed_page(before=None, size=PAGE_SIZE):
+    """One newest-first page of the feed and the cursor of the next, or None.
+
+    Pages are keyed on (created_at, id) rather than an offset, so the
+    index seeks straight to the page however far back it is. ``before`` is
+    a cursor from a previous page; a malformed one raises ValueError.
+    """
+    entries = Activity.objects.order_by('-created_at', '-id')
+    if before:
+        created_at, pk = decode_cursor(before)
+        entries = entries.filter(created_at__lte=created_at).exclude(created_at=created_at, pk__gte=pk)
+    page = list(entries[:size + 1])
+    if len(page) > size:
+        return page[:size], encode_cursor(page[size - 1])
+    return page, None
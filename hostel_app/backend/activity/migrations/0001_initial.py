@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:51
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('accounts', '0004_student_department_student_first_name_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Activity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('action', models.CharField(choices=[('Registration', 'Registration'), ('Payment', 'Payment'), ('Booking', 'Booking')], max_length=20)),
+                ('status', models.CharField(blank=True, max_length=20)),
+                ('student_name', models.CharField(max_length=255)),
+                ('student', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='activities', to='accounts.student')),
+            ],
+            options={
+                'verbose_name_plural': 'activities',
+                'ordering': ['-created_at', '-id'],
+                'indexes': [models.Index(fields=['created_at', 'id'], name='activity_feed_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,40 @@
+from django.db import migrations
+
+
+def backfill(apps, schema_editor):
+    """Seed the log with past registrations, payments and booking decisions, oldest first"""
+    Activity = apps.get_model('activity', 'Activity')
+    Student = apps.get_model('accounts', 'Student')
+    Payment = apps.get_model('payments', 'Payment')
+    BookingRequest = apps.get_model('bookings', 'BookingRequest')
+
+    entries = [
+        Activity(created_at=created_at, action='Registration', status=status, student_id=pk, student_name=name)
+        for pk, name, status, created_at in Student.objects.values_list('pk', 'name', 'payment_status', 'created_at')
+    ]
+    entries += [
+        Activity(created_at=created_at, action='Payment', status=status, student_id=student_id, student_name=name)
+        for student_id, name, status, created_at in Payment.objects.values_list(
+            'student_id', 'student__name', 'status', 'created_at'
+        )
+    ]
+    entries += [
+        Activity(created_at=processed_at, action='Booking', status=status, student_id=student_id, student_name=name)
+        for student_id, name, status, processed_at in BookingRequest.objects.exclude(status='Pending')
+        .filter(processed_at__isnull=False).values_list('student_id', 'student__name', 'status', 'processed_at')
+    ]
+    entries.sort(key=lambda activity: activity.created_at)
+    Activity.objects.bulk_create(entries, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activity', '0001_initial'),
+        ('bookings', '0004_allocationpreference'),
+        ('payments', '0004_payment_date_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Activity(models.Model):
+    """One entry of the append-only activity feed, written by activity.log.
+
+    The student's name is copied in so the feed is read without a join and
+    keeps its history when a student is deleted.
+    """
+    ACTION_CHOICES = (
+        ('Registration', 'Registration'),
+        ('Payment', 'Payment'),
+        ('Booking', 'Booking'),
+    )
+
+    created_at = models.DateTimeField(default=timezone.now)
+    action = models.CharField(max_length=20, choices=ACTION_CHOICES)
+    status = models.CharField(max_length=20, blank=True)
+    student = models.ForeignKey(
+        'accounts.Student', on_delete=models.SET_NULL, null=True, blank=True, related_name='activities'
+    )
+    student_name = models.CharField(max_length=255)
+
+    class Meta:
+        ordering = ['-created_at', '-id']
+        verbose_name_plural = 'activities'
+        indexes = [
+            # Serves the newest-first feed and every keyset page after it
+            models.Index(fields=['created_at', 'id'], name='activity_feed_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.student_name}: {self.action} {self.status}".strip()
+
+    @property
+    def label(self):
+        return f"{self.action} ({self.status})" if self.status and self.action != 'Registration' else self.action
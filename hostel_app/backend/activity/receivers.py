@@ -0,0 +1,27 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from accounts.models import Student
+from bookings.models import BookingRequest
+from payments.models import Payment
+from .log import entry, record
+
+# Single-row saves are logged here. Set-based writes (bulk_create,
+# queryset.update) append their entries with activity.log.record_many.
+
+
+@receiver(post_save, sender=Student)
+def log_registration(sender, instance, created, **kwargs):
+    if created:
+        entry('Registration', instance, instance.payment_status, at=instance.created_at).save()
+
+
+@receiver(post_save, sender=Payment)
+def log_payment(sender, instance, created, **kwargs):
+    if created or instance.has_changed('status'):
+        record('Payment', instance, instance.status)
+
+
+@receiver(post_save, sender=BookingRequest)
+def log_booking(sender, instance, created, **kwargs):
+    if not created and instance.has_changed('status'):
+        record('Booking', instance, instance.status)
@@ -0,0 +1,81 @@
+from datetime import timedelta
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from accounts.models import Student
+from bookings.models import BookingRequest
+from bookings.services import approve_bookings
+from hostel_management.admin_views import get_recent_activities
+from rooms.models import Room
+from .log import entry, feed_page, record_many
+from .models import Activity
+
+
+class ActivityLogTests(TestCase):
+    def setUp(self):
+        self.room = Room.objects.create(
+            category='2 AC A', location='BH2', menu='Veg', rooms_count=5, pax_per_room=1,
+            capacity=5, available_seats=5, price=18000
+        )
+        self.admin = User.objects.create_superuser('warden', 'warden@example.com', 'x')
+        self.client = APIClient()
+
+    def make_student(self, email):
+        user = User.objects.create(username=email, email=email)
+        return Student.objects.create(user=user, name=email, email=email, gender='Male')
+
+    def test_registrations_payments_and_decisions_are_logged(self):
+        student = self.make_student('a@example.com')
+        self.client.force_authenticate(student.user)
+        response = self.client.post(
+            reverse('make-payment'), {'room_id': self.room.id, 'transaction_id': 'TXN1'}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        approve_bookings(BookingRequest.objects.all(), self.admin)
+
+        self.assertEqual(
+            [(activity.student_name, activity.label) for activity in feed_page()[0]],
+            [('a@example.com', 'Booking (Approved)'), ('a@example.com', 'Payment (Pending)'),
+             ('a@example.com', 'Registration')]
+        )
+        self.assertEqual([activity['action'] for activity in get_recent_activities()][0], 'Booking (Approved)')
+
+    def test_pages_follow_the_keyset_through_equal_timestamps(self):
+        student = self.make_student('b@example.com')
+        Activity.objects.all().delete()
+        now = timezone.now()
+        # Pairs of entries share a timestamp, so the id has to break ties
+        record_many([entry('Payment', student, 'Pending', at=now - timedelta(days=i // 2)) for i in range(25)])
+
+        seen, cursor = [], None
+        while True:
+            with self.assertNumQueries(1):
+                page, cursor = feed_page(cursor, size=7)
+            seen += page
+            if cursor is None:
+                break
+        self.assertEqual(len(seen), 25)
+        self.assertEqual(
+            [activity.pk for activity in seen],
+            list(Activity.objects.order_by('-created_at', '-id').values_list('pk', flat=True))
+        )
+
+    def test_feed_endpoint_and_admin_view(self):
+        student = self.make_student('c@example.com')
+        record_many([entry('Payment', student, 'Pending') for _ in range(4)])
+        self.client.force_authenticate(self.admin)
+
+        response = self.client.get(reverse('activity-feed'), {'size': 3})
+        self.assertEqual((response.status_code, len(response.data['results'])), (200, 3))
+        response = self.client.get(response.data['next'])
+        self.assertEqual((len(response.data['results']), response.data['next']), (2, None))
+        self.assertEqual(self.client.get(reverse('activity-feed'), {'before': 'nope'}).status_code, 400)
+        for before in ('9' * 30 + '.1', '-' + '9' * 18 + '.1', '1.' + '9' * 30):
+            self.assertEqual(self.client.get(reverse('activity-feed'), {'before': before}).status_code, 400)
+
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('admin:activity_activity_feed'))
+        self.assertEqual((response.status_code, len(response.context['entries'])), (200, 5))
+        self.assertContains(self.client.get(reverse('admin:activity_activity_changelist')), 'Scroll the feed')
@@ -0,0 +1,34 @@
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from django.utils.http import urlencode
+from .log import MAX_PAGE_SIZE, PAGE_SIZE, feed_page
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def activity_feed(request):
+    """Newest-first activity, one keyset page at a time; follow ``next`` to go back"""
+    try:
+        size = min(int(request.query_params.get('size', PAGE_SIZE)), MAX_PAGE_SIZE)
+        if size < 1:
+            raise ValueError
+        entries, cursor = feed_page(request.query_params.get('before'), size)
+    except ValueError:
+        return Response({'detail': 'Invalid page size or cursor.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response({
+        'next': request.build_absolute_uri(f"{request.path}?{urlencode({'before': cursor, 'size': size})}") if cursor else None,
+        'results': [
+            {
+                'id': entry.pk,
+                'created_at': entry.created_at,
+                'action': entry.action,
+                'status': entry.status,
+                'student': entry.student_id,
+                'student_name': entry.student_name,
+            }
+            for entry in entries
+        ],
+    })
@@ -1,17 +1,17 @@
-from django.contrib import admin
-from django.utils import timezone
+from django.contrib import admin, messages
+from django.shortcuts import redirect
 from django.utils.html import format_html
-from django.core.mail import send_mail
-from django.conf import settings
-from .models import BookingRequest
-from django.urls import reverse
-from django.db import transaction
+from .models import BookingRequest, SeatHold, AdmissionTicket, AllocationPreference
+from .services import approve_bookings, reject_bookings
+from django.urls import path, reverse
+from jobs.admin import BackgroundActionMixin
 
-class BookingRequestAdmin(admin.ModelAdmin):
+class BookingRequestAdmin(BackgroundActionMixin, admin.ModelAdmin):
     list_display = ('student_info', 'room_info', 'amount', 'transaction_id', 'status_colored', 'created_at', 'action_buttons')
     list_filter = ('status', 'created_at', 'room__category', 'room__location')
     search_fields = ('student__name', 'student__email', 'student__roll_number', 'transaction_id', 'admin_notes')
     readonly_fields = ('created_at', 'updated_at', 'processed_at', 'processed_by')
+    list_select_related = ('student', 'room')
     
     fieldsets = (
         ('Student Information', {
@@ -94,133 +94,65 @@ class BookingRequestAdmin(admin.ModelAdmin):
     action_buttons.short_description = 'Actions'
     
     def approve_bookings(self, request, queryset):
-        count = 0
-        for booking in queryset.filter(status='Pending'):
-            self._process_approval(request, booking)
-            count += 1
+        if self.enqueue_selection(request, queryset, 'bookings.transition_bookings', status='Approved'):
+            return
+        count = approve_bookings(queryset, request.user)
         self.message_user(request, f"Successfully approved {count} booking(s)")
     approve_bookings.short_description = "Approve selected bookings"
     
     def reject_bookings(self, request, queryset):
-        count = 0
-        for booking in queryset.filter(status='Pending'):
-            self._process_rejection(request, booking)
-            count += 1
+        if self.enqueue_selection(request, queryset, 'bookings.transition_bookings', status='Rejected'):
+            return
+        count = reject_bookings(queryset, request.user)
         self.message_user(request, f"Successfully rejected {count} booking(s)")
     reject_bookings.short_description = "Reject selected bookings"
     
-    def _process_approval(self, request, booking):
-        """Process booking approval, update all related records"""
-        with transaction.atomic():
-            # Update booking request
-            booking.status = 'Approved'
-            booking.processed_by = request.user
-            booking.processed_at = timezone.now()
-            booking.save()
-            
-            # Update payment
-            if booking.payment:
-                payment = booking.payment
-                payment.status = 'Confirmed'
-                payment.verified = True
-                payment.verification_date = timezone.now()
-                payment.save()
-            
-            # Update student
-            student = booking.student
-            student.payment_status = 'Confirmed'
-            student.room = booking.room  # Ensure room is assigned
-            student.save()
-            
-            # Send confirmation email
-            self._send_confirmation_email(booking)
+    def get_urls(self):
+        urls = super().get_urls()
+        custom_urls = [
+            path('<int:booking_id>/approve/', self.admin_site.admin_view(self.approve_booking_view),
+                 name='bookings_bookingrequest_approve'),
+            path('<int:booking_id>/reject/', self.admin_site.admin_view(self.reject_booking_view),
+                 name='bookings_bookingrequest_reject'),
+        ]
+        return custom_urls + urls
     
-    def _process_rejection(self, request, booking):
-        """Process booking rejection, update all related records"""
-        with transaction.atomic():
-            # Update booking request
-            booking.status = 'Rejected'
-            booking.processed_by = request.user
-            booking.processed_at = timezone.now()
-            booking.save()
-            
-            # Update payment
-            if booking.payment:
-                payment = booking.payment
-                payment.status = 'Failed'
-                payment.verified = True
-                payment.verification_date = timezone.now()
-                payment.save()
-            
-            # Return room to available seats
-            room = booking.room
-            room.available_seats += 1
-            room.save()
-            
-            # Update student
-            student = booking.student
-            student.payment_status = 'Failed'
-            student.room = None  # Remove room assignment
-            student.save()
-            
-            # Send rejection email
-            self._send_rejection_email(booking)
+    def approve_booking_view(self, request, booking_id):
+        if approve_bookings(BookingRequest.objects.filter(pk=booking_id), request.user):
+            messages.success(request, "Booking approved")
+        else:
+            messages.error(request, "Only pending bookings can be approved")
+        return redirect('admin:bookings_bookingrequest_changelist')
     
-    def _send_confirmation_email(self, booking):
-        """Send booking confirmation email"""
-        subject = 'Room Booking Confirmed'
-        message = f'''
-        Hello {booking.student.name},
-        
-        Congratulations! Your room booking has been confirmed.
-        
-        Room Details:
-        - Category: {booking.room.category}
-        - Location: {booking.room.location}
-        - Menu: {booking.room.menu}
-        
-        Please contact the hostel administration if you have any questions.
-        
-        Regards,
-        Student Hostel Management Team
-        '''
-        
-        try:
-            send_mail(
-                subject,
-                message,
-                settings.DEFAULT_FROM_EMAIL,
-                [booking.student.email],
-                fail_silently=True,
-            )
-        except Exception as e:
-            print(f"Email error: {e}")
-    
-    def _send_rejection_email(self, booking):
-        """Send booking rejection email"""
-        subject = 'Room Booking Request Rejected'
-        message = f'''
-        Hello {booking.student.name},
-        
-        We regret to inform you that your room booking request has been rejected.
-        
-        If you have any questions about this decision, please contact the hostel administration.
-        
-        You can submit a new booking request for a different room if available.
-        
-        Regards,
-        Student Hostel Management Team
-        '''
-        
-        try:
-            send_mail(
-                subject,
-                message,
-                settings.DEFAULT_FROM_EMAIL,
-                [booking.student.email],
-                fail_silently=True,
-            )
-        except Exception as e:
-            print(f"Email error: {e}")
+    def reject_booking_view(self, request, booking_id):
+        if reject_bookings(BookingRequest.objects.filter(pk=booking_id), request.user):
+            messages.success(request, "Booking rejected")
+        else:
+            messages.error(request, "Only pending bookings can be rejected")
+        return redirect('admin:bookings_bookingrequest_changelist')
 
 admin.site.register(BookingRequest, BookingRequestAdmin)
+
+@admin.register(SeatHold)
+class SeatHoldAdmin(admin.ModelAdmin):
+    list_display = ('student', 'room', 'payment', 'expires_at', 'released_at', 'created_at')
+    list_filter = ('released_at', 'room__category', 'room__location')
+    search_fields = ('student__name', 'student__email', 'payment__transaction_id')
+    readonly_fields = ('created_at',)
+    list_select_related = ('student', 'room', 'payment')
+
+@admin.register(AdmissionTicket)
+class AdmissionTicketAdmin(admin.ModelAdmin):
+    list_display = ('token', 'user', 'created_at', 'admitted_at')
+    list_filter = ('admitted_at',)
+    search_fields = ('user__username', 'user__email')
+    readonly_fields = ('token', 'created_at')
+    list_select_related = ('user',)
+
+@admin.register(AllocationPreference)
+class AllocationPreferenceAdmin(admin.ModelAdmin):
+    list_display = ('student', 'priority', 'menu', 'pax_per_room', 'location', 'updated_at')
+    list_filter = ('menu', 'pax_per_room', 'location', 'student__year')
+    search_fields = ('student__name', 'student__email', 'student__roll_number')
+    list_select_related = ('student',)
+    raw_id_fields = ('student',)
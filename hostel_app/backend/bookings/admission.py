@@ -0,0 +1,94 @@
+import math
+from django.conf import settings
+from django.db.models import Max
+from django.utils import timezone
+from rest_framework.permissions import BasePermission
+from .models import AdmissionTicket
+
+
+def queue_settings():
+    return settings.ADMISSION_QUEUE
+
+
+def queue_enabled():
+    return queue_settings()['ENABLED']
+
+
+def admit_due(now=None):
+    """Admit the next waiting tickets at the configured rate.
+
+    The allowance is the time since the last admission multiplied by
+    ADMIT_RATE, capped at one second's worth so an idle spell does not
+    release a burst. Called on every poll, so the queue drains while
+    students wait and stops when nobody is waiting.
+    """
+    now = now or timezone.now()
+    rate = queue_settings()['ADMIT_RATE']
+    burst = max(1, math.ceil(rate))
+    
+    last_admitted = AdmissionTicket.objects.aggregate(last=Max('admitted_at'))['last']
+    if last_admitted is None:
+        allowance = burst
+    else:
+        allowance = min(burst, int((now - last_admitted).total_seconds() * rate))
+    if allowance <= 0:
+        return 0
+    
+    waiting = list(
+        AdmissionTicket.objects.filter(admitted_at__isnull=True)
+        .order_by('id').values_list('id', flat=True)[:allowance]
+    )
+    if not waiting:
+        return 0
+    return AdmissionTicket.objects.filter(id__in=waiting, admitted_at__isnull=True).update(admitted_at=now)
+
+
+def join_queue(user):
+    """Return the user's live ticket, or put them at the back of the queue"""
+    window_start = timezone.now() - queue_settings()['ADMISSION_WINDOW']
+    ticket = (
+        AdmissionTicket.objects.filter(user=user, admitted_at__isnull=True).first()
+        or AdmissionTicket.objects.filter(user=user, admitted_at__gte=window_start).first()
+    )
+    if ticket is None:
+        ticket = AdmissionTicket.objects.create(user=user)
+    return ticket
+
+
+def ticket_status(ticket, now=None):
+    """Describe where a ticket stands, admitting any tickets that are due first"""
+    now = now or timezone.now()
+    admit_due(now)
+    ticket.refresh_from_db(fields=['admitted_at'])
+    
+    if ticket.admitted_at is None:
+        position = AdmissionTicket.objects.filter(admitted_at__isnull=True, id__lte=ticket.id).count()
+        return {
+            'token': str(ticket.token),
+            'status': 'waiting',
+            'position': position,
+            'estimated_wait_seconds': math.ceil(position / queue_settings()['ADMIT_RATE']),
+        }
+    
+    expires_at = ticket.admitted_at + queue_settings()['ADMISSION_WINDOW']
+    return {
+        'token': str(ticket.token),
+        'status': 'admitted' if expires_at > now else 'expired',
+        'position': 0,
+        'expires_at': expires_at,
+    }
+
+
+def has_admission(user):
+    if not queue_enabled() or user.is_staff:
+        return True
+    window_start = timezone.now() - queue_settings()['ADMISSION_WINDOW']
+    return AdmissionTicket.objects.filter(user=user, admitted_at__gte=window_start).exists()
+
+
+class HasAdmission(BasePermission):
+    """Only let students through once the waiting room has admitted them"""
+    message = 'The booking system is busy. Join the queue at /api/queue/join/ and wait for your turn.'
+    
+    def has_permission(self, request, view):
+        return has_admission(request.user)
@@ -0,0 +1,152 @@
+import random
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from accounts.models import Student
+from rooms.cache import invalidate_catalog
+from rooms.models import Room
+from rooms.inventory import fill_beds
+from rooms.services import adjust_occupancy, set_shard_count, with_total_seats
+
+
+# Stay well inside SQLite's bound-parameter limit
+UPDATE_CHUNK_SIZE = 900
+
+
+class AllocationError(Exception):
+    """Raised when room inventory changed underneath an allocation run"""
+
+
+@dataclass
+class Allocation:
+    """The outcome of a matching pass, before anything is written"""
+    assignments: dict = field(default_factory=dict)  # student id -> room id
+    unallocated: list = field(default_factory=list)  # (student, reason)
+    relaxed: int = 0
+
+    def seats_by_room(self):
+        return Counter(self.assignments.values())
+
+
+def eligible_students(years=None):
+    """Students without a room, with their preferences, in one query"""
+    students = (
+        Student.objects.filter(room__isnull=True, payment_status__in=['No Request', 'Failed'])
+        .select_related('allocation_preference')
+    )
+    if years:
+        students = students.filter(year__in=years)
+    return list(students)
+
+
+def order_students(students, mode='merit', seed=None):
+    """Merit order by priority (unranked last), or a reproducible lottery"""
+    if mode == 'lottery':
+        students = sorted(students, key=lambda s: s.pk)
+        random.Random(seed).shuffle(students)
+        return students
+
+    def merit_key(student):
+        preference = getattr(student, 'allocation_preference', None)
+        priority = preference.priority if preference else None
+        return (priority is None, priority or 0, student.pk)
+    return sorted(students, key=merit_key)
+
+
+def match(students, rooms, strict=False):
+    """Assign each student, in order, to a room that fits their preferences.
+
+    Gender is always enforced through the room's hostel. Menu and room
+    size preferences are relaxed, in that order, when nothing matching is
+    left unless ``strict`` is set. Among fitting rooms the preferred
+    location wins, then the room with most seats left.
+    """
+    remaining = {room.pk: room.total_available_seats for room in rooms}
+    rooms_by_gender = defaultdict(list)
+    for room in rooms:
+        rooms_by_gender[room.gender].append(room)
+
+    allocation = Allocation()
+    for student in students:
+        preference = getattr(student, 'allocation_preference', None)
+        menu = preference.menu if preference else ''
+        pax = preference.pax_per_room if preference else None
+        location = preference.location if preference else ''
+
+        passes = [(menu, pax)]
+        if not strict:
+            passes += [(menu, None), ('', None)]
+
+        choice = None
+        for pass_index, (want_menu, want_pax) in enumerate(passes):
+            candidates = [
+                room for room in rooms_by_gender[student.gender]
+                if remaining[room.pk] > 0
+                and (not want_menu or room.menu == want_menu)
+                and (not want_pax or room.pax_per_room == want_pax)
+            ]
+            if candidates:
+                choice = max(candidates, key=lambda room: (room.location == location, remaining[room.pk]))
+                allocation.relaxed += pass_index > 0
+                break
+
+        if choice is None:
+            allocation.unallocated.append((student, 'No room left matching preferences'))
+            continue
+        remaining[choice.pk] -= 1
+        allocation.assignments[student.pk] = choice.pk
+
+    return allocation
+
+
+def load_rooms():
+    return list(with_total_seats(Room.objects.select_related('hostel')).order_by('pk'))
+
+
+@transaction.atomic
+def apply_allocation(allocation, payment_status='Confirmed', assign_beds=False):
+    """Write every assignment and seat count back in one transaction.
+
+    With ``assign_beds`` each student also gets a bed in the physical room
+    inventory, filling partially occupied rooms first.
+    """
+    seats_by_room = allocation.seats_by_room()
+    # Gather sharded seats on the room row so one UPDATE can take them
+    sharded = {room: room.shard_count for room in Room.objects.filter(pk__in=seats_by_room, shard_count__gt=0)}
+    for room in sharded:
+        set_shard_count(room, 0)
+
+    for room_id, seats in seats_by_room.items():
+        taken = Room.objects.filter(pk=room_id, available_seats__gte=seats).update(
+            available_seats=F('available_seats') - seats
+        )
+        if not taken:
+            raise AllocationError(f'Room {room_id} no longer has {seats} seat(s) free')
+    invalidate_catalog()
+
+    for room, shard_count in sharded.items():
+        set_shard_count(room, shard_count)
+
+    # One UPDATE per room and chunk rather than a per-row CASE in bulk_update
+    now = timezone.now()
+    students_by_room = defaultdict(list)
+    for student_id, room_id in allocation.assignments.items():
+        students_by_room[room_id].append(student_id)
+    for room_id, student_ids in students_by_room.items():
+        for start in range(0, len(student_ids), UPDATE_CHUNK_SIZE):
+            chunk = student_ids[start:start + UPDATE_CHUNK_SIZE]
+            updated = Student.objects.filter(pk__in=chunk, room__isnull=True).update(
+                room_id=room_id, payment_status=payment_status, updated_at=now
+            )
+            if updated != len(chunk):
+                raise AllocationError('Some students were given a room while the allocation ran')
+    adjust_occupancy({room_id: len(student_ids) for room_id, student_ids in students_by_room.items()})
+
+    if assign_beds:
+        for room in Room.objects.filter(pk__in=students_by_room):
+            unplaced = fill_beds(room, students_by_room[room.pk])
+            if unplaced:
+                raise AllocationError(f'{room} has no free bed for {len(unplaced)} student(s)')
+    return len(allocation.assignments)
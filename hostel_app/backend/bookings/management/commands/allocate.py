@@ -0,0 +1,73 @@
+import csv
+import time
+from django.core.management.base import BaseCommand, CommandError
+from bookings.allocation import (
+    AllocationError, apply_allocation, eligible_students, load_rooms, match, order_students
+)
+
+class Command(BaseCommand):
+    help = 'Allocate rooms to unassigned students by merit list or lottery in one pass'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mode', choices=['merit', 'lottery'], default='merit',
+                            help='Order students by preference priority (merit) or at random (lottery)')
+        parser.add_argument('--seed', type=int,
+                            help='Seed for a reproducible lottery')
+        parser.add_argument('--year', action='append', dest='years',
+                            help='Only allocate students of this year (repeatable), e.g. --year 1')
+        parser.add_argument('--strict', action='store_true',
+                            help='Never relax menu or room size preferences')
+        parser.add_argument('--status', choices=['Confirmed', 'Pending'], default='Confirmed',
+                            help='Payment status given to allocated students')
+        parser.add_argument('--assign-beds', action='store_true',
+                            help='Also give each student a bed (run build_bed_inventory first)')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Report the allocation without writing anything')
+        parser.add_argument('--report',
+                            help='Write a per-student CSV report to this path')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        students = order_students(eligible_students(options['years']), options['mode'], options['seed'])
+        rooms = load_rooms()
+        allocation = match(students, rooms, strict=options['strict'])
+        elapsed = time.monotonic() - started
+
+        self.stdout.write(f'Matched {len(allocation.assignments)} of {len(students)} student(s) '
+                          f'in {elapsed:.2f}s ({allocation.relaxed} with relaxed preferences)')
+        seats_by_room = allocation.seats_by_room()
+        for room in rooms:
+            if seats_by_room[room.pk]:
+                self.stdout.write(f'  {room}: {seats_by_room[room.pk]} allocated, '
+                                  f'{room.total_available_seats - seats_by_room[room.pk]} left')
+        if allocation.unallocated:
+            self.stdout.write(self.style.WARNING(f'{len(allocation.unallocated)} student(s) could not be placed'))
+
+        if options['report']:
+            self.write_report(options['report'], students, allocation, {room.pk: room for room in rooms})
+
+        if options['dry_run']:
+            self.stdout.write(self.style.NOTICE('Dry run: nothing was written'))
+            return
+
+        try:
+            assigned = apply_allocation(
+                allocation, payment_status=options['status'], assign_beds=options['assign_beds']
+            )
+        except AllocationError as e:
+            raise CommandError(f'{e}. Nothing was written; run the allocation again.')
+        self.stdout.write(self.style.SUCCESS(f'Allocated {assigned} student(s)'))
+
+    def write_report(self, path, students, allocation, rooms):
+        reasons = {student.pk: reason for student, reason in allocation.unallocated}
+        with open(path, 'w', newline='') as report:
+            writer = csv.writer(report)
+            writer.writerow(['roll_number', 'name', 'gender', 'room', 'outcome'])
+            for student in students:
+                room = rooms.get(allocation.assignments.get(student.pk))
+                writer.writerow([
+                    student.roll_number, student.name, student.gender,
+                    str(room) if room else '',
+                    'Allocated' if room else reasons[student.pk],
+                ])
+        self.stdout.write(f'Report written to {path}')
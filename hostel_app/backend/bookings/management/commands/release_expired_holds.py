@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from bookings.services import release_expired_holds
+
+class Command(BaseCommand):
+    help = 'Release expired seat holds and fail their pending payments (run periodically, e.g. from cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Number of holds released per transaction')
+
+    def handle(self, *args, **options):
+        released = release_expired_holds(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Released {released} expired seat hold(s)'))
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_student_department_student_first_name_and_more'),
+        ('bookings', '0001_initial'),
+        ('payments', '0002_alter_payment_room_alter_payment_student'),
+        ('rooms', '0006_room_price'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='bookingrequest',
+            name='status',
+            field=models.CharField(choices=[('Pending', 'Pending'), ('Approved', 'Approved'), ('Rejected', 'Rejected'), ('Cancelled', 'Cancelled'), ('Expired', 'Expired')], default='Pending', max_length=20),
+        ),
+        migrations.CreateModel(
+            name='SeatHold',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('expires_at', models.DateTimeField()),
+                ('released_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('payment', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='seat_hold', to='payments.payment')),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='seat_holds', to='rooms.room')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='seat_holds', to='accounts.student')),
+            ],
+            options={
+                'ordering': ['expires_at'],
+                'indexes': [models.Index(condition=models.Q(('released_at__isnull', True)), fields=['expires_at'], name='seathold_active_expiry_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_student_department_student_first_name_and_more'),
+        ('bookings', '0003_admissionticket'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AllocationPreference',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('priority', models.PositiveIntegerField(blank=True, null=True)),
+                ('menu', models.CharField(blank=True, choices=[('Veg', 'Veg'), ('Non Veg', 'Non Veg')], max_length=10)),
+                ('pax_per_room', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('location', models.CharField(blank=True, max_length=50)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('student', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='allocation_preference', to='accounts.student')),
+            ],
+            options={
+                'ordering': ['priority'],
+            },
+        ),
+    ]
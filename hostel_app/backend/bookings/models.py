@@ -3,13 +3,16 @@ from django.conf import settings
 from accounts.models import Student
 from rooms.models import Room
 from django.utils import timezone
+from hostel_management.tracking import TrackChangesMixin
+import uuid
 
-class BookingRequest(models.Model):
+class BookingRequest(TrackChangesMixin, models.Model):
     STATUS_CHOICES = (
         ('Pending', 'Pending'),
         ('Approved', 'Approved'),
         ('Rejected', 'Rejected'),
-        ('Cancelled', 'Cancelled')
+        ('Cancelled', 'Cancelled'),
+        ('Expired', 'Expired')
     )
     
     student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='booking_requests')
@@ -31,11 +34,9 @@ class BookingRequest(models.Model):
     
     def save(self, *args, **kwargs):
         # If status changing to Approved/Rejected and processed_at not set, set it now
-        if self.pk:
-            old_obj = BookingRequest.objects.get(pk=self.pk)
-            if old_obj.status == 'Pending' and self.status in ['Approved', 'Rejected']:
-                if not self.processed_at:
-                    self.processed_at = timezone.now()
+        if self.has_changed('status') and self.initial_value('status') == 'Pending':
+            if self.status in ['Approved', 'Rejected'] and not self.processed_at:
+                self.processed_at = timezone.now()
         
         super().save(*args, **kwargs)
     
@@ -43,3 +44,72 @@ class BookingRequest(models.Model):
         ordering = ['-created_at']
         verbose_name = "Booking Request"
         verbose_name_plural = "Booking Requests"
+
+
+class SeatHold(models.Model):
+    """A seat kept aside for a pending payment until it expires"""
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='seat_holds')
+    room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name='seat_holds')
+    payment = models.OneToOneField('payments.Payment', on_delete=models.CASCADE, related_name='seat_hold')
+    expires_at = models.DateTimeField()
+    released_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"Hold for {self.student.name} - {self.room.category} until {self.expires_at}"
+    
+    @property
+    def is_expired(self):
+        return self.released_at is None and self.expires_at <= timezone.now()
+    
+    class Meta:
+        ordering = ['expires_at']
+        indexes = [
+            # Only unreleased holds are ever swept, so keep the index small
+            models.Index(
+                fields=['expires_at'],
+                condition=models.Q(released_at__isnull=True),
+                name='seathold_active_expiry_idx',
+            ),
+        ]
+
+
+class AdmissionTicket(models.Model):
+    """A place in the allocation-day waiting room"""
+    token = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='admission_tickets')
+    created_at = models.DateTimeField(auto_now_add=True)
+    admitted_at = models.DateTimeField(null=True, blank=True)
+    
+    def __str__(self):
+        return f"Ticket {self.token} for {self.user}"
+    
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            # Queue positions are counted over waiting tickets only
+            models.Index(
+                fields=['id'],
+                condition=models.Q(admitted_at__isnull=True),
+                name='ticket_waiting_idx',
+            ),
+            models.Index(fields=['user', 'admitted_at'], name='ticket_user_admitted_idx'),
+        ]
+
+
+class AllocationPreference(models.Model):
+    """A student's place and wishes for a rule-based allocation run"""
+    student = models.OneToOneField(Student, on_delete=models.CASCADE, related_name='allocation_preference')
+    # Merit rank; lower goes first. Left empty for lottery rounds.
+    priority = models.PositiveIntegerField(null=True, blank=True)
+    menu = models.CharField(max_length=10, choices=Room.MENU_CHOICES, blank=True)
+    pax_per_room = models.PositiveSmallIntegerField(null=True, blank=True)
+    location = models.CharField(max_length=50, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"Preference of {self.student.name}"
+    
+    class Meta:
+        ordering = ['priority']
@@ -0,0 +1,52 @@
+from django.conf import settings
+from django.core.mail import EmailMessage
+from notifications.outbox import enqueue_messages
+
+APPROVED_MESSAGE = '''
+        Hello {name},
+        
+        Congratulations! Your room booking has been confirmed.
+        
+        Room Details:
+        - Category: {category}
+        - Location: {location}
+        - Menu: {menu}
+        
+        Please contact the hostel administration if you have any questions.
+        
+        Regards,
+        Student Hostel Management Team
+        '''
+
+REJECTED_MESSAGE = '''
+        Hello {name},
+        
+        We regret to inform you that your room booking request has been rejected.
+        
+        If you have any questions about this decision, please contact the hostel administration.
+        
+        You can submit a new booking request for a different room if available.
+        
+        Regards,
+        Student Hostel Management Team
+        '''
+
+
+def booking_email(booking, approved):
+    """The confirmation or rejection email for a processed booking"""
+    if approved:
+        subject = 'Room Booking Confirmed'
+        body = APPROVED_MESSAGE.format(
+            name=booking.student.name, category=booking.room.category,
+            location=booking.room.location, menu=booking.room.menu,
+        )
+    else:
+        subject = 'Room Booking Request Rejected'
+        body = REJECTED_MESSAGE.format(name=booking.student.name)
+    return EmailMessage(subject, body, settings.DEFAULT_FROM_EMAIL, [booking.student.email])
+
+
+def queue_emails(messages):
+    """Write messages to the outbox in the current transaction for send_outbox to deliver"""
+    if messages:
+        enqueue_messages(messages)
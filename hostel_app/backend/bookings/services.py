@@ -0,0 +1,194 @@
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, Value, When
+from django.utils import timezone
+from accounts.models import Student
+from activity.log import entry, record_many
+from payments.models import Payment
+from rooms.inventory import settle_beds, vacate_beds
+from rooms.services import adjust_occupancy, release_seats
+from stats.counters import PENDING_BOOKINGS, bump, payment_changes
+from .models import BookingRequest, SeatHold
+from .notifications import booking_email, queue_emails
+
+
+def hold_seat(payment):
+    """Record the seat taken for a pending payment so it can expire"""
+    return SeatHold.objects.create(
+        student_id=payment.student_id,
+        room_id=payment.room_id,
+        payment=payment,
+        expires_at=timezone.now() + settings.SEAT_HOLD_TTL,
+    )
+
+
+def release_holds(payments, now=None):
+    """Mark the holds of the given payments as released"""
+    SeatHold.objects.filter(payment__in=payments, released_at__isnull=True).update(
+        released_at=now or timezone.now()
+    )
+
+
+@dataclass(frozen=True)
+class Transition:
+    """What leaving Pending for a given booking status does to the rest of the booking"""
+    payment_status: str
+    student_status: str
+    keeps_seat: bool = False
+    verifies_payment: bool = False
+    notifies: bool = False
+
+
+# Payments handled per transition in bulk actions; keeps IN lists well inside SQLite's limits
+PAYMENT_CHUNK_SIZE = 500
+
+# The booking lifecycle: every booking starts Pending and ends in one of these
+TRANSITIONS = {
+    'Approved': Transition('Confirmed', 'Confirmed', keeps_seat=True, verifies_payment=True, notifies=True),
+    'Rejected': Transition('Failed', 'Failed', verifies_payment=True, notifies=True),
+    'Cancelled': Transition('Failed', 'No Request'),
+    'Expired': Transition('Failed', 'Failed'),
+}
+
+
+@transaction.atomic
+def transition_bookings(bookings, status, processed_by=None, now=None):
+    """Move every pending booking in a queryset to ``status``.
+
+    This is the single implementation of the booking lifecycle. The pending
+    rows are locked and loaded with their students and rooms in one query,
+    then bookings, payments, students, seat counts and holds are written
+    with a fixed number of set-based UPDATEs (one per room for approved
+    students), however many bookings are selected. Beds in the physical
+    room inventory follow: approved students keep or get one, students who
+    lose their room give theirs back. Approval and rejection
+    emails go to the outbox in the same transaction. Bookings that are no
+    longer pending are left alone. Returns the number of bookings moved.
+    """
+    transition = TRANSITIONS[status]
+    now = now or timezone.now()
+    pending = list(
+        bookings.filter(status='Pending')
+        .select_for_update(of=('self',))
+        .select_related('student', 'room', 'payment')
+    )
+    if not pending:
+        return 0
+    payment_ids = [booking.payment_id for booking in pending if booking.payment_id]
+    
+    bookings.model.objects.filter(pk__in=[booking.pk for booking in pending]).update(
+        status=status, processed_by=processed_by, processed_at=now, updated_at=now
+    )
+    payment_updates = {'status': transition.payment_status, 'updated_at': now}
+    if transition.verifies_payment:
+        payment_updates.update(verified=True, verification_date=now)
+    Payment.objects.filter(pk__in=payment_ids).update(**payment_updates)
+    
+    occupancy = Counter()
+    if transition.keeps_seat:
+        students_by_room = defaultdict(list)
+        for booking in {booking.student_id: booking for booking in pending}.values():
+            students_by_room[booking.room_id].append(booking.student_id)
+            if booking.student.room_id != booking.room_id:
+                occupancy[booking.student.room_id] -= 1
+                occupancy[booking.room_id] += 1
+        for room_id, student_ids in students_by_room.items():
+            Student.objects.filter(pk__in=student_ids).update(
+                payment_status=transition.student_status, room_id=room_id, updated_at=now
+            )
+        settle_beds(students_by_room)
+    else:
+        # At most one seat per student, whatever number of their bookings are selected
+        holding = {
+            booking.student_id: booking for booking in pending if booking.student.room_id == booking.room_id
+        }
+        Student.objects.filter(pk__in=[booking.student_id for booking in pending]).update(
+            payment_status=transition.student_status,
+            room=Case(When(pk__in=list(holding), then=Value(None)), default=F('room')),
+            updated_at=now,
+        )
+        release_seats(Counter(booking.room_id for booking in holding.values()))
+        vacate_beds(list(holding))
+        occupancy.subtract(booking.room_id for booking in holding.values())
+    adjust_occupancy(occupancy)
+    release_holds(payment_ids, now)
+
+    stats = Counter({PENDING_BOOKINGS: -len(pending)})
+    for payment in {booking.payment_id: booking.payment for booking in pending if booking.payment}.values():
+        stats.update(payment_changes(
+            (payment.status, payment.amount, payment.room_id),
+            (transition.payment_status, payment.amount, payment.room_id),
+        ))
+    bump(stats)
+    record_many([entry('Booking', booking.student, status, at=now) for booking in pending])
+    
+    if transition.notifies:
+        queue_emails([booking_email(booking, approved=status == 'Approved') for booking in pending])
+    return len(pending)
+
+
+def approve_bookings(bookings, processed_by, now=None):
+    return transition_bookings(bookings, 'Approved', processed_by, now)
+
+
+def reject_bookings(bookings, processed_by, now=None):
+    return transition_bookings(bookings, 'Rejected', processed_by, now)
+
+
+def bookings_for_payments(payments):
+    """The booking requests of the given payments, created for pending payments that lack one"""
+    payments = Payment.objects.filter(pk__in=[getattr(payment, 'pk', payment) for payment in payments])
+    orphans = payments.filter(status='Pending', room__isnull=False, booking_request__isnull=True)
+    created = BookingRequest.objects.bulk_create([
+        BookingRequest(
+            student_id=payment.student_id, room_id=payment.room_id, amount=payment.amount,
+            transaction_id=payment.transaction_id or '', payment=payment
+        )
+        for payment in orphans
+    ])
+    bump({PENDING_BOOKINGS: len(created)})
+    return BookingRequest.objects.filter(payment__in=payments)
+
+
+@transaction.atomic
+def transition_payments(payments, status, processed_by=None, chunk_size=PAYMENT_CHUNK_SIZE):
+    """Move the bookings of many payments to ``status``, a chunk at a time.
+
+    Each chunk is one transition_bookings call, so a whole semester of
+    payments costs a fixed number of queries per chunk and seats are given
+    back with one UPDATE per chunk. Returns the number of bookings moved.
+    """
+    payment_ids = list(payments.values_list('pk', flat=True))
+    moved = 0
+    for start in range(0, len(payment_ids), chunk_size):
+        chunk = payment_ids[start:start + chunk_size]
+        moved += transition_bookings(bookings_for_payments(chunk), status, processed_by)
+    return moved
+
+
+def release_expired_holds(now=None, batch_size=500):
+    """Expire the bookings of every lapsed hold whose payment is still pending.
+
+    Each batch goes through transition_bookings, so the number of queries
+    is fixed whatever the batch size. Returns the number of holds released.
+    """
+    now = now or timezone.now()
+    released = 0
+    while True:
+        with transaction.atomic():
+            holds = list(
+                SeatHold.objects.select_for_update()
+                .filter(released_at__isnull=True, expires_at__lte=now, payment__status='Pending')
+                .values_list('id', 'payment_id')[:batch_size]
+            )
+            if not holds:
+                return released
+            
+            hold_ids, payment_ids = zip(*holds)
+            transition_bookings(BookingRequest.objects.filter(payment_id__in=payment_ids), 'Expired', now=now)
+            # Holds whose booking had already left Pending are just closed
+            SeatHold.objects.filter(id__in=hold_ids, released_at__isnull=True).update(released_at=now)
+            
+            released += len(holds)
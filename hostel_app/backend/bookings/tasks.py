@@ -0,0 +1,22 @@
+from jobs.queue import chunked, task
+from payments.models import Payment
+from .models import BookingRequest
+from .services import PAYMENT_CHUNK_SIZE, transition_bookings, transition_payments
+
+
+@task('bookings.transition_bookings')
+def transition_bookings_task(job, ids, status):
+    """Move many bookings to ``status``, committing and reporting progress per chunk"""
+    moved = 0
+    for chunk in chunked(job, ids, PAYMENT_CHUNK_SIZE):
+        moved += transition_bookings(BookingRequest.objects.filter(pk__in=chunk), status, job.requested_by)
+    return f"{status} {moved} booking(s)"
+
+
+@task('bookings.transition_payments')
+def transition_payments_task(job, ids, status):
+    """Move the bookings of many payments to ``status``, committing and reporting progress per chunk"""
+    moved = 0
+    for chunk in chunked(job, ids, PAYMENT_CHUNK_SIZE):
+        moved += transition_payments(Payment.objects.filter(pk__in=chunk), status, job.requested_by)
+    return f"{status} {moved} booking(s)"
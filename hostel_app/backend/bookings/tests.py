@@ -1,3 +1,412 @@
-from django.test import TestCase
+import io
+from datetime import timedelta
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db.models.signals import post_save
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from hostel_management.testing import ChangelistQueryCountMixin
+from django.utils import timezone
+from accounts.models import Student
+from notifications.models import OutboxEmail
+from payments.models import Payment
+from rooms.inventory import build_physical_rooms, fill_beds
+from rooms.models import BedAssignment, PhysicalRoom, Room
+from .admission import admit_due
+from .allocation import match, order_students
+from .models import AdmissionTicket, AllocationPreference, BookingRequest, SeatHold
+from .services import TRANSITIONS, approve_bookings, bookings_for_payments, reject_bookings, transition_bookings
 
-# Create your tests here.
+
+class BookingTestMixin:
+    def make_room(self, seats=10, **kwargs):
+        fields = {
+            'category': '4 Non AC C', 'location': 'GH2', 'menu': 'Veg',
+            'rooms_count': seats, 'pax_per_room': 1, 'capacity': seats,
+            'available_seats': seats, 'price': 13000,
+        }
+        fields.update(kwargs)
+        return Room.objects.create(**fields)
+
+    def make_student(self, email, gender='Female'):
+        user = User.objects.create(username=email, email=email)
+        return Student.objects.create(user=user, name=email, email=email, gender=gender)
+
+    def make_pending_booking(self, student, room, expires_in=timedelta(hours=1)):
+        """Mirror what make_payment leaves behind for a pending booking"""
+        room.available_seats -= 1
+        room.save()
+        payment = Payment.objects.create(
+            student=student, room=room, amount=room.price,
+            transaction_id=f'TXN-{student.pk}', status='Pending'
+        )
+        student.room = room
+        student.payment_status = 'Pending'
+        student.save()
+        booking = BookingRequest.objects.create(
+            student=student, room=room, amount=room.price,
+            transaction_id=payment.transaction_id, payment=payment
+        )
+        SeatHold.objects.create(
+            student=student, room=room, payment=payment,
+            expires_at=timezone.now() + expires_in
+        )
+        return booking
+
+
+class BulkBookingDecisionTests(BookingTestMixin, TestCase):
+    def setUp(self):
+        self.room = self.make_room(seats=60)
+        self.admin = User.objects.create_superuser('warden', 'warden@example.com', 'x')
+        self.bookings = [
+            self.make_pending_booking(self.make_student(f's{i}@example.com'), self.room)
+            for i in range(50)
+        ]
+
+    def test_approving_is_set_based(self):
+        with self.assertNumQueries(12):
+            approved = approve_bookings(BookingRequest.objects.all(), self.admin)
+        self.assertEqual(approved, 50)
+        self.assertEqual(BookingRequest.objects.filter(status='Approved', processed_by=self.admin).count(), 50)
+        self.assertEqual(Payment.objects.filter(status='Confirmed', verified=True).count(), 50)
+        self.assertEqual(Student.objects.filter(payment_status='Confirmed', room=self.room).count(), 50)
+        self.assertEqual(OutboxEmail.objects.filter(subject='Room Booking Confirmed').count(), 50)
+
+    def test_rejecting_returns_seats_in_bulk(self):
+        self.room.refresh_from_db()
+        self.assertEqual(self.room.available_seats, 10)
+        with self.assertNumQueries(15):
+            rejected = reject_bookings(BookingRequest.objects.all(), self.admin)
+        self.assertEqual(rejected, 50)
+        self.room.refresh_from_db()
+        self.assertEqual(self.room.available_seats, 60)
+        self.assertFalse(Student.objects.filter(room__isnull=False).exists())
+        self.assertEqual(Payment.objects.filter(status='Failed').count(), 50)
+        self.assertEqual(OutboxEmail.objects.filter(subject='Room Booking Request Rejected').count(), 50)
+
+    def test_only_pending_bookings_are_processed(self):
+        approve_bookings(BookingRequest.objects.filter(pk=self.bookings[0].pk), self.admin)
+        self.assertEqual(reject_bookings(BookingRequest.objects.all(), self.admin), 49)
+        self.assertEqual(BookingRequest.objects.get(pk=self.bookings[0].pk).status, 'Approved')
+
+    def test_admin_action_and_row_buttons(self):
+        self.client.force_login(self.admin)
+        changelist = reverse('admin:bookings_bookingrequest_changelist')
+        self.assertEqual(self.client.get(changelist).status_code, 200)
+        response = self.client.post(changelist, {
+            'action': 'approve_bookings',
+            '_selected_action': [booking.pk for booking in self.bookings[:10]],
+        })
+        self.assertEqual(response.status_code, 302)
+        self.client.get(reverse('admin:bookings_bookingrequest_reject', args=[self.bookings[10].pk]))
+        self.assertEqual(BookingRequest.objects.filter(status='Approved').count(), 10)
+        self.assertEqual(BookingRequest.objects.get(pk=self.bookings[10].pk).status, 'Rejected')
+
+
+class BookingLifecycleTests(BookingTestMixin, TestCase):
+    # Savepoint pair, locking select, then the set-based writes, the bed
+    # lookups (held beds and free physical rooms on approval, held beds
+    # otherwise) and the activity INSERT
+    QUERY_BUDGET = {'Approved': 12, 'Rejected': 15, 'Cancelled': 14, 'Expired': 14}
+
+    def setUp(self):
+        self.room = self.make_room()
+        self.admin = User.objects.create_superuser('warden', 'warden@example.com', 'x')
+
+    def test_every_transition_has_a_fixed_query_budget(self):
+        for status in TRANSITIONS:
+            for count in (1, 5):
+                bookings = [
+                    self.make_pending_booking(self.make_student(f'{status}{count}{i}@example.com'), self.room)
+                    for i in range(count)
+                ]
+                selected = BookingRequest.objects.filter(pk__in=[booking.pk for booking in bookings])
+                with self.subTest(status=status, count=count), self.assertNumQueries(self.QUERY_BUDGET[status]):
+                    self.assertEqual(transition_bookings(selected, status, self.admin), count)
+
+    def test_beds_follow_approvals_and_rejections(self):
+        build_physical_rooms(self.room)
+        kept, rejected = [self.make_pending_booking(self.make_student(f'bed{i}@example.com'), self.room) for i in range(2)]
+        approve_bookings(BookingRequest.objects.filter(pk=kept.pk), self.admin)
+        self.assertTrue(BedAssignment.objects.filter(student=kept.student, physical_room__room=self.room).exists())
+
+        # A bed handed out by the allocator is given back when the booking is rejected
+        fill_beds(self.room, [rejected.student_id])
+        reject_bookings(BookingRequest.objects.filter(pk=rejected.pk), self.admin)
+        self.assertFalse(BedAssignment.objects.filter(student=rejected.student).exists())
+        self.assertEqual(sum(PhysicalRoom.objects.filter(room=self.room).values_list('free_beds', flat=True)), 9)
+
+        # ... so re-allocating the student can give them a bed again
+        call_command('allocate', '--assign-beds', stdout=io.StringIO())
+        self.assertEqual(BedAssignment.objects.get(student=rejected.student).physical_room.room, self.room)
+
+    def test_finished_bookings_do_not_move(self):
+        booking = self.make_pending_booking(self.make_student('done@example.com'), self.room)
+        approve_bookings(BookingRequest.objects.filter(pk=booking.pk), self.admin)
+        with self.assertNumQueries(3):
+            self.assertEqual(reject_bookings(BookingRequest.objects.filter(pk=booking.pk), self.admin), 0)
+        self.room.refresh_from_db()
+        self.assertEqual(self.room.available_seats, 9)
+
+    def test_payment_endpoints_use_the_lifecycle(self):
+        student = self.make_student('api@example.com')
+        booking = self.make_pending_booking(student, self.room)
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        url = f'/api/admin/payments/{booking.payment_id}/reject_payment/'
+        self.assertEqual(client.post(url).status_code, 200)
+        self.assertEqual(client.post(url).status_code, 400)
+        booking.refresh_from_db()
+        self.assertEqual(booking.status, 'Rejected')
+        self.room.refresh_from_db()
+        self.assertEqual(self.room.available_seats, 10)
+
+    def test_payments_without_a_booking_get_one(self):
+        student = self.make_student('legacy@example.com')
+        payment = Payment.objects.create(student=student, room=self.room, amount=100, transaction_id='LEGACY')
+        self.assertEqual(approve_bookings(bookings_for_payments([payment]), self.admin), 1)
+        payment.refresh_from_db()
+        self.assertEqual(payment.status, 'Confirmed')
+        self.assertEqual(BookingRequest.objects.get(payment=payment).status, 'Approved')
+
+
+class BookingChangelistTests(ChangelistQueryCountMixin, BookingTestMixin, TestCase):
+    model = BookingRequest
+
+    def setUp(self):
+        self.room = self.make_room(seats=2000)
+        self.client.force_login(User.objects.create_superuser('warden', 'warden@example.com', 'x'))
+
+    def add_rows(self, count):
+        start = BookingRequest.objects.count()
+        users = User.objects.bulk_create([User(username=f'b{start + i}') for i in range(count)])
+        students = Student.objects.bulk_create([
+            Student(user=user, name=user.username, email=f'{user.username}@example.com', gender='Female')
+            for user in users
+        ])
+        BookingRequest.objects.bulk_create([
+            BookingRequest(student=student, room=self.room, amount=13000, transaction_id=f'TXN-{student.email}')
+            for student in students
+        ])
+
+
+class ChangeTrackingTests(BookingTestMixin, TestCase):
+    def setUp(self):
+        self.room = self.make_room()
+        self.booking = self.make_pending_booking(self.make_student('t@example.com'), self.room)
+
+    def test_status_transition_needs_no_extra_select(self):
+        booking = BookingRequest.objects.get(pk=self.booking.pk)
+        booking.status = 'Approved'
+        # The UPDATE itself, the pending bookings counter and the activity entry
+        with self.assertNumQueries(3):
+            booking.save()
+        booking.refresh_from_db()
+        self.assertIsNotNone(booking.processed_at)
+        self.assertFalse(booking.has_changed('status'))
+
+    def test_only_changed_fields_are_written(self):
+        student = Student.objects.get(pk=self.booking.student_id)
+        # A concurrent writer changes another column in the meantime
+        Student.objects.filter(pk=student.pk).update(phone_number='999')
+        student.payment_status = 'Confirmed'
+        self.assertEqual(student.changed_fields(), ['payment_status'])
+        student.save()
+        student.refresh_from_db()
+        self.assertEqual((student.payment_status, student.phone_number), ('Confirmed', '999'))
+
+    def test_unchanged_save_still_saves(self):
+        room = Room.objects.get(pk=self.room.pk)
+        saved = []
+        post_save.connect(lambda **kwargs: saved.append(kwargs['update_fields']), sender=Room, weak=False,
+                          dispatch_uid='unchanged-room-save')
+        try:
+            room.save()
+        finally:
+            post_save.disconnect(sender=Room, dispatch_uid='unchanged-room-save')
+        self.assertEqual(saved, [frozenset({'updated_at'})])
+        self.assertGreater(Room.objects.get(pk=room.pk).updated_at, self.room.updated_at)
+        room.available_seats += 1
+        self.assertTrue(room.has_changed('available_seats'))
+        self.assertEqual(room.initial_value('available_seats'), 9)
+
+
+class ReleaseExpiredHoldsTests(BookingTestMixin, TestCase):
+    def setUp(self):
+        self.room = self.make_room()
+
+    def test_expired_holds_are_released(self):
+        expired = [
+            self.make_pending_booking(self.make_student(f's{i}@example.com'), self.room, timedelta(hours=-1))
+            for i in range(3)
+        ]
+        active = self.make_pending_booking(self.make_student('active@example.com'), self.room)
+
+        out = io.StringIO()
+        call_command('release_expired_holds', stdout=out)
+
+        self.assertIn('Released 3 expired seat hold(s)', out.getvalue())
+
+        self.room.refresh_from_db()
+        self.assertEqual(self.room.available_seats, 9)
+        for booking in expired:
+            booking.refresh_from_db()
+            booking.student.refresh_from_db()
+            self.assertEqual(booking.status, 'Expired')
+            self.assertEqual(booking.payment.status, 'Failed')
+            self.assertEqual(booking.student.payment_status, 'Failed')
+            self.assertIsNone(booking.student.room)
+            self.assertIsNotNone(booking.payment.seat_hold.released_at)
+        active.refresh_from_db()
+        self.assertEqual(active.status, 'Pending')
+
+    def test_confirmed_payments_are_not_expired(self):
+        booking = self.make_pending_booking(self.make_student('paid@example.com'), self.room, timedelta(hours=-1))
+        Payment.objects.filter(pk=booking.payment_id).update(status='Confirmed')
+
+        out = io.StringIO()
+        call_command('release_expired_holds', stdout=out)
+
+        self.assertIn('Released 0 expired seat hold(s)', out.getvalue())
+
+        self.room.refresh_from_db()
+        self.assertEqual(self.room.available_seats, 9)
+
+    def test_sweep_uses_set_based_queries(self):
+        other_room = self.make_room(location='GH3 (BH1)')
+        for i in range(20):
+            room = self.room if i % 2 else other_room
+            self.make_pending_booking(self.make_student(f's{i}@example.com'), room, timedelta(hours=-1))
+
+        from .services import release_expired_holds
+        # Hold select, booking transition (select, six UPDATEs, three for the
+        # statistics counters, the held-beds lookup and the activity INSERT)
+        # and hold close for the batch, one empty select to finish, and a
+        # savepoint pair around each transaction
+        with self.assertNumQueries(14 + 1 + 6):
+            self.assertEqual(release_expired_holds(), 20)
+
+
+@override_settings(ADMISSION_QUEUE={
+    'ENABLED': True,
+    'ADMIT_RATE': 2,
+    'ADMISSION_WINDOW': timedelta(minutes=15),
+})
+class AdmissionQueueTests(BookingTestMixin, TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.students = [self.make_student(f'q{i}@example.com') for i in range(5)]
+
+    def join(self, student):
+        self.client.force_authenticate(student.user)
+        return self.client.post(reverse('queue-join'))
+
+    def test_tickets_are_admitted_in_order_at_the_configured_rate(self):
+        tokens = [self.join(student).data['token'] for student in self.students]
+        # Only the first student found the queue empty
+        self.assertEqual(AdmissionTicket.objects.filter(admitted_at__isnull=False).count(), 1)
+
+        # One second later, two more students are let in, in arrival order
+        self.assertEqual(admit_due(timezone.now() + timedelta(seconds=1)), 2)
+        admitted = AdmissionTicket.objects.filter(admitted_at__isnull=False).values_list('user', flat=True)
+        self.assertEqual(sorted(admitted), sorted(s.user_id for s in self.students[:3]))
+
+        self.client.force_authenticate(self.students[4].user)
+        response = self.client.get(reverse('queue-status'), {'token': tokens[4]})
+        self.assertEqual(response.data['status'], 'waiting')
+        self.assertEqual(response.data['position'], 2)
+
+    def test_booking_endpoints_require_admission(self):
+        self.join(self.students[0])
+        self.join(self.students[1])
+
+        self.client.force_authenticate(self.students[0].user)
+        self.assertEqual(self.client.get('/api/rooms/').status_code, 200)
+        self.client.force_authenticate(self.students[1].user)
+        self.assertEqual(self.client.get('/api/rooms/').status_code, 403)
+
+    def test_joining_twice_keeps_the_same_ticket(self):
+        first = self.join(self.students[0]).data['token']
+        second = self.join(self.students[0]).data['token']
+        self.assertEqual(first, second)
+
+
+class AllocateCommandTests(BookingTestMixin, TestCase):
+    def setUp(self):
+        self.girls_veg = self.make_room(seats=2, location='GH2', menu='Veg', pax_per_room=4)
+        self.boys = self.make_room(seats=3, location='Habitat', menu='Non Veg', pax_per_room=6)
+
+    def allocate(self, *args):
+        out = io.StringIO()
+        call_command('allocate', *args, stdout=out)
+        return out.getvalue()
+
+    def test_merit_order_wins_scarce_seats_and_gender_is_enforced(self):
+        girls = [self.make_student(f'g{i}@example.com') for i in range(3)]
+        for rank, student in zip([3, 1, 2], girls):
+            AllocationPreference.objects.create(student=student, priority=rank)
+        boy = self.make_student('b@example.com', gender='Male')
+
+        output = self.allocate()
+
+        self.assertIn('Allocated 3 student(s)', output)
+        self.assertIn('1 student(s) could not be placed', output)
+
+        assigned = {s.email: s.room_id for s in Student.objects.all()}
+        self.assertIsNone(assigned['g0@example.com'])
+        self.assertEqual(assigned['g1@example.com'], self.girls_veg.pk)
+        self.assertEqual(assigned['g2@example.com'], self.girls_veg.pk)
+        self.assertEqual(assigned['b@example.com'], self.boys.pk)
+        self.girls_veg.refresh_from_db()
+        self.assertEqual(self.girls_veg.available_seats, 0)
+
+    def test_strict_mode_keeps_preferences(self):
+        student = self.make_student('veg@example.com', gender='Male')
+        AllocationPreference.objects.create(student=student, priority=1, menu='Veg')
+        self.allocate('--strict')
+        student.refresh_from_db()
+        self.assertIsNone(student.room)
+
+        self.allocate()
+        student.refresh_from_db()
+        self.assertEqual(student.room, self.boys)
+
+    def test_assign_beds_packs_allocated_students_together(self):
+        build_physical_rooms(self.girls_veg)
+        girls = [self.make_student(f'g{i}@example.com') for i in range(2)]
+        self.allocate('--assign-beds')
+        beds = BedAssignment.objects.filter(student__in=girls)
+        self.assertEqual(beds.count(), 2)
+        self.assertEqual(len({bed.physical_room_id for bed in beds}), 1)
+
+    def test_dry_run_writes_nothing(self):
+        self.make_student('g@example.com')
+        self.assertIn('Dry run: nothing was written', self.allocate('--dry-run'))
+        self.assertFalse(Student.objects.filter(room__isnull=False).exists())
+        self.girls_veg.refresh_from_db()
+        self.assertEqual(self.girls_veg.available_seats, 2)
+
+    def test_lottery_is_reproducible(self):
+        students = [Student(pk=i, gender='Male') for i in range(50)]
+        first = [s.pk for s in order_students(students, 'lottery', seed=7)]
+        second = [s.pk for s in order_students(students, 'lottery', seed=7)]
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, sorted(first))
+
+    def test_allocating_ten_thousand_students(self):
+        Room.objects.all().delete()
+        habitat = self.make_room(seats=5000, category='6 Non AC C', location='Habitat', menu='Non Veg', pax_per_room=6)
+        gh3 = self.make_room(seats=5000, category='4 Non AC C', location='GH3 (BH1)', menu='Veg', pax_per_room=4)
+        users = User.objects.bulk_create([User(username=f'u{i}', password='!') for i in range(10000)])
+        Student.objects.bulk_create([
+            Student(user=user, name=user.username, email=f'{user.username}@example.com',
+                    gender='Female' if i % 2 else 'Male')
+            for i, user in enumerate(users)
+        ])
+
+        self.allocate('--mode', 'lottery', '--seed', '1')
+
+        self.assertEqual(Student.objects.filter(room=habitat, gender='Male').count(), 5000)
+        self.assertEqual(Student.objects.filter(room=gh3, gender='Female').count(), 5000)
+        self.assertEqual(Room.objects.filter(available_seats=0).count(), 2)
@@ -2,7 +2,13 @@ from django.shortcuts import render, redirect
 from django.contrib.admin.views.decorators import staff_member_required
 from django.utils import timezone
 from django.contrib import messages
-from .models import BookingRequest
+from django.core.exceptions import ValidationError as DjangoValidationError
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from .models import BookingRequest, AdmissionTicket
+from .admission import queue_enabled, join_queue, ticket_status
 
 # Create your views here.
 
@@ -24,3 +30,31 @@ def booking_dashboard(request):
     }
     
     return render(request, 'admin/booking_dashboard.html', context)
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def join_admission_queue(request):
+    """Take a place in the allocation-day waiting room"""
+    if not queue_enabled():
+        return Response({'token': None, 'status': 'admitted', 'position': 0})
+    
+    ticket = join_queue(request.user)
+    return Response(ticket_status(ticket), status=status.HTTP_201_CREATED)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def admission_queue_status(request):
+    """Poll a waiting-room ticket for its queue position"""
+    if not queue_enabled():
+        return Response({'token': None, 'status': 'admitted', 'position': 0})
+    
+    token = request.query_params.get('token')
+    try:
+        ticket = AdmissionTicket.objects.get(token=token, user=request.user)
+    except (AdmissionTicket.DoesNotExist, ValueError, DjangoValidationError):
+        return Response(
+            {'detail': 'Queue ticket not found.'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    
+    return Response(ticket_status(ticket))
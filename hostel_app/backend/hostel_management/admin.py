@@ -1,10 +1,8 @@
 from django.contrib import admin
 from django.urls import path
 from django.utils.translation import gettext_lazy as _
-from django.utils import timezone
 from django.utils.html import format_html
-from django.core.mail import send_mail
-from django.conf import settings
+from bookings.services import approve_bookings, reject_bookings
 from .models import BookingRequest
 from .forms import BookingRequestForm
 
@@ -27,6 +25,7 @@ class BookingRequestAdmin(admin.ModelAdmin):
     list_filter = ('status', 'created_at', 'room__category', 'room__location')
     search_fields = ('student__name', 'student__email', 'transaction_id', 'admin_notes')
     readonly_fields = ('created_at', 'updated_at', 'processed_at', 'processed_by')
+    list_select_related = ('student', 'room')
     
     fieldsets = (
         ('Student Information', {
@@ -105,136 +104,20 @@ class BookingRequestAdmin(admin.ModelAdmin):
     actions.short_description = 'Actions'
     
     def approve_bookings(self, request, queryset):
-        updated = 0
-        for booking in queryset.filter(status='Pending'):
-            self._process_approval(request, booking)
-            updated += 1
-        
+        updated = approve_bookings(queryset, request.user)
         self.message_user(request, f"Successfully approved {updated} booking(s)")
     approve_bookings.short_description = "Approve selected bookings"
     
     def reject_bookings(self, request, queryset):
-        updated = 0
-        for booking in queryset.filter(status='Pending'):
-            self._process_rejection(request, booking)
-            updated += 1
-        
+        updated = reject_bookings(queryset, request.user)
         self.message_user(request, f"Successfully rejected {updated} booking(s)")
     reject_bookings.short_description = "Reject selected bookings"
     
     def _process_approval(self, request, booking):
-        # Update booking status
-        booking.status = 'Approved'
-        booking.processed_by = request.user
-        booking.processed_at = timezone.now()
-        booking.save()
-        
-        # Update payment if exists
-        if booking.payment:
-            booking.payment.status = 'Confirmed'
-            booking.payment.verified = True
-            booking.payment.verification_date = timezone.now()
-            booking.payment.save()
-        
-        # Update student's payment status and room assignment
-        student = booking.student
-        student.payment_status = 'Confirmed'
-        student.room = booking.room  # Ensure room is assigned
-        student.save()
-        
-        # Send email notification
-        self._send_approval_email(booking)
+        approve_bookings(BookingRequest.objects.filter(pk=booking.pk), request.user)
     
     def _process_rejection(self, request, booking):
-        # Update booking status
-        booking.status = 'Rejected'
-        booking.processed_by = request.user
-        booking.processed_at = timezone.now()
-        booking.save()
-        
-        # Update payment if exists
-        if booking.payment:
-            booking.payment.status = 'Failed'
-            booking.payment.verified = True
-            booking.payment.verification_date = timezone.now()
-            booking.payment.save()
-        
-        # Update student's payment status
-        student = booking.student
-        student.payment_status = 'Failed'
-        
-        # If room was assigned, free it up
-        if student.room and student.room.id == booking.room.id:
-            # Increment available seats for the room
-            room = student.room
-            room.available_seats += 1
-            room.save()
-            
-            # Remove room assignment
-            student.room = None
-        
-        student.save()
-        
-        # Send email notification
-        self._send_rejection_email(booking)
-    
-    def _send_approval_email(self, booking):
-        subject = 'Room Booking Approved'
-        message = f'''
-        Hello {booking.student.name},
-        
-        Congratulations! Your room booking has been approved.
-        
-        Room Details:
-        - Category: {booking.room.category}
-        - Location: {booking.room.location}
-        - Menu: {booking.room.menu}
-        
-        Amount Paid: ₹{booking.amount}
-        Transaction ID: {booking.transaction_id}
-        
-        Please contact the hostel administration if you have any questions.
-        
-        Regards,
-        Student Hostel Management Team
-        '''
-        
-        try:
-            send_mail(
-                subject,
-                message,
-                settings.DEFAULT_FROM_EMAIL,
-                [booking.student.email],
-                fail_silently=True,
-            )
-        except Exception as e:
-            print(f"Email error: {e}")
-    
-    def _send_rejection_email(self, booking):
-        subject = 'Room Booking Request Rejected'
-        message = f'''
-        Hello {booking.student.name},
-        
-        We regret to inform you that your room booking request has been rejected.
-        
-        This may be due to verification issues with your payment information or room availability changes.
-        
-        Please contact the hostel administration for more information or to make a new booking.
-        
-        Regards,
-        Student Hostel Management Team
-        '''
-        
-        try:
-            send_mail(
-                subject,
-                message,
-                settings.DEFAULT_FROM_EMAIL,
-                [booking.student.email],
-                fail_silently=True,
-            )
-        except Exception as e:
-            print(f"Email error: {e}")
+        reject_bookings(BookingRequest.objects.filter(pk=booking.pk), request.user)
     
     def get_urls(self):
         from django.urls import path
@@ -5,41 +5,41 @@ from django.utils import timezone
 from django.contrib import messages
 from datetime import timedelta, date
 from accounts.models import Student
+from activity.log import feed_page
 from rooms.models import Room
+from payments.analytics import payments_between, date_range, revenue_buckets
 from payments.models import Payment
-from django.core.mail import send_mail
 from django.conf import settings
 from bookings.models import BookingRequest
+from bookings.services import approve_bookings, bookings_for_payments, reject_bookings
+from stats.counters import dashboard_stats, room_rollups
 
 @staff_member_required
 def room_stats_view(request):
+    room_stats = room_rollups(Room.objects.order_by('category'))
     context = {
         'title': 'Room Statistics',
-        'room_stats': Room.objects.annotate(
-            occupied=Count('student'),
-            revenue=Sum('student__payment__amount', 
-                       filter=models.Q(student__payment__status='Confirmed'))
-        ).order_by('category'),
-        'total_rooms': Room.objects.count(),
-        'total_occupied': Room.objects.filter(available_seats__lt=F('capacity')).count(),
+        'room_stats': room_stats,
+        'total_rooms': len(room_stats),
+        'total_occupied': sum(1 for room in room_stats if room.occupied),
     }
     return render(request, 'admin/room_stats.html', context)
 
 @staff_member_required
 def payment_analytics_view(request):
-    today = timezone.now().date()
+    today = timezone.localdate()
     context = {
         'title': 'Payment Analytics',
         'total_revenue': Payment.objects.filter(status='Confirmed').aggregate(
             total=Sum('amount'))['total'] or 0,
-        'today_payments': Payment.objects.filter(
-            created_at__date=today).count(),
+        'today_payments': payments_between(*date_range(today)).count(),
         'pending_payments': Payment.objects.filter(
             status='Pending').count(),
         'payment_stats': Payment.objects.values('status').annotate(
             count=Count('id'),
             total=Sum('amount')
-        )
+        ).order_by('status'),
+        'daily_revenue': revenue_buckets(today - timedelta(days=29), today),
     }
     return render(request, 'admin/payment_analytics.html', context)
 
@@ -59,94 +59,38 @@ def student_analytics_view(request):
 
 @staff_member_required
 def admin_dashboard(request):
-    today = timezone.now().date()
-    
-    # Calculate total rooms and occupancy
-    total_rooms = Room.objects.count()
-    occupied_rooms = Room.objects.filter(available_seats__lt=F('capacity')).count()
-    occupancy_percentage = (occupied_rooms / total_rooms * 100) if total_rooms > 0 else 0
-    
-    # Get recent activities
-    recent_activities = []
-    
-    # Add recent students
-    for student in Student.objects.select_related('room').order_by('-created_at')[:5]:
-        recent_activities.append({
-            'student_name': student.name,
-            'action': 'Registration',
-            'date': student.created_at,
-            'status': student.payment_status
-        })
-    
-    # Add recent payments
-    for payment in Payment.objects.select_related('student').order_by('-created_at')[:5]:
-        recent_activities.append({
-            'student_name': payment.student.name,
-            'action': 'Payment',
-            'date': payment.created_at,
-            'status': payment.status
-        })
-    
-    # Sort combined activities by date
-    recent_activities.sort(key=lambda x: x['date'], reverse=True)
-    
-    # Add pending bookings count
-    pending_bookings_count = BookingRequest.objects.filter(status='Pending').count()
-    recent_bookings = BookingRequest.objects.all()[:5]
+    # Every figure comes from the materialized counters; the recent lists
+    # are short reads down their indexes with their relations joined in
+    stats = dashboard_stats()
+    
+    recent_activities = [
+        {
+            'student_name': activity.student_name,
+            'action': activity.action,
+            'date': activity.created_at,
+            'status': activity.status
+        }
+        for activity in feed_page(size=10)[0]
+    ]
     
     context = {
         'title': 'Dashboard',
-        # Basic Stats
-        'total_students': Student.objects.count(),
-        'total_rooms': total_rooms,
-        'occupied_rooms': occupied_rooms,
-        'occupancy_percentage': round(occupancy_percentage, 1),
-        'pending_payments': Payment.objects.filter(status='Pending').count(),
-        
-        # Recent Activities
-        'recent_activities': recent_activities[:10],
-        
-        # Quick Stats
-        'today_registrations': Student.objects.filter(created_at__date=today).count(),
-        'total_revenue': Payment.objects.filter(status='Confirmed').aggregate(
-            total=Sum('amount'))['total'] or 0,
-        
-        # Room Categories
-        'room_categories': Room.objects.values('category').annotate(
-            total=Count('id'),
-            occupied=Count('student')
-        ).order_by('category'),
-        
-        # Payment Stats
-        'payment_stats': Payment.objects.values('status').annotate(
-            count=Count('id'),
-            total_amount=Sum('amount')
-        ).order_by('status'),
-        
-        'pending_bookings_count': pending_bookings_count,
-        'recent_bookings': recent_bookings,
+        **stats,
+        'recent_activities': recent_activities,
+        'recent_bookings': BookingRequest.objects.select_related('student', 'room').order_by('-pk')[:5],
     }
     return render(request, 'admin/dashboard.html', context)
 
 def get_recent_activities():
-    # Combine recent student registrations and payments
-    activities = []
-    
-    for student in Student.objects.order_by('-created_at')[:5]:
-        activities.append({
-            'student_name': student.name,
-            'action': 'Registration',
-            'date': student.created_at
-        })
-    
-    for payment in Payment.objects.order_by('-created_at')[:5]:
-        activities.append({
-            'student_name': payment.student.name,
-            'action': f'Payment ({payment.status})',
-            'date': payment.created_at
-        })
-    
-    return sorted(activities, key=lambda x: x['date'], reverse=True)[:10]
+    # The latest registrations, payments and booking decisions, from the log
+    return [
+        {
+            'student_name': activity.student_name,
+            'action': activity.label,
+            'date': activity.created_at
+        }
+        for activity in feed_page(size=10)[0]
+    ]
 
 @staff_member_required
 def booking_requests(request):
@@ -168,50 +112,8 @@ def approve_booking(request, payment_id):
     """Approve a booking request"""
     payment = get_object_or_404(Payment, id=payment_id)
     
-    if payment.status != 'Pending':
+    if not approve_bookings(bookings_for_payments([payment]), request.user):
         messages.error(request, f"Cannot approve booking - status is {payment.status}")
-        return redirect('admin:booking-requests')
-        
-    # Process approval
-    payment.status = 'Confirmed'
-    payment.verified = True
-    payment.verification_date = timezone.now()
-    payment.save()
-    
-    # Update student's payment status and room assignment
-    student = payment.student
-    student.payment_status = 'Confirmed'
-    student.room = payment.room  # Ensure room is assigned
-    student.save()
-    
-    # Send email notification
-    subject = 'Room Booking Confirmed'
-    message = f'''
-    Hello {student.name},
-    
-    Congratulations! Your room booking has been confirmed.
-    
-    Room Details:
-    - Category: {payment.room.category}
-    - Location: {payment.room.location}
-    - Menu: {payment.room.menu}
-    
-    Please contact the hostel administration if you have any questions.
-    
-    Regards,
-    Student Hostel Management Team
-    '''
-    
-    try:
-        send_mail(
-            subject,
-            message,
-            settings.DEFAULT_FROM_EMAIL,
-            [student.email],
-            fail_silently=True,
-        )
-    except Exception as e:
-        print(f"Email error: {e}")
     
     return redirect('admin:booking-requests')
 
@@ -220,57 +122,8 @@ def reject_booking(request, payment_id):
     """Reject a booking request"""
     payment = get_object_or_404(Payment, id=payment_id)
     
-    if payment.status != 'Pending':
+    if not reject_bookings(bookings_for_payments([payment]), request.user):
         messages.error(request, f"Cannot reject booking - status is {payment.status}")
-        return redirect('admin:booking-requests')
-    
-    # Process rejection
-    payment.status = 'Failed'
-    payment.verified = True
-    payment.verification_date = timezone.now()
-    payment.save()
-    
-    # Update student's payment status
-    student = payment.student
-    student.payment_status = 'Failed'
-    
-    # If room was assigned, free it up
-    if student.room and student.room.id == payment.room.id:
-        # Increment available seats for the room
-        room = student.room
-        room.available_seats += 1
-        room.save()
-        
-        # Remove room assignment
-        student.room = None
-    
-    student.save()
-    
-    # Send email notification
-    subject = 'Room Booking Request Declined'
-    message = f'''
-    Hello {student.name},
-    
-    We regret to inform you that your room booking request has been declined.
-    
-    This may be due to verification issues with your payment information or room availability changes.
-    
-    Please contact the hostel administration for more information or to make a new booking.
-    
-    Regards,
-    Student Hostel Management Team
-    '''
-    
-    try:
-        send_mail(
-            subject,
-            message,
-            settings.DEFAULT_FROM_EMAIL,
-            [student.email],
-            fail_silently=True,
-        )
-    except Exception as e:
-        print(f"Email error: {e}")
     
     return redirect('admin:booking-requests')
 
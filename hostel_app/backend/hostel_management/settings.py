@@ -53,6 +53,10 @@ INSTALLED_APPS = [
     'rooms',
     'payments',
     'bookings',
+    'notifications',
+    'jobs',
+    'stats',
+    'activity',
 ]
 
 MIDDLEWARE = [
@@ -233,6 +237,58 @@ EMAIL_HOST_USER = '230701094@rajalakshmi.edu.in'
 EMAIL_HOST_PASSWORD = 'Gokulpassword'  # Your Gmail password with Less Secure App Access enabled
 DEFAULT_FROM_EMAIL = '230701094@rajalakshmi.edu.in'
 
+# Email outbox, delivered by `manage.py send_outbox --watch`
+OUTBOX = {
+    'BATCH_SIZE': 100,  # emails sent per SMTP connection
+    'MAX_ATTEMPTS': 5,
+    'RETRY_BACKOFF': timedelta(seconds=30),  # doubled after every failed attempt
+    'MAX_BACKOFF': timedelta(hours=1),
+    'LEASE': timedelta(minutes=5),  # how long a claimed batch stays hidden from other workers
+}
+
+# Background jobs, run by `manage.py run_jobs --watch`
+JOBS = {
+    'INLINE_LIMIT': 200,  # admin actions over more rows than this are queued as a job
+    'LEASE': timedelta(minutes=10),  # a running job silent for this long is taken to have lost its worker
+    'MAX_ATTEMPTS': 3,  # runs a job gets before a lost worker marks it failed
+}
+
+# Bulk password resets, hashed by the accounts.reset_passwords job
+PASSWORD_RESET = {
+    'DEFAULT_PASSWORD': 'changeme@123',
+    'WORKERS': None,  # hashing processes; None uses every CPU, 1 hashes in the worker itself
+    'CHUNK_SIZE': 200,  # users hashed and written per progress update
+}
+
 # Media files (uploaded content)
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
+# Seat holds
+# A pending payment keeps its seat for this long before release_expired_holds frees it
+SEAT_HOLD_TTL = timedelta(hours=24)
+
+# Room catalog cache
+# The catalog version must be shared by every web worker and by the commands and
+# job workers that change seats, so ROOM_CATALOG_CACHE may not name a per-process
+# backend such as LocMemCache. The database cache needs `manage.py createcachetable`;
+# point the alias at Redis or Memcached where one is available.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'catalog': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'room_catalog_cache',
+    },
+}
+ROOM_CATALOG_CACHE = 'catalog'
+ROOM_CATALOG_CACHE_TIMEOUT = 300  # seconds; entries are also dropped by version on every seat change
+
+# Allocation-day waiting room
+# When enabled, students must hold an admitted ticket from /api/queue/ to browse rooms or pay
+ADMISSION_QUEUE = {
+    'ENABLED': os.environ.get('ADMISSION_QUEUE_ENABLED', 'False') == 'True',
+    'ADMIT_RATE': 5,  # students admitted per second
+    'ADMISSION_WINDOW': timedelta(minutes=15),  # how long an admitted student may book
+}
@@ -0,0 +1,32 @@
+from unittest import mock
+from django.contrib import admin
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+
+class ChangelistQueryCountMixin:
+    """Checks that an admin changelist costs the same queries at 100 rows as at 1000.
+
+    Set ``model`` to the registered model and implement ``add_rows(count)``
+    to create that many changelist rows.
+    """
+    model = None
+
+    def add_rows(self, count):
+        raise NotImplementedError
+
+    def changelist_queries(self, rows):
+        model_admin = admin.site._registry[self.model]
+        url = reverse(f'admin:{self.model._meta.app_label}_{self.model._meta.model_name}_changelist')
+        with mock.patch.object(model_admin, 'list_per_page', rows), CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['cl'].result_list), rows)
+        return len(queries)
+
+    def test_changelist_query_count_does_not_grow_with_rows(self):
+        self.add_rows(100)
+        per_100 = self.changelist_queries(100)
+        self.add_rows(900)
+        self.assertEqual(self.changelist_queries(1000), per_100)
@@ -0,0 +1,66 @@
+class TrackChangesMixin:
+    """Remember the field values a model instance was loaded with.
+
+    Models can then tell what changed since the load without querying the
+    row again, and save() of a loaded instance writes only the changed
+    columns (plus any auto_now timestamps). Saving an unchanged instance
+    still saves, so signals fire and auto_now timestamps move as usual.
+    """
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._snapshot()
+        return instance
+
+    def _snapshot(self, names=None):
+        if names is None:
+            self._loaded_values = {}
+            fields = self._meta.concrete_fields
+        else:
+            fields = [self._meta.get_field(name) for name in names]
+        for field in fields:
+            if field.attname in self.__dict__:
+                self._loaded_values[field.attname] = self.__dict__[field.attname]
+
+    def has_changed(self, name):
+        """Whether a field differs from its loaded value (False for unsaved instances)"""
+        loaded = getattr(self, '_loaded_values', None)
+        if loaded is None:
+            return False
+        attname = self._meta.get_field(name).attname
+        if attname not in self.__dict__:
+            return False
+        return attname not in loaded or loaded[attname] != self.__dict__[attname]
+
+    def initial_value(self, name):
+        """The value a field had when the instance was loaded"""
+        return getattr(self, '_loaded_values', {}).get(self._meta.get_field(name).attname)
+
+    def changed_fields(self):
+        return [field.name for field in self._meta.concrete_fields if self.has_changed(field.name)]
+
+    def save(self, *args, **kwargs):
+        tracked = (
+            hasattr(self, '_loaded_values') and not self._state.adding and self.pk is not None
+            and not args and kwargs.get('update_fields') is None and not kwargs.get('force_insert')
+        )
+        if tracked:
+            changed = self.changed_fields()
+            update_fields = changed + [
+                field.name for field in self._meta.concrete_fields
+                if getattr(field, 'auto_now', False) and field.name not in changed
+            ]
+            # Django skips the save entirely for an empty list
+            if update_fields:
+                kwargs['update_fields'] = update_fields
+        super().save(*args, **kwargs)
+        self._snapshot()
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        fields = kwargs.get('fields', args[1] if len(args) > 1 else None)
+        if hasattr(self, '_loaded_values') and fields is not None:
+            self._snapshot(fields)
+        else:
+            self._snapshot()
@@ -33,7 +33,9 @@ from .admin_views import (
     approve_booking,
     reject_booking
 )
-from bookings.views import booking_dashboard
+from bookings.views import booking_dashboard, join_admission_queue, admission_queue_status
+from stats.views import occupancy_history
+from activity.views import activity_feed
 from django.conf import settings
 from django.conf.urls.static import static
 
@@ -63,6 +65,10 @@ urlpatterns = [
     path('api/student/request-otp/', request_otp, name='request-otp'),
     path('api/student/verify-otp/', verify_otp, name='verify-otp'),
     path('api/student/make-payment/', make_payment, name='make-payment'),
+    path('api/queue/join/', join_admission_queue, name='queue-join'),
+    path('api/queue/status/', admission_queue_status, name='queue-status'),
+    path('api/stats/occupancy/', occupancy_history, name='occupancy-history'),
+    path('api/activity/', activity_feed, name='activity-feed'),
     path('admin/booking-requests/', booking_request_view, name='admin_booking_requests'),
     path('admin/booking-requests/approve/<int:payment_id>/', approve_booking, name='admin_approve_booking'),
     path('admin/booking-requests/reject/<int:payment_id>/', reject_booking, name='admin_reject_booking'),
@@ -0,0 +1,58 @@
+from django.conf import settings
+from django.contrib import admin
+from django.db.models import Q
+from django.urls import reverse
+from django.utils.html import format_html
+from .models import Job
+from .queue import enqueue, stale_jobs
+
+
+class BackgroundActionMixin:
+    """Lets admin actions hand large selections to the job queue and return at once"""
+
+    def enqueue_selection(self, request, queryset, name, **kwargs):
+        """Queue ``name`` over the selected ids when there are more than JOBS['INLINE_LIMIT'].
+
+        Returns the job, or None when the selection is small enough for the
+        action to handle inline.
+        """
+        ids = list(queryset.values_list('pk', flat=True))
+        if len(ids) <= settings.JOBS['INLINE_LIMIT']:
+            return None
+        job = enqueue(name, requested_by=request.user, total=len(ids), ids=ids, **kwargs)
+        self.message_user(request, format_html(
+            '{} item(s) queued as job #{}. <a href="{}">Track progress</a>',
+            len(ids), job.pk, reverse('admin:jobs_job_change', args=[job.pk])
+        ))
+        return job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'name', 'status', 'progress_display', 'message', 'requested_by', 'created_at', 'finished_at')
+    list_filter = ('status', 'name')
+    list_select_related = ('requested_by',)
+    readonly_fields = (
+        'name', 'status', 'progress_display', 'message', 'error', 'requested_by',
+        'created_at', 'started_at', 'heartbeat_at', 'attempts', 'finished_at'
+    )
+    exclude = ('kwargs', 'total', 'processed')
+    actions = ['requeue']
+
+    def progress_display(self, obj):
+        return f"{obj.processed} / {obj.total} ({obj.progress}%)"
+    progress_display.short_description = 'Progress'
+
+    def requeue(self, request, queryset):
+        count = queryset.filter(Q(status='Failed') | Q(pk__in=stale_jobs())).update(
+            status='Pending', processed=0, error='', attempts=0,
+            started_at=None, heartbeat_at=None, finished_at=None
+        )
+        self.message_user(request, f"{count} failed or stalled job(s) queued again")
+    requeue.short_description = "Run failed or stalled jobs again"
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,21 @@
+import time
+from django.core.management.base import BaseCommand
+from jobs.queue import run_pending_jobs
+
+class Command(BaseCommand):
+    help = 'Run queued background jobs (bulk approvals, password resets, ...)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--watch', action='store_true',
+                            help='Keep running and poll for new jobs instead of exiting once none are left')
+        parser.add_argument('--interval', type=float, default=2.0,
+                            help='Seconds between polls with --watch')
+
+    def handle(self, *args, **options):
+        while True:
+            count = run_pending_jobs()
+            if count or not options['watch']:
+                self.stdout.write(self.style.SUCCESS(f'Ran {count} job(s)'))
+            if not options['watch']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,61 @@
+from django.contrib.auth.models import User
+from django.db import models
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """A unit of background work, picked up and run by run_jobs"""
+    STATUS_CHOICES = (
+        ('Pending', 'Pending'),
+        ('Running', 'Running'),
+        ('Done', 'Done'),
+        ('Failed', 'Failed')
+    )
+
+    name = models.CharField(max_length=100)  # a task registered with jobs.queue.task
+    kwargs = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='Pending')
+    total = models.PositiveIntegerField(default=0)
+    processed = models.PositiveIntegerField(default=0)
+    message = models.CharField(max_length=255, blank=True)
+    error = models.TextField(blank=True)
+    # Structured outcome a task may leave for whoever queued it
+    result = models.JSONField(default=dict, blank=True)
+    requested_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    # Refreshed on every progress report; a stale one means the worker died
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
+
+    @property
+    def progress(self):
+        if self.status == 'Done' or not self.total:
+            return 100 if self.status == 'Done' else 0
+        return self.processed * 100 // self.total
+
+    def set_progress(self, processed, total=None):
+        """Record progress straight away, outside of the task's own writes.
+
+        This is also the job's heartbeat: tasks should report more often
+        than JOBS['LEASE'], or the job is run again by another worker.
+        """
+        self.processed = processed
+        self.total = self.total if total is None else total
+        self.heartbeat_at = timezone.now()
+        Job.objects.filter(pk=self.pk).update(processed=self.processed, total=self.total, heartbeat_at=self.heartbeat_at)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            # Workers only ever look for pending jobs, oldest first
+            models.Index(
+                fields=['created_at'],
+                condition=models.Q(status='Pending'),
+                name='job_pending_idx',
+            ),
+        ]
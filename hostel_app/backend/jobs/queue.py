@@ -0,0 +1,106 @@
+import traceback
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from .models import Job
+
+# Task name -> function(job, **kwargs), filled in by the @task decorator
+TASKS = {}
+
+
+def task(name):
+    """Register a function as a background task under ``name``.
+
+    The function is called with the running Job and the job's kwargs. It
+    may report progress with ``job.set_progress``, leave structured output
+    in ``job.result`` and return a short message shown next to the
+    finished job.
+    """
+    def register(func):
+        TASKS[name] = func
+        return func
+    return register
+
+
+def enqueue(name, requested_by=None, total=0, **kwargs):
+    """Record a job for the worker as part of the caller's transaction"""
+    if name not in TASKS:
+        raise LookupError(f'No background task called "{name}"')
+    return Job.objects.create(name=name, kwargs=kwargs, total=total, requested_by=requested_by)
+
+
+def chunked(job, ids, size):
+    """Yield ``ids`` in chunks, recording the job's progress after each one"""
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+        job.set_progress(min(start + size, len(ids)), len(ids))
+
+
+def stale_jobs(now=None):
+    """Running jobs whose worker has not reported within JOBS['LEASE']"""
+    return Job.objects.filter(status='Running', heartbeat_at__lt=(now or timezone.now()) - settings.JOBS['LEASE'])
+
+
+def reclaim_stale_jobs(now=None):
+    """Queue jobs left Running by a dead worker again, or fail them after JOBS['MAX_ATTEMPTS'].
+
+    Returns the number of jobs queued again.
+    """
+    now = now or timezone.now()
+    stale_jobs(now).filter(attempts__gte=settings.JOBS['MAX_ATTEMPTS']).update(
+        status='Failed', error='The worker running this job stopped responding', finished_at=now
+    )
+    return stale_jobs(now).update(status='Pending', processed=0, started_at=None, heartbeat_at=None)
+
+
+def claim_job(now=None):
+    """Take the oldest pending job so concurrent workers skip it"""
+    with transaction.atomic():
+        job = (
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(status='Pending').order_by('created_at', 'id').first()
+        )
+        if job:
+            job.status = 'Running'
+            job.started_at = job.heartbeat_at = now or timezone.now()
+            job.attempts += 1
+            job.save(update_fields=['status', 'started_at', 'heartbeat_at', 'attempts'])
+    return job
+
+
+def start_job(job, now=None):
+    """Claim one particular pending job. False if a worker already took it"""
+    now = now or timezone.now()
+    if not Job.objects.filter(pk=job.pk, status='Pending').update(
+        status='Running', started_at=now, heartbeat_at=now, attempts=F('attempts') + 1
+    ):
+        return False
+    job.status, job.started_at, job.heartbeat_at = 'Running', now, now
+    job.attempts += 1
+    return True
+
+
+def run_job(job):
+    """Run a claimed job and record how it ended. A failing task never raises"""
+    try:
+        message = TASKS[job.name](job, **job.kwargs)
+    except Exception:
+        job.status = 'Failed'
+        job.error = traceback.format_exc()
+    else:
+        job.status = 'Done'
+        job.message = str(message or '')[:255]
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'message', 'error', 'result', 'finished_at'])
+    return job
+
+
+def run_pending_jobs(limit=None):
+    """Run queued jobs until none are left, or ``limit`` have run. Returns how many ran"""
+    reclaim_stale_jobs()
+    count = 0
+    while (limit is None or count < limit) and (job := claim_job()):
+        run_job(job)
+        count += 1
+    return count
@@ -0,0 +1,138 @@
+import io
+from datetime import timedelta
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from accounts.models import Student
+from bookings.models import BookingRequest
+from payments.models import Payment
+from rooms.models import Room
+from .models import Job
+from .queue import chunked, claim_job, enqueue, run_pending_jobs, task
+
+
+@task('jobs.test_count')
+def count_task(job, ids):
+    for _ in chunked(job, ids, 2):
+        pass
+    return f"Counted {len(ids)}"
+
+
+@task('jobs.test_fail')
+def failing_task(job):
+    raise RuntimeError('Gateway down')
+
+
+class JobQueueTests(TestCase):
+    def test_unknown_task_is_refused(self):
+        with self.assertRaises(LookupError):
+            enqueue('jobs.no_such_task')
+        self.assertFalse(Job.objects.exists())
+
+    def test_jobs_run_oldest_first_and_failures_are_recorded(self):
+        failing = enqueue('jobs.test_fail')
+        counting = enqueue('jobs.test_count', ids=[1, 2, 3, 4, 5])
+        out = io.StringIO()
+        call_command('run_jobs', stdout=out)
+        self.assertIn('Ran 2 job(s)', out.getvalue())
+
+        failing.refresh_from_db()
+        self.assertEqual(failing.status, 'Failed')
+        self.assertIn('RuntimeError: Gateway down', failing.error)
+        counting.refresh_from_db()
+        self.assertEqual(
+            (counting.status, counting.processed, counting.total, counting.progress, counting.message),
+            ('Done', 5, 5, 100, 'Counted 5')
+        )
+        self.assertIsNotNone(counting.finished_at)
+
+    def test_failed_jobs_can_be_requeued_from_the_admin(self):
+        job = enqueue('jobs.test_fail')
+        run_pending_jobs()
+        self.client.force_login(User.objects.create_superuser('registrar', 'registrar@example.com', 'x'))
+        self.client.post(reverse('admin:jobs_job_changelist'), {'action': 'requeue', '_selected_action': [job.pk]})
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.error), ('Pending', ''))
+
+    def test_jobs_of_a_dead_worker_are_reclaimed(self):
+        job = enqueue('jobs.test_count', ids=[1, 2, 3])
+        self.assertEqual(claim_job(), job)
+        # The worker dies; nothing happens while the lease still holds
+        self.assertEqual(run_pending_jobs(), 0)
+
+        lease = settings.JOBS['LEASE']
+        Job.objects.filter(pk=job.pk).update(heartbeat_at=timezone.now() - lease - timedelta(seconds=1))
+        self.assertEqual(run_pending_jobs(), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.processed, job.attempts), ('Done', 3, 2))
+
+    def test_a_job_that_keeps_losing_its_worker_fails(self):
+        job = enqueue('jobs.test_count', ids=[1])
+        Job.objects.filter(pk=job.pk).update(
+            status='Running', attempts=settings.JOBS['MAX_ATTEMPTS'],
+            heartbeat_at=timezone.now() - settings.JOBS['LEASE'] * 2
+        )
+        self.assertEqual(run_pending_jobs(), 0)
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'Failed')
+        self.assertIn('stopped responding', job.error)
+
+        self.client.force_login(User.objects.create_superuser('registrar', 'registrar@example.com', 'x'))
+        self.client.post(reverse('admin:jobs_job_changelist'), {'action': 'requeue', '_selected_action': [job.pk]})
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('Pending', 0))
+
+
+@override_settings(JOBS={**settings.JOBS, 'INLINE_LIMIT': 10})
+class BackgroundAdminActionTests(TestCase):
+    def setUp(self):
+        self.room = Room.objects.create(
+            category='4 AC A', location='BH2', menu='Veg',
+            rooms_count=10, pax_per_room=4, capacity=40, available_seats=15, price=16000
+        )
+        self.admin = User.objects.create_superuser('bursar', 'bursar@example.com', 'x')
+        self.client.force_login(self.admin)
+
+    def add_pending_payments(self, count):
+        users = User.objects.bulk_create([User(username=f'p{i}') for i in range(count)])
+        students = Student.objects.bulk_create([
+            Student(user=user, name=user.username, email=f'{user.username}@example.com', gender='Male',
+                    room=self.room, payment_status='Pending')
+            for user in users
+        ])
+        Payment.objects.bulk_create([
+            Payment(student=student, room=self.room, amount=16000, transaction_id=f'TXN-{student.pk}')
+            for student in students
+        ])
+
+    def reject_all(self):
+        return self.client.post(reverse('admin:payments_payment_changelist'), {
+            'action': 'reject_payments',
+            '_selected_action': list(Payment.objects.values_list('pk', flat=True)),
+        }, follow=True)
+
+    def test_large_selection_is_queued(self):
+        self.add_pending_payments(25)
+        response = self.reject_all()
+        self.assertContains(response, 'queued as job')
+        self.assertFalse(BookingRequest.objects.exists())
+
+        job = Job.objects.get()
+        self.assertEqual((job.name, job.kwargs['status'], job.total, job.requested_by), (
+            'bookings.transition_payments', 'Rejected', 25, self.admin
+        ))
+        run_pending_jobs()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.processed), ('Done', 25))
+        self.assertEqual(BookingRequest.objects.filter(status='Rejected', processed_by=self.admin).count(), 25)
+        self.room.refresh_from_db()
+        self.assertEqual(self.room.available_seats, 40)
+
+    def test_small_selection_runs_inline(self):
+        self.add_pending_payments(5)
+        response = self.reject_all()
+        self.assertContains(response, 'Successfully rejected 5 payment(s)')
+        self.assertFalse(Job.objects.exists())
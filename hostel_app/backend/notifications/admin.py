@@ -0,0 +1,21 @@
+from django.contrib import admin
+from django.utils import timezone
+from .models import OutboxEmail
+
+
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'recipient_list', 'status', 'attempts', 'next_attempt_at', 'created_at', 'sent_at')
+    list_filter = ('status', 'created_at')
+    search_fields = ('subject', 'recipients')
+    readonly_fields = ('created_at', 'sent_at', 'last_error')
+    actions = ['retry_now']
+
+    def recipient_list(self, obj):
+        return ', '.join(obj.recipients)
+    recipient_list.short_description = 'To'
+
+    def retry_now(self, request, queryset):
+        count = queryset.exclude(status='Sent').update(status='Pending', attempts=0, next_attempt_at=timezone.now())
+        self.message_user(request, f"{count} email(s) queued for delivery")
+    retry_now.short_description = "Retry selected emails now"
@@ -0,0 +1,23 @@
+import time
+from django.core.management.base import BaseCommand
+from notifications.outbox import deliver_due
+
+class Command(BaseCommand):
+    help = 'Deliver pending outbox emails in batches over one connection per batch'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help='Emails sent per connection (default: OUTBOX["BATCH_SIZE"])')
+        parser.add_argument('--watch', action='store_true',
+                            help='Keep running and poll the outbox instead of exiting once it is empty')
+        parser.add_argument('--interval', type=float, default=2.0,
+                            help='Seconds between polls with --watch')
+
+    def handle(self, *args, **options):
+        while True:
+            sent, failed = deliver_due(batch_size=options['batch_size'])
+            if sent or failed or not options['watch']:
+                self.stdout.write(self.style.SUCCESS(f'Sent {sent} email(s), {failed} failed and will be retried'))
+            if not options['watch']:
+                return
+            time.sleep(options['interval'])
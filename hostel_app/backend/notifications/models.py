@@ -0,0 +1,36 @@
+from django.db import models
+from django.utils import timezone
+
+
+class OutboxEmail(models.Model):
+    """An email written with the change that caused it and delivered by send_outbox"""
+    STATUS_CHOICES = (
+        ('Pending', 'Pending'),
+        ('Sent', 'Sent'),
+        ('Failed', 'Failed')
+    )
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=255)
+    recipients = models.JSONField(default=list)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='Pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.subject} to {', '.join(self.recipients)} ({self.status})"
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            # The worker only ever looks for pending mail that is due
+            models.Index(
+                fields=['next_attempt_at'],
+                condition=models.Q(status='Pending'),
+                name='outbox_due_idx',
+            ),
+        ]
@@ -0,0 +1,109 @@
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+from .models import OutboxEmail
+
+
+def outbox_settings():
+    return settings.OUTBOX
+
+
+def enqueue_email(subject, body, recipients, from_email=None):
+    """Write one email to the outbox as part of the caller's transaction"""
+    return OutboxEmail.objects.create(
+        subject=subject, body=body, recipients=list(recipients),
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+    )
+
+
+def enqueue_messages(messages):
+    """Write many EmailMessage objects to the outbox with one INSERT"""
+    return OutboxEmail.objects.bulk_create([
+        OutboxEmail(
+            subject=message.subject, body=message.body, recipients=list(message.to),
+            from_email=message.from_email or settings.DEFAULT_FROM_EMAIL,
+        )
+        for message in messages
+    ])
+
+
+def retry_delay(attempts):
+    """Exponential backoff after the given number of failed attempts"""
+    config = outbox_settings()
+    return min(config['RETRY_BACKOFF'] * 2 ** (attempts - 1), config['MAX_BACKOFF'])
+
+
+def claim_batch(batch_size, now):
+    """Lease a batch of due emails so concurrent workers skip them.
+
+    The lease pushes ``next_attempt_at`` forward, so mail claimed by a worker
+    that dies is picked up again once the lease runs out.
+    """
+    with transaction.atomic():
+        ids = list(
+            OutboxEmail.objects.select_for_update(skip_locked=True)
+            .filter(status='Pending', next_attempt_at__lte=now)
+            .order_by('next_attempt_at', 'id')
+            .values_list('id', flat=True)[:batch_size]
+        )
+        OutboxEmail.objects.filter(id__in=ids).update(next_attempt_at=now + outbox_settings()['LEASE'])
+    return list(OutboxEmail.objects.filter(id__in=ids).order_by('next_attempt_at', 'id'))
+
+
+def deliver_batch(batch_size=None, now=None, connection=None):
+    """Send one batch of due emails over a single connection.
+
+    Successful mail is marked sent; failures are retried with exponential
+    backoff and given up after MAX_ATTEMPTS. Returns (sent, failed).
+    """
+    config = outbox_settings()
+    now = now or timezone.now()
+    emails = claim_batch(batch_size or config['BATCH_SIZE'], now)
+    if not emails:
+        return 0, 0
+
+    connection = connection or get_connection()
+    sent, failed = [], []
+    try:
+        connection.open()
+        for email in emails:
+            message = EmailMessage(
+                email.subject, email.body, email.from_email, email.recipients, connection=connection
+            )
+            try:
+                message.send()
+            except Exception as e:
+                email.last_error = str(e)
+                failed.append(email)
+            else:
+                sent.append(email.pk)
+    except Exception as e:
+        # The connection itself failed: everything not sent yet is retried
+        for email in emails:
+            if email.pk not in sent and email not in failed:
+                email.last_error = str(e)
+                failed.append(email)
+    finally:
+        connection.close()
+
+    OutboxEmail.objects.filter(pk__in=sent).update(status='Sent', sent_at=timezone.now())
+    for email in failed:
+        email.attempts += 1
+        if email.attempts >= config['MAX_ATTEMPTS']:
+            email.status = 'Failed'
+        else:
+            email.next_attempt_at = now + retry_delay(email.attempts)
+    OutboxEmail.objects.bulk_update(failed, ['attempts', 'status', 'next_attempt_at', 'last_error'])
+    return len(sent), len(failed)
+
+
+def deliver_due(batch_size=None, now=None):
+    """Drain every due email, batch by batch. Returns (sent, failed)"""
+    total_sent = total_failed = 0
+    while True:
+        sent, failed = deliver_batch(batch_size, now)
+        if not sent and not failed:
+            return total_sent, total_failed
+        total_sent += sent
+        total_failed += failed
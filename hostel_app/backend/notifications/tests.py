@@ -0,0 +1,73 @@
+import io
+from datetime import timedelta
+from smtplib import SMTPException
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from accounts.models import Student
+from .models import OutboxEmail
+from .outbox import deliver_batch, deliver_due, enqueue_email
+
+
+class FailingBackend(BaseEmailBackend):
+    def send_messages(self, messages):
+        raise SMTPException('Mail server unavailable')
+
+
+class OutboxTests(TestCase):
+    def queue(self, count):
+        for i in range(count):
+            enqueue_email(f'Notice {i}', 'Hello', [f's{i}@example.com'])
+
+    def test_outbox_row_rolls_back_with_the_change(self):
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            self.queue(1)
+            raise RuntimeError
+        self.assertFalse(OutboxEmail.objects.exists())
+
+    def test_drains_in_batches(self):
+        self.queue(25)
+        self.assertEqual(deliver_due(batch_size=10), (25, 0))
+        self.assertEqual(len(mail.outbox), 25)
+        self.assertEqual(OutboxEmail.objects.filter(status='Sent', sent_at__isnull=False).count(), 25)
+        self.assertEqual(deliver_due(), (0, 0))
+
+    @override_settings(EMAIL_BACKEND='notifications.tests.FailingBackend')
+    def test_failures_back_off_then_give_up(self):
+        self.queue(2)
+        now = timezone.now()
+        self.assertEqual(deliver_batch(now=now), (0, 2))
+        email = OutboxEmail.objects.first()
+        self.assertEqual((email.status, email.attempts), ('Pending', 1))
+        self.assertEqual(email.next_attempt_at, now + timedelta(seconds=30))
+        self.assertIn('unavailable', email.last_error)
+
+        # Not due again until the backoff has passed
+        self.assertEqual(deliver_batch(now=now + timedelta(seconds=29)), (0, 0))
+        for attempt in range(2, 6):
+            now += timedelta(hours=1)
+            deliver_batch(now=now)
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), ('Failed', 5))
+
+    def test_command_delivers_pending_mail(self):
+        self.queue(3)
+        out = io.StringIO()
+        call_command('send_outbox', stdout=out)
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertIn('Sent 3 email(s), 0 failed', out.getvalue())
+
+    def test_otp_request_is_queued_not_sent(self):
+        user = User.objects.create(username='otp@example.com', email='otp@example.com')
+        Student.objects.create(user=user, name='Otp', email='otp@example.com', gender='Male')
+        client = APIClient()
+        client.force_authenticate(user)
+        self.assertEqual(client.post(reverse('request-otp')).status_code, 200)
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(OutboxEmail.objects.get().recipients, ['otp@example.com'])
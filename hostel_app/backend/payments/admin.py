@@ -1,13 +1,16 @@
 from django.contrib import admin
 from .models import Payment
+from bookings.services import transition_payments
 from django.utils.html import format_html
 from django.urls import reverse
+from jobs.admin import BackgroundActionMixin
 
 @admin.register(Payment)
-class PaymentAdmin(admin.ModelAdmin):
+class PaymentAdmin(BackgroundActionMixin, admin.ModelAdmin):
     list_display = ('student', 'room', 'amount', 'transaction_id', 'status', 'verified', 'created_at')
     list_filter = ('status', 'verified')
     search_fields = ('student__name', 'transaction_id')
+    list_select_related = ('student', 'room')
     readonly_fields = ('created_at', 'updated_at')
     
     fieldsets = (
@@ -26,43 +29,18 @@ class PaymentAdmin(admin.ModelAdmin):
     actions = ['approve_payments', 'reject_payments']
     
     def approve_payments(self, request, queryset):
-        # Update both payment status and student payment status
-        for payment in queryset:
-            payment.status = 'Confirmed'
-            payment.verified = True
-            payment.save()
-            
-            # Update student payment status
-            student = payment.student
-            student.payment_status = 'Confirmed'
-            student.save()
-            
-        self.message_user(request, f"Successfully approved {queryset.count()} payment(s)")
+        if self.enqueue_selection(request, queryset, 'bookings.transition_payments', status='Approved'):
+            return
+        count = transition_payments(queryset, 'Approved', request.user)
+        self.message_user(request, f"Successfully approved {count} payment(s)")
     approve_payments.short_description = "Approve selected payments"
     
     def reject_payments(self, request, queryset):
-        # Update both payment status and student payment status
-        for payment in queryset:
-            payment.status = 'Failed'
-            payment.verified = True
-            payment.save()
-            
-            # Update student payment status
-            student = payment.student
-            student.payment_status = 'Failed'
-            student.save()
-            
-            # Return the seat to the room's available seats
-            room = payment.room
-            if room:
-                room.available_seats += 1
-                room.save()
-            
-            # Remove room assignment from student
-            student.room = None
-            student.save()
-            
-        self.message_user(request, f"Successfully rejected {queryset.count()} payment(s)")
+        if self.enqueue_selection(request, queryset, 'bookings.transition_payments', status='Rejected'):
+            return
+        # Seats go back to their rooms in one aggregated UPDATE per chunk
+        count = transition_payments(queryset, 'Rejected', request.user)
+        self.message_user(request, f"Successfully rejected {count} payment(s)")
     reject_payments.short_description = "Reject selected payments"
 
     def student_name(self, obj):
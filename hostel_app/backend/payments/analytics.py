@@ -0,0 +1,57 @@
+from datetime import datetime, time, timedelta
+from django.db.models import Count, DateField, DecimalField, Q, Sum, Value
+from django.db.models.functions import Coalesce, Trunc
+from django.utils import timezone
+from .models import Payment
+
+PERIODS = ('day', 'week', 'month')
+
+
+def date_range(first, last=None):
+    """The half-open [start, end) datetimes covering local days ``first`` to ``last``.
+
+    Filtering ``created_at__gte=start, created_at__lt=end`` compares the bare
+    column, so the (created_at, ...) indexes can serve it, unlike
+    ``created_at__date`` which wraps every row in a date conversion.
+    """
+    last = last or first
+    start = timezone.make_aware(datetime.combine(first, time.min))
+    end = timezone.make_aware(datetime.combine(last + timedelta(days=1), time.min))
+    return start, end
+
+
+def payments_between(start, end):
+    return Payment.objects.filter(created_at__gte=start, created_at__lt=end)
+
+
+def revenue_buckets(first, last, period='day'):
+    """Payments per day, week or month between two local dates, in one grouped query.
+
+    Each bucket holds its first day, every payment made in it, and the
+    count and amount of those that were confirmed.
+    """
+    if period not in PERIODS:
+        raise ValueError(f'Unknown period {period!r}')
+    confirmed = Q(status='Confirmed')
+    return list(
+        payments_between(*date_range(first, last))
+        .annotate(period=Trunc('created_at', period, output_field=DateField()))
+        .values('period')
+        .annotate(
+            count=Count('pk'),
+            confirmed=Count('pk', filter=confirmed),
+            revenue=Coalesce(
+                Sum('amount', filter=confirmed), Value(0),
+                output_field=DecimalField(max_digits=12, decimal_places=2)
+            ),
+        )
+        .order_by('period')
+    )
+
+
+def status_totals(first, last):
+    """Count and amount of the payments made between two local dates, per status"""
+    return list(
+        payments_between(*date_range(first, last))
+        .values('status').annotate(count=Count('pk'), total=Sum('amount')).order_by('status')
+    )
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:04
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def clear_duplicate_transaction_ids(apps, schema_editor):
+    """Keep the first payment per transaction id so the unique index can be built"""
+    Payment = apps.get_model('payments', 'Payment')
+    duplicates = (
+        Payment.objects.exclude(transaction_id__isnull=True).exclude(transaction_id='')
+        .values('transaction_id').annotate(n=Count('id')).filter(n__gt=1)
+        .values_list('transaction_id', flat=True)
+    )
+    for transaction_id in duplicates:
+        for payment in Payment.objects.filter(transaction_id=transaction_id).order_by('id')[1:]:
+            payment.notes = f"{payment.notes or ''}\nDuplicate submission of transaction {transaction_id}".strip()
+            payment.transaction_id = None
+            payment.save(update_fields=['notes', 'transaction_id'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_student_department_student_first_name_and_more'),
+        ('payments', '0002_alter_payment_room_alter_payment_student'),
+        ('rooms', '0007_room_seat_shards'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payment',
+            name='idempotency_key',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.RunPython(clear_duplicate_transaction_ids, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='payment',
+            constraint=models.UniqueConstraint(condition=models.Q(('transaction_id', ''), _negated=True), fields=('transaction_id',), name='unique_payment_transaction_id'),
+        ),
+        migrations.AddConstraint(
+            model_name='payment',
+            constraint=models.UniqueConstraint(fields=('student', 'idempotency_key'), name='unique_payment_idempotency_key'),
+        ),
+    ]
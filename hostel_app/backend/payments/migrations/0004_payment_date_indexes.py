@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_student_department_student_first_name_and_more'),
+        ('payments', '0003_payment_idempotency'),
+        ('rooms', '0010_room_occupied_count'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['created_at', 'status', 'amount'], name='payment_created_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['status', 'created_at'], name='payment_status_created_idx'),
+        ),
+    ]
@@ -1,8 +1,9 @@
 from django.db import models
+from hostel_management.tracking import TrackChangesMixin
 from accounts.models import Student
 from rooms.models import Room
 
-class Payment(models.Model):
+class Payment(TrackChangesMixin, models.Model):
     STATUS_CHOICES = (
         ('Pending', 'Pending'),
         ('Confirmed', 'Confirmed'),
@@ -13,6 +14,8 @@ class Payment(models.Model):
     room = models.ForeignKey(Room, on_delete=models.SET_NULL, null=True, related_name='payments')
     amount = models.DecimalField(max_digits=10, decimal_places=2)
     transaction_id = models.CharField(max_length=100, null=True, blank=True)
+    # Client-supplied key that lets a retried submission replay the original result
+    idempotency_key = models.CharField(max_length=64, null=True, blank=True)
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='Pending')
     verified = models.BooleanField(default=False)
     verification_date = models.DateTimeField(null=True, blank=True)
@@ -25,4 +28,22 @@ class Payment(models.Model):
         return f"Payment of {self.amount} by {self.student.name} for {self.room.category}"
 
     class Meta:
-        ordering = ['-payment_date']
\ No newline at end of file
+        ordering = ['-payment_date']
+        indexes = [
+            # Date-window analytics: range scans on created_at that read the
+            # status and amount from the index alone
+            models.Index(fields=['created_at', 'status', 'amount'], name='payment_created_status_idx'),
+            # Status totals and per-status windows (pending, confirmed revenue)
+            models.Index(fields=['status', 'created_at'], name='payment_status_created_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['transaction_id'],
+                condition=~models.Q(transaction_id=''),
+                name='unique_payment_transaction_id',
+            ),
+            models.UniqueConstraint(
+                fields=['student', 'idempotency_key'],
+                name='unique_payment_idempotency_key',
+            ),
+        ]
\ No newline at end of file
@@ -1,3 +1,140 @@
+from datetime import date, datetime, time
+from django.contrib.auth.models import User
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from hostel_management.testing import ChangelistQueryCountMixin
+from accounts.models import Student
+from bookings.models import BookingRequest
+from bookings.services import PAYMENT_CHUNK_SIZE, transition_payments
+from rooms.models import Room
+from .analytics import revenue_buckets
+from .models import Payment
 
-# Create your tests here.
+
+class PaymentChangelistTests(ChangelistQueryCountMixin, TestCase):
+    model = Payment
+
+    def setUp(self):
+        self.room = Room.objects.create(
+            category='4 AC A', location='BH2', menu='Veg',
+            rooms_count=500, pax_per_room=4, capacity=2000, available_seats=2000, price=16000
+        )
+        self.client.force_login(User.objects.create_superuser('bursar', 'bursar@example.com', 'x'))
+
+    def add_rows(self, count):
+        start = Payment.objects.count()
+        users = User.objects.bulk_create([User(username=f'p{start + i}') for i in range(count)])
+        students = Student.objects.bulk_create([
+            Student(user=user, name=user.username, email=f'{user.username}@example.com', gender='Male')
+            for user in users
+        ])
+        Payment.objects.bulk_create([
+            Payment(student=student, room=self.room, amount=16000, transaction_id=f'TXN-{student.email}')
+            for student in students
+        ])
+
+
+class BulkPaymentActionTests(TestCase):
+    def setUp(self):
+        self.rooms = [
+            Room.objects.create(
+                category=f'4 AC {letter}', location='BH2', menu='Veg',
+                rooms_count=500, pax_per_room=4, capacity=2000, available_seats=1600, price=16000
+            )
+            for letter in 'ABC'
+        ]
+        self.admin = User.objects.create_superuser('bursar', 'bursar@example.com', 'x')
+
+    def add_pending_payments(self, count):
+        """Students holding a seat with a pending payment and no booking request yet"""
+        users = User.objects.bulk_create([User(username=f'p{i}') for i in range(count)])
+        students = Student.objects.bulk_create([
+            Student(user=user, name=user.username, email=f'{user.username}@example.com', gender='Male',
+                    room=self.rooms[i % 3], payment_status='Pending')
+            for i, user in enumerate(users)
+        ])
+        Payment.objects.bulk_create([
+            Payment(student=student, room=student.room, amount=16000, transaction_id=f'TXN-{student.pk}')
+            for student in students
+        ])
+
+    def test_semester_of_rejections_gives_seats_back_per_room(self):
+        self.add_pending_payments(1200)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(transition_payments(Payment.objects.all(), 'Rejected', self.admin), 1200)
+        chunks = -(-1200 // PAYMENT_CHUNK_SIZE)
+        seat_updates = [q for q in queries.captured_queries if q['sql'].startswith('UPDATE "rooms_room" SET "available_seats"')]
+        self.assertEqual(len(seat_updates), chunks)
+        # Nothing runs per payment; only bulk INSERTs are split into backend-sized batches
+        self.assertLess(len(queries), 1200 // 10)
+        self.assertEqual([room.available_seats for room in Room.objects.order_by('pk')], [2000] * 3)
+        self.assertFalse(Student.objects.filter(room__isnull=False).exists())
+        self.assertEqual(BookingRequest.objects.filter(status='Rejected').count(), 1200)
+
+    def test_approve_action_over_the_whole_changelist(self):
+        self.add_pending_payments(30)
+        self.client.force_login(self.admin)
+        response = self.client.post(reverse('admin:payments_payment_changelist'), {
+            'action': 'approve_payments', 'select_across': '1', 'index': '0',
+            '_selected_action': list(Payment.objects.values_list('pk', flat=True)[:1]),
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Payment.objects.filter(status='Confirmed', verified=True).count(), 30)
+        self.assertEqual(Student.objects.filter(payment_status='Confirmed').count(), 30)
+        self.assertEqual([room.available_seats for room in Room.objects.order_by('pk')], [1600] * 3)
+
+
+class PaymentAnalyticsTests(TestCase):
+    def setUp(self):
+        room = Room.objects.create(
+            category='2 AC A', location='BH2', menu='Veg', rooms_count=5, pax_per_room=1,
+            capacity=5, available_seats=5, price=18000
+        )
+        moments = [
+            (date(2025, 6, 30), time(23, 59, 59), 'Confirmed'),  # before the window
+            (date(2025, 7, 1), time(0, 0), 'Confirmed'),
+            (date(2025, 7, 1), time(18, 30), 'Pending'),
+            (date(2025, 7, 2), time(9, 0), 'Confirmed'),
+            (date(2025, 7, 14), time(23, 59, 59), 'Failed'),
+            (date(2025, 7, 15), time(0, 0), 'Confirmed'),  # after the window
+        ]
+        for i, (day, moment, status) in enumerate(moments):
+            user = User.objects.create(username=f'a{i}')
+            student = Student.objects.create(user=user, name=user.username, email=f'a{i}@example.com', gender='Male')
+            payment = Payment.objects.create(student=student, room=room, amount=1000 * (i + 1), status=status)
+            Payment.objects.filter(pk=payment.pk).update(
+                created_at=timezone.make_aware(datetime.combine(day, moment))
+            )
+
+    def test_buckets_cover_a_half_open_window_in_one_query(self):
+        with self.assertNumQueries(1):
+            buckets = revenue_buckets(date(2025, 7, 1), date(2025, 7, 14))
+        self.assertEqual(
+            [(row['period'], row['count'], row['confirmed'], row['revenue']) for row in buckets],
+            [(date(2025, 7, 1), 2, 1, 2000), (date(2025, 7, 2), 1, 1, 4000), (date(2025, 7, 14), 1, 0, 0)]
+        )
+        self.assertEqual(
+            [(row['period'], row['count']) for row in revenue_buckets(date(2025, 7, 1), date(2025, 7, 14), 'month')],
+            [(date(2025, 7, 1), 4)]
+        )
+
+    def test_analytics_endpoint(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_superuser('bursar', 'bursar@example.com', 'x'))
+        url = reverse('admin-payment-analytics')
+        response = client.get(url, {'start': '2025-07-01', 'end': '2025-07-14', 'period': 'week'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [(row['period'], row['count'], row['revenue']) for row in response.data['buckets']],
+            [(date(2025, 6, 30), 3, 6000), (date(2025, 7, 14), 1, 0)]
+        )
+        self.assertEqual(
+            [(row['status'], row['count']) for row in response.data['statuses']],
+            [('Confirmed', 2), ('Failed', 1), ('Pending', 1)]
+        )
+        self.assertEqual(client.get(url, {'start': '2025-07-14', 'end': '2025-07-01'}).status_code, 400)
+        self.assertEqual(client.get(url, {'period': 'year'}).status_code, 400)
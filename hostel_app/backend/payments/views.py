@@ -1,13 +1,17 @@
+from datetime import timedelta
 from django.shortcuts import render
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.utils import timezone
-from datetime import timedelta
+from django.conf import settings
+from django.utils.dateparse import parse_date
+from .analytics import PERIODS, revenue_buckets, status_totals
 from .models import Payment
 from .serializers import PaymentSerializer
 from accounts.models import Student
 from rooms.models import Room
+from bookings.services import approve_bookings, bookings_for_payments, reject_bookings, transition_bookings
 
 # Create your views here.
 
@@ -39,56 +43,44 @@ class AdminPaymentViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['post'])
     def verify_payment(self, request, pk=None):
         payment = self.get_object()
+        bookings = bookings_for_payments([payment])
         
-        # If payment is more than 24 hours old and still pending, mark as failed
-        time_limit = timezone.now() - timedelta(hours=24)
+        # If the seat hold has lapsed and the payment is still pending, mark as failed
+        time_limit = timezone.now() - settings.SEAT_HOLD_TTL
         if payment.created_at < time_limit and payment.status == 'Pending':
-            payment.status = 'Failed'
-            
-            # If there's a student with a room assignment linked to this payment
-            if payment.student.room:
-                # Increment available seats for the room
-                room = payment.student.room
-                room.available_seats += 1
-                room.save()
-                
-                # Remove room assignment from student
-                payment.student.room = None
-                payment.student.payment_status = 'Failed'
-                payment.student.save()
-            
-            payment.save()
+            transition_bookings(bookings, 'Expired')
             return Response({'detail': 'Payment expired and marked as failed'}, status=status.HTTP_400_BAD_REQUEST)
         
-        # Process verification
-        payment.verified = True
-        payment.status = 'Confirmed'
-        payment.verification_date = timezone.now()
-        payment.save()
-        
-        # Update student's payment status
-        student = payment.student
-        student.payment_status = 'Confirmed'
-        student.save()
-        
+        if not approve_bookings(bookings, request.user):
+            return Response({'detail': f'Cannot verify a {payment.status.lower()} payment'}, status=status.HTTP_400_BAD_REQUEST)
         return Response({'detail': 'Payment verified successfully'}, status=status.HTTP_200_OK)
     
     @action(detail=True, methods=['post'])
     def reject_payment(self, request, pk=None):
         payment = self.get_object()
-        payment.status = 'Failed'
-        payment.save()
-        
-        # Update student's payment status and free up the room
-        student = payment.student
-        if student.room:
-            room = student.room
-            room.available_seats += 1
-            room.save()
-            
-            student.room = None
-        
-        student.payment_status = 'Failed'
-        student.save()
-        
+        if not reject_bookings(bookings_for_payments([payment]), request.user):
+            return Response({'detail': f'Cannot reject a {payment.status.lower()} payment'}, status=status.HTTP_400_BAD_REQUEST)
         return Response({'detail': 'Payment rejected'}, status=status.HTTP_200_OK)
+    
+    @action(detail=False, methods=['get'])
+    def analytics(self, request):
+        """Payment counts and revenue per day, week or month between two dates (inclusive)"""
+        params = request.query_params
+        period = params.get('period', 'day')
+        try:
+            last = parse_date(params['end']) if params.get('end') else timezone.localdate()
+            first = parse_date(params['start']) if params.get('start') else last - timedelta(days=29)
+        except (TypeError, ValueError):
+            first = last = None
+        if period not in PERIODS or first is None or last is None or first > last:
+            return Response(
+                {'detail': f'Give start <= end as YYYY-MM-DD and a period of {", ".join(PERIODS)}.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response({
+            'start': first,
+            'end': last,
+            'period': period,
+            'buckets': revenue_buckets(first, last, period),
+            'statuses': status_totals(first, last),
+        })
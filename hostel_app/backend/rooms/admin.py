@@ -1,9 +1,26 @@
 from django.contrib import admin
-from django.db.models import Count, Sum, Q, F
+from django.db.models import Count
 from django.utils.html import format_html
 from django.urls import path
 from django.template.response import TemplateResponse
-from .models import Room, RoomPhoto
+from .models import Hostel, Room, RoomPhoto, RoomSeatShard, PhysicalRoom, BedAssignment
+from .services import (
+    mark_rooms_full, rebalance_seat_shards, reset_rooms_to_capacity, set_shard_count, with_total_seats
+)
+from stats.counters import room_rollups
+
+@admin.register(Hostel)
+class HostelAdmin(admin.ModelAdmin):
+    list_display = ('name', 'gender', 'room_categories')
+    list_filter = ('gender',)
+    search_fields = ('name',)
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(room_categories=Count('rooms'))
+
+    def room_categories(self, obj):
+        return obj.room_categories
+    room_categories.admin_order_field = 'room_categories'
 
 # First define the RoomPhotoInline class before RoomAdmin
 class RoomPhotoInline(admin.TabularInline):
@@ -22,23 +39,26 @@ class RoomPhotoInline(admin.TabularInline):
 @admin.register(Room)
 class RoomAdmin(admin.ModelAdmin):
     list_display = ('category', 'location', 'rooms_count', 'pax_per_room', 
-                   'capacity', 'available_seats', 'price', 'menu', 'occupancy_status', 'actions_column')
-    list_filter = ('category', 'menu', 'location')
+                   'capacity', 'available_seats', 'occupied_count', 'price', 'menu', 'occupancy_status', 'actions_column')
+    list_filter = ('category', 'menu', 'hostel__gender', 'location')
     search_fields = ('category', 'location')
+    readonly_fields = ('hostel', 'occupied_count')
     
     fieldsets = (
         ('Room Information', {
-            'fields': ('category', 'location', 'menu')
+            'fields': ('category', 'location', 'hostel', 'menu')
         }),
         ('Capacity Details', {
-            'fields': ('rooms_count', 'pax_per_room', 'capacity', 'available_seats')
+            'fields': ('rooms_count', 'pax_per_room', 'capacity', 'available_seats', 'occupied_count')
         }),
         ('Pricing', {
             'fields': ('price',)
         }),
     )
     
-    actions = ['mark_full', 'mark_available']
+    DEFAULT_SHARD_COUNT = 8
+    
+    actions = ['mark_full', 'mark_available', 'shard_seats', 'rebalance_shards', 'unshard_seats']
     inlines = [RoomPhotoInline]  # Now this works because RoomPhotoInline is defined above
     
     def get_urls(self):
@@ -50,15 +70,13 @@ class RoomAdmin(admin.ModelAdmin):
         return custom_urls + urls
     
     def room_stats_view(self, request):
+        # Occupancy, holds and revenue are maintained rollups: no joins to fan out
+        room_stats = room_rollups(Room.objects.order_by('category'))
         context = {
             'title': 'Room Statistics',
-            'room_stats': Room.objects.annotate(
-                occupied=Count('student'),
-                revenue=Sum('student__payment__amount', 
-                          filter=Q(student__payment__status='Confirmed'))
-            ).order_by('category'),
-            'total_rooms': Room.objects.count(),
-            'total_occupied': Room.objects.filter(available_seats__lt=F('capacity')).count(),
+            'room_stats': room_stats,
+            'total_rooms': len(room_stats),
+            'total_occupied': sum(1 for room in room_stats if room.occupied),
             'opts': self.model._meta,
         }
         return TemplateResponse(request, 'admin/room_stats.html', context)
@@ -73,21 +91,36 @@ class RoomAdmin(admin.ModelAdmin):
     actions_column.short_description = 'Actions'
     
     def mark_full(self, request, queryset):
-        for room in queryset:
-            room.available_seats = 0
-            room.save()
+        mark_rooms_full(queryset)
     mark_full.short_description = "Mark selected rooms as full"
     
     def mark_available(self, request, queryset):
-        for room in queryset:
-            room.available_seats = room.capacity
-            room.save()
+        reset_rooms_to_capacity(queryset)
     mark_available.short_description = "Reset available seats to capacity"
+    
+    def shard_seats(self, request, queryset):
+        for room in queryset:
+            set_shard_count(room, self.DEFAULT_SHARD_COUNT)
+        self.message_user(request, f"Split seats of {len(queryset)} room(s) over {self.DEFAULT_SHARD_COUNT} counters")
+    shard_seats.short_description = "Split seats over sharded counters (hot categories)"
+    
+    def rebalance_shards(self, request, queryset):
+        for room in queryset.filter(shard_count__gt=0):
+            rebalance_seat_shards(room)
+        self.message_user(request, "Rebalanced seat shards")
+    rebalance_shards.short_description = "Rebalance seat shards"
+    
+    def unshard_seats(self, request, queryset):
+        for room in queryset.filter(shard_count__gt=0):
+            set_shard_count(room, 0)
+        self.message_user(request, "Merged seat shards back into the room counters")
+    unshard_seats.short_description = "Merge seat shards back into one counter"
 
     def occupancy_status(self, obj):
-        if obj.available_seats == 0:
+        seats_left = obj.total_available_seats
+        if seats_left == 0:
             return format_html('<span style="color: red;">Full</span>')
-        elif obj.available_seats < obj.capacity * 0.2:
+        elif seats_left < obj.capacity * 0.2:
             return format_html('<span style="color: orange;">Almost Full</span>')
         return format_html('<span style="color: green;">Available</span>')
     occupancy_status.short_description = 'Status'
@@ -95,14 +128,12 @@ class RoomAdmin(admin.ModelAdmin):
     def save_model(self, request, obj, form, change):
         if not obj.capacity:
             obj.capacity = obj.rooms_count * obj.pax_per_room
-        if not obj.available_seats:
+        if obj.available_seats is None:
             obj.available_seats = obj.capacity
         super().save_model(request, obj, form, change)
 
     def get_queryset(self, request):
-        return super().get_queryset(request).annotate(
-            student_count=Count('student')
-        )
+        return with_total_seats(super().get_queryset(request))
 
     class Media:
         css = {
@@ -115,6 +146,7 @@ class RoomPhotoAdmin(admin.ModelAdmin):
     list_display = ('thumbnail', 'title', 'room_info', 'is_primary', 'created_at')
     list_filter = ('is_primary', 'room__category', 'room__location')
     search_fields = ('title', 'description', 'room__category')
+    list_select_related = ('room',)
     
     fieldsets = (
         ('Room Information', {
@@ -143,4 +175,24 @@ class RoomPhotoAdmin(admin.ModelAdmin):
             obj.room.category,
             obj.room.location
         )
-    room_info.short_description = 'Room'
\ No newline at end of file
+    room_info.short_description = 'Room'
+
+class BedAssignmentInline(admin.TabularInline):
+    model = BedAssignment
+    extra = 0
+    fields = ('bed', 'student', 'created_at')
+    readonly_fields = ('bed', 'student', 'created_at')
+    can_delete = False
+
+@admin.register(PhysicalRoom)
+class PhysicalRoomAdmin(admin.ModelAdmin):
+    list_display = ('number', 'room', 'beds', 'free_beds', 'bed_map')
+    list_filter = ('room__location', 'room__category', 'free_beds')
+    search_fields = ('number', 'room__category', 'room__location')
+    list_select_related = ('room',)
+    readonly_fields = ('occupied_mask', 'free_beds')
+    inlines = [BedAssignmentInline]
+    
+    def bed_map(self, obj):
+        return ''.join('■' if obj.occupied_mask & (1 << bed) else '□' for bed in range(obj.beds))
+    bed_map.short_description = 'Beds'
@@ -0,0 +1,55 @@
+import hashlib
+import time
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+VERSION_KEY = 'rooms:catalog:version'
+
+# Backends that keep a separate copy in every process; a version stored in one
+# would never reach the other web workers or the management commands
+PER_PROCESS_BACKENDS = {'django.core.cache.backends.locmem.LocMemCache'}
+
+
+def catalog_cache():
+    """The cache shared by every process that serves or changes the catalog"""
+    return caches[settings.ROOM_CATALOG_CACHE]
+
+
+def catalog_version():
+    """Current catalog version: the time of the last change in nanoseconds"""
+    cache = catalog_cache()
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # Lost or evicted: start a fresh version so nothing stale is served
+        cache.add(VERSION_KEY, time.time_ns(), None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def catalog_etag(version, *filters):
+    digest = hashlib.md5(repr(filters).encode(), usedforsecurity=False).hexdigest()[:12]
+    return f'"{version}-{digest}"'
+
+
+def catalog_key(version, *filters):
+    return f'rooms:catalog:{version}:' + ':'.join(str(value or '') for value in filters)
+
+
+def get_catalog(version, *filters):
+    return catalog_cache().get(catalog_key(version, *filters))
+
+
+def set_catalog(version, data, *filters):
+    catalog_cache().set(catalog_key(version, *filters), data, settings.ROOM_CATALOG_CACHE_TIMEOUT)
+
+
+def invalidate_catalog():
+    """Move the catalog to a new version once the current transaction commits.
+
+    Old entries are never deleted, they just stop being read and expire.
+    Waiting for the commit keeps a concurrent request from caching the old
+    rows under the new version. The change has already committed by then, so
+    a cache that is briefly unreachable is logged rather than failing it.
+    """
+    transaction.on_commit(lambda: catalog_cache().set(VERSION_KEY, time.time_ns(), None), robust=True)
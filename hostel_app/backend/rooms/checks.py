@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.checks import Error, register
+from .cache import PER_PROCESS_BACKENDS
+
+
+@register()
+def check_catalog_cache(app_configs, **kwargs):
+    """Refuse a catalog cache that each process keeps to itself"""
+    backend = settings.CACHES.get(settings.ROOM_CATALOG_CACHE, {}).get('BACKEND')
+    if backend is None:
+        return [Error(
+            f'ROOM_CATALOG_CACHE names the cache alias {settings.ROOM_CATALOG_CACHE!r}, which is not in CACHES.',
+            id='rooms.E001',
+        )]
+    if backend in PER_PROCESS_BACKENDS:
+        return [Error(
+            f'The room catalog cache uses {backend}, which is separate in every process.',
+            hint='Seat changes would not reach the other workers. Use Redis, Memcached or DatabaseCache.',
+            id='rooms.E002',
+        )]
+    return []
@@ -0,0 +1,146 @@
+from collections import defaultdict, deque
+from django.db import transaction
+from django.db.models import F
+from .models import BedAssignment, PhysicalRoom
+
+# Optimistic bitmap updates retry this often before giving up on a room
+MAX_ATTEMPTS = 5
+
+
+def free_bed_indexes(mask, beds):
+    """Indexes of the clear bits in an occupancy bitmap"""
+    return [bed for bed in range(beds) if not mask & (1 << bed)]
+
+
+def find_room_with_free_beds(room, beds=1, fill_partial_first=True):
+    """First physical room of a category with at least ``beds`` free beds.
+
+    Served by the (room, free_beds, id) index: by default the fullest room
+    that still fits is returned, so partially filled rooms fill up first.
+    """
+    order = ('free_beds', 'id') if fill_partial_first else ('-free_beds', 'id')
+    return PhysicalRoom.objects.filter(room=room, free_beds__gte=beds).order_by(*order).first()
+
+
+def build_physical_rooms(room, prefix=None):
+    """Create the physical rooms of a category that do not exist yet"""
+    prefix = prefix or room.category.replace(' ', '')
+    PhysicalRoom.objects.bulk_create(
+        [
+            PhysicalRoom(
+                room=room, number=f'{prefix}-{index:03d}',
+                beds=room.pax_per_room, free_beds=room.pax_per_room
+            )
+            for index in range(1, room.rooms_count + 1)
+        ],
+        ignore_conflicts=True,
+    )
+
+
+@transaction.atomic
+def assign_beds(room, students, fill_partial_first=True):
+    """Put a group of students together in one physical room.
+
+    Beds are claimed with a compare-and-set on the occupancy bitmap, so two
+    concurrent assignments never get the same bed. Returns the created
+    BedAssignment rows, or None if no room has enough free beds.
+    """
+    wanted = len(students)
+    for _ in range(MAX_ATTEMPTS):
+        physical_room = find_room_with_free_beds(room, wanted, fill_partial_first)
+        if physical_room is None:
+            return None
+        mask = physical_room.occupied_mask
+        beds = free_bed_indexes(mask, physical_room.beds)[:wanted]
+        new_mask = mask
+        for bed in beds:
+            new_mask |= 1 << bed
+        claimed = PhysicalRoom.objects.filter(pk=physical_room.pk, occupied_mask=mask).update(
+            occupied_mask=new_mask, free_beds=F('free_beds') - wanted
+        )
+        if claimed:
+            return BedAssignment.objects.bulk_create([
+                BedAssignment(physical_room=physical_room, bed=bed, student=student)
+                for bed, student in zip(beds, students)
+            ])
+    return None
+
+
+def assign_bed(student, room, fill_partial_first=True):
+    assignments = assign_beds(room, [student], fill_partial_first)
+    return assignments[0] if assignments else None
+
+
+# No savepoint of their own: callers like transition_bookings already run
+# in a transaction, and these only ever fail as a whole
+@transaction.atomic(savepoint=False)
+def vacate_beds(students):
+    """Free the beds held by the given students (instances or ids)"""
+    assignments = list(
+        BedAssignment.objects.filter(student__in=students).values_list('id', 'physical_room_id', 'bed')
+    )
+    if not assignments:
+        return 0
+    # One UPDATE per physical room, clearing all of its freed bits at once
+    freed = defaultdict(list)
+    for _, physical_room_id, bed in assignments:
+        freed[physical_room_id].append(bed)
+    for physical_room_id, beds in freed.items():
+        PhysicalRoom.objects.filter(pk=physical_room_id).update(
+            occupied_mask=F('occupied_mask') - sum(1 << bed for bed in beds), free_beds=F('free_beds') + len(beds)
+        )
+    BedAssignment.objects.filter(id__in=[assignment_id for assignment_id, _, _ in assignments]).delete()
+    return len(assignments)
+
+
+@transaction.atomic(savepoint=False)
+def settle_beds(students_by_room):
+    """Make the bed inventory follow students into their room categories.
+
+    ``students_by_room`` maps room ids to student ids. Students keep a bed
+    they already hold in their category, give up one held elsewhere, and are
+    packed into free beds otherwise. Categories without physical rooms, or
+    with none free, leave their students without a bed.
+    """
+    room_of = {student_id: room_id for room_id, student_ids in students_by_room.items() for student_id in student_ids}
+    held = dict(
+        BedAssignment.objects.filter(student_id__in=room_of).values_list('student_id', 'physical_room__room_id')
+    )
+    moving = [student_id for student_id, room_id in held.items() if room_of[student_id] != room_id]
+    if moving:
+        vacate_beds(moving)
+    with_free_beds = set(
+        PhysicalRoom.objects.filter(room_id__in=students_by_room, free_beds__gt=0).values_list('room_id', flat=True)
+    )
+    for room_id in with_free_beds:
+        homeless = [student_id for student_id in students_by_room[room_id] if held.get(student_id) != room_id]
+        if homeless:
+            fill_beds(room_id, homeless)
+
+
+@transaction.atomic
+def fill_beds(room, student_ids):
+    """Give beds to many students of one category at once.
+
+    Physical rooms are loaded once and packed in memory, fullest first,
+    then written back with one bulk update and one bulk insert. Returns the
+    ids of the students that did not fit.
+    """
+    physical_rooms = PhysicalRoom.objects.select_for_update().filter(
+        room=room, free_beds__gt=0
+    ).order_by('free_beds', 'id')
+    waiting = deque(student_ids)
+    assignments = []
+    touched = []
+    for physical_room in physical_rooms:
+        if not waiting:
+            break
+        for bed in free_bed_indexes(physical_room.occupied_mask, physical_room.beds)[:len(waiting)]:
+            assignments.append(BedAssignment(physical_room=physical_room, bed=bed, student_id=waiting.popleft()))
+            physical_room.occupied_mask |= 1 << bed
+            physical_room.free_beds -= 1
+        touched.append(physical_room)
+
+    PhysicalRoom.objects.bulk_update(touched, ['occupied_mask', 'free_beds'], batch_size=500)
+    BedAssignment.objects.bulk_create(assignments, batch_size=500)
+    return list(waiting)
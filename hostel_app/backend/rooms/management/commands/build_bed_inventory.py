@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from rooms.models import Room, PhysicalRoom
+from rooms.inventory import build_physical_rooms
+
+class Command(BaseCommand):
+    help = 'Create the physical rooms and beds behind each room category'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--room', type=int, action='append', dest='rooms',
+                            help='Room category id to build (repeatable); defaults to all')
+
+    def handle(self, *args, **options):
+        rooms = Room.objects.all()
+        if options['rooms']:
+            rooms = rooms.filter(pk__in=options['rooms'])
+
+        for room in rooms:
+            build_physical_rooms(room)
+            built = PhysicalRoom.objects.filter(room=room).count()
+            self.stdout.write(f'{room}: {built} physical room(s) of {room.pax_per_room} bed(s)')
+
+        self.stdout.write(self.style.SUCCESS('Bed inventory built'))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from rooms.models import Room
+from rooms.services import rebalance_seat_shards, set_shard_count
+
+class Command(BaseCommand):
+    help = 'Rebalance sharded seat counters, or change how many shards a room uses'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--room', type=int, action='append', dest='rooms',
+                            help='Room id to work on (repeatable); defaults to every sharded room')
+        parser.add_argument('--shards', type=int,
+                            help='Set the number of shards for the selected rooms (0 to unshard)')
+
+    def handle(self, *args, **options):
+        rooms = Room.objects.all()
+        if options['rooms']:
+            rooms = rooms.filter(pk__in=options['rooms'])
+        elif options['shards'] is None:
+            rooms = rooms.filter(shard_count__gt=0)
+
+        for room in rooms:
+            if options['shards'] is not None:
+                set_shard_count(room, options['shards'])
+            else:
+                rebalance_seat_shards(room)
+            room.refresh_from_db()
+            self.stdout.write(f'{room}: {room.total_available_seats} seats over {room.shard_count} shard(s)')
+
+        self.stdout.write(self.style.SUCCESS('Seat shards rebalanced'))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from rooms.models import Room
+from rooms.services import recount_occupancy
+
+class Command(BaseCommand):
+    help = 'Recompute each room category\'s occupied count from the students table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--room', type=int, action='append', dest='rooms',
+                            help='Room category id to recount (repeatable); defaults to all')
+
+    def handle(self, *args, **options):
+        rooms = Room.objects.all()
+        if options['rooms']:
+            rooms = rooms.filter(pk__in=options['rooms'])
+        updated = recount_occupancy(rooms)
+        self.stdout.write(self.style.SUCCESS(f'Recounted occupancy of {updated} room(s)'))
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rooms', '0006_room_price'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='room',
+            name='shard_count',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='RoomSeatShard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('index', models.PositiveSmallIntegerField()),
+                ('available', models.IntegerField(default=0)),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='seat_shards', to='rooms.room')),
+            ],
+            options={
+                'ordering': ['room', 'index'],
+                'unique_together': {('room', 'index')},
+            },
+        ),
+    ]
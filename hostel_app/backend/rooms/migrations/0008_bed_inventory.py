@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_student_department_student_first_name_and_more'),
+        ('rooms', '0007_room_seat_shards'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PhysicalRoom',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('number', models.CharField(max_length=20)),
+                ('beds', models.PositiveSmallIntegerField()),
+                ('occupied_mask', models.PositiveIntegerField(default=0)),
+                ('free_beds', models.PositiveSmallIntegerField()),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='physical_rooms', to='rooms.room')),
+            ],
+            options={
+                'ordering': ['room', 'number'],
+            },
+        ),
+        migrations.CreateModel(
+            name='BedAssignment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bed', models.PositiveSmallIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('student', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='bed', to='accounts.student')),
+                ('physical_room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='assignments', to='rooms.physicalroom')),
+            ],
+            options={
+                'ordering': ['physical_room', 'bed'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='physicalroom',
+            index=models.Index(fields=['room', 'free_beds', 'id'], name='physicalroom_vacancy_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='physicalroom',
+            unique_together={('room', 'number')},
+        ),
+        migrations.AlterUniqueTogether(
+            name='bedassignment',
+            unique_together={('physical_room', 'bed')},
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# The blocks that were hard-coded in the views and serializers
+HOSTELS = {
+    'BH1': 'Male', 'BH2': 'Male', 'Habitat': 'Male', 'Thandalam': 'Male',
+    'GH1 (BH3)': 'Female', 'GH2': 'Female', 'GH3 (BH1)': 'Female',
+}
+
+
+def create_hostels(apps, schema_editor):
+    Hostel = apps.get_model('rooms', 'Hostel')
+    Room = apps.get_model('rooms', 'Room')
+    locations = set(HOSTELS) | set(Room.objects.values_list('location', flat=True))
+    for name in locations:
+        # Unknown locations keep the old fallback of housing boys
+        hostel, _ = Hostel.objects.get_or_create(name=name, defaults={'gender': HOSTELS.get(name, 'Male')})
+        Room.objects.filter(location=name).update(hostel=hostel)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rooms', '0008_bed_inventory'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Hostel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('gender', models.CharField(choices=[('Male', 'Male'), ('Female', 'Female')], db_index=True, max_length=10)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='room',
+            name='hostel',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='rooms', to='rooms.hostel'),
+        ),
+        migrations.RunPython(create_hostels, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:25
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_occupants(apps, schema_editor):
+    Room = apps.get_model('rooms', 'Room')
+    Student = apps.get_model('accounts', 'Student')
+    occupants = (
+        Student.objects.filter(room=OuterRef('pk')).values('room')
+        .annotate(total=Count('pk')).values('total')
+    )
+    Room.objects.update(occupied_count=Coalesce(Subquery(occupants), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_student_department_student_first_name_and_more'),
+        ('rooms', '0009_hostel'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='room',
+            name='occupied_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(count_occupants, migrations.RunPython.noop),
+    ]
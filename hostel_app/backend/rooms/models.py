@@ -1,22 +1,51 @@
 from django.db import models
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.utils import timezone
 import os
 from django.utils.text import slugify
+from hostel_management.tracking import TrackChangesMixin
+from .cache import invalidate_catalog
 
-class Room(models.Model):
+class Hostel(models.Model):
+    """A hostel block; a room's location names the block it belongs to"""
+    GENDER_CHOICES = (
+        ('Male', 'Male'),
+        ('Female', 'Female')
+    )
+
+    name = models.CharField(max_length=50, unique=True)
+    gender = models.CharField(max_length=10, choices=GENDER_CHOICES, db_index=True)
+
+    def __str__(self):
+        return self.name
+
+    class Meta:
+        ordering = ['name']
+
+class Room(TrackChangesMixin, models.Model):
     MENU_CHOICES = (
         ('Veg', 'Veg'),
         ('Non Veg', 'Non Veg')
     )
+    # Rooms outside a known block were always treated as boys' rooms
+    UNLINKED_GENDER = 'Male'
 
     category = models.CharField(max_length=50)
     location = models.CharField(max_length=50)
+    hostel = models.ForeignKey(Hostel, on_delete=models.PROTECT, related_name='rooms', null=True, blank=True)
     menu = models.CharField(max_length=10, choices=MENU_CHOICES)
     rooms_count = models.IntegerField(default=0)
     pax_per_room = models.IntegerField(default=2)  # Default to 2 persons per room
     capacity = models.IntegerField()
     available_seats = models.IntegerField()
     price = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
+    # Hot categories can spread their seats over several sub-counters so
+    # concurrent reservations do not all queue on this row. 0 means unsharded.
+    shard_count = models.PositiveSmallIntegerField(default=0)
+    # Students assigned to this category, kept in step by every write path
+    # (see rooms.services.adjust_occupancy) so listings need no COUNT join
+    occupied_count = models.IntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True, null=True)
     updated_at = models.DateTimeField(auto_now=True, null=True)
 
@@ -24,18 +53,90 @@ class Room(models.Model):
         # Auto-calculate capacity if not set
         if not self.capacity:
             self.capacity = self.rooms_count * self.pax_per_room
-        # Initialize available seats if not set
-        if not self.available_seats:
+        # Initialize available seats if not set (0 is a valid, sold-out value)
+        if self.available_seats is None:
             self.available_seats = self.capacity
+        # Link the block named by the location when it is known
+        if self.hostel_id is None or self.has_changed('location'):
+            self.hostel = Hostel.objects.filter(name=self.location).first()
         super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.category} - {self.location}"
 
+    @property
+    def gender(self):
+        return self.hostel.gender if self.hostel_id else self.UNLINKED_GENDER
+
+    @property
+    def total_available_seats(self):
+        """Seats left across this row and any seat shards"""
+        if 'total_seats' in self.__dict__:
+            return self.total_seats
+        if not self.shard_count:
+            return self.available_seats
+        sharded = self.seat_shards.aggregate(total=models.Sum('available'))['total'] or 0
+        return self.available_seats + sharded
+
     class Meta:
         ordering = ['category', 'location']
         unique_together = ['category', 'location']  # Prevent duplicate room categories in same location
 
+class RoomSeatShard(models.Model):
+    """One of the sub-counters a sharded room's available seats are split across"""
+    room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name='seat_shards')
+    index = models.PositiveSmallIntegerField()
+    available = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.room} shard {self.index}: {self.available}"
+
+    class Meta:
+        ordering = ['room', 'index']
+        unique_together = ['room', 'index']
+
+class PhysicalRoom(models.Model):
+    """A real room within a Room category.
+
+    ``occupied_mask`` has bit i set when bed i is taken, and ``free_beds``
+    mirrors the number of clear bits so vacancy lookups are an index seek.
+    """
+    room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name='physical_rooms')
+    number = models.CharField(max_length=20)
+    beds = models.PositiveSmallIntegerField()
+    occupied_mask = models.PositiveIntegerField(default=0)
+    free_beds = models.PositiveSmallIntegerField()
+
+    def __str__(self):
+        return f"{self.room.location} {self.number}"
+
+    def save(self, *args, **kwargs):
+        if self.free_beds is None:
+            self.free_beds = self.beds - bin(self.occupied_mask).count('1')
+        super().save(*args, **kwargs)
+
+    class Meta:
+        ordering = ['room', 'number']
+        unique_together = ['room', 'number']
+        indexes = [
+            # Serves "first room with k free beds", fullest first
+            models.Index(fields=['room', 'free_beds', 'id'], name='physicalroom_vacancy_idx'),
+        ]
+
+class BedAssignment(models.Model):
+    """Which bed of which physical room a student sleeps in"""
+    physical_room = models.ForeignKey(PhysicalRoom, on_delete=models.CASCADE, related_name='assignments')
+    bed = models.PositiveSmallIntegerField()
+    student = models.OneToOneField('accounts.Student', on_delete=models.CASCADE, related_name='bed')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.physical_room} bed {self.bed + 1}"
+
+    class Meta:
+        ordering = ['physical_room', 'bed']
+        unique_together = ['physical_room', 'bed']
+
 def room_photo_path(instance, filename):
     """Generate file path for room photos"""
     # Get filename extension
@@ -63,4 +164,18 @@ class RoomPhoto(models.Model):
         # If this photo is marked as primary, unmark other primary photos for this room
         if self.is_primary:
             RoomPhoto.objects.filter(room=self.room, is_primary=True).update(is_primary=False)
-        super().save(*args, **kwargs)
\ No newline at end of file
+        super().save(*args, **kwargs)
+
+
+@receiver(post_save, sender=Hostel)
+def link_hostel_rooms(sender, instance, **kwargs):
+    """Link rooms created before their block was known"""
+    Room.objects.filter(location=instance.name, hostel__isnull=True).update(hostel=instance)
+
+
+@receiver([post_save, post_delete], sender=Hostel)
+@receiver([post_save, post_delete], sender=Room)
+@receiver([post_save, post_delete], sender=RoomPhoto)
+def invalidate_room_catalog(sender, **kwargs):
+    """Hostels, rooms and photos feed the cached catalog; seat UPDATEs invalidate in rooms.services"""
+    invalidate_catalog()
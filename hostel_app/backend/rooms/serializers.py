@@ -7,7 +7,7 @@ class RoomPhotoSerializer(serializers.ModelSerializer):
         fields = ['id', 'title', 'description', 'image', 'is_primary']
 
 class RoomSerializer(serializers.ModelSerializer):
-    gender = serializers.SerializerMethodField()
+    gender = serializers.CharField(read_only=True)
     photos = RoomPhotoSerializer(many=True, read_only=True)
     primary_photo = serializers.SerializerMethodField()
     
@@ -20,17 +20,18 @@ class RoomSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'created_at', 'updated_at'] 
 
-    def get_gender(self, obj):
-        """Determine gender based on location"""
-        if obj.location in ['GH1 (BH3)', 'GH2', 'GH3 (BH1)']:
-            return 'Female'
-        else:
-            return 'Male'
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        # Sharded rooms keep part of their seats outside the room row
+        data['available_seats'] = instance.total_available_seats
+        return data
 
     def get_primary_photo(self, obj):
-        primary_photo = obj.photos.filter(is_primary=True).first()
-        if not primary_photo:
-            primary_photo = obj.photos.first()
+        # Works on the prefetched photos, which are already ordered primary first
+        photos = obj.photos.all()
+        primary_photo = next((photo for photo in photos if photo.is_primary), None)
+        if not primary_photo and photos:
+            primary_photo = photos[0]
         
         if primary_photo:
             return RoomPhotoSerializer(primary_photo).data
@@ -0,0 +1,188 @@
+import random
+from django.db import transaction
+from django.db.models import Case, Count, F, IntegerField, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from .cache import invalidate_catalog
+from .models import Room, RoomSeatShard
+from stats.counters import record_occupancy
+
+
+def reserve_seat(room):
+    """Take one seat from a room if any are left.
+
+    The availability check and the decrement run as a single conditional
+    UPDATE, so concurrent bookings cannot oversell a room. Sharded rooms try
+    their sub-counters first, starting at a random one so concurrent writers
+    spread out, and fall back to the room row. Returns True when a seat was
+    reserved and False when the room is sold out.
+    """
+    if room.shard_count:
+        start = random.randrange(room.shard_count)
+        for offset in range(room.shard_count):
+            index = (start + offset) % room.shard_count
+            if RoomSeatShard.objects.filter(room_id=room.pk, index=index, available__gt=0).update(
+                available=F('available') - 1
+            ):
+                invalidate_catalog()
+                return True
+
+    updated = Room.objects.filter(pk=room.pk, available_seats__gt=0).update(
+        available_seats=F('available_seats') - 1
+    )
+    if updated:
+        invalidate_catalog()
+    return updated == 1
+
+
+def release_seat(room_id, seats=1):
+    """Give seats back to a room without a read-modify-write round trip"""
+    Room.objects.filter(pk=room_id).update(
+        available_seats=F('available_seats') + seats
+    )
+    invalidate_catalog()
+
+
+def release_seats(seats_by_room):
+    """Give seats back to many rooms in one UPDATE.
+
+    ``seats_by_room`` maps room ids to the number of seats to return.
+    Sharded rooms receive them on the room row until the next rebalance.
+    """
+    if not seats_by_room:
+        return
+    Room.objects.filter(pk__in=seats_by_room).update(
+        available_seats=F('available_seats') + Case(
+            *[When(pk=room_id, then=Value(seats)) for room_id, seats in seats_by_room.items()],
+            default=Value(0),
+            output_field=IntegerField(),
+        )
+    )
+    invalidate_catalog()
+
+
+def adjust_occupancy(changes):
+    """Apply per-room changes to the maintained occupied counts in one UPDATE.
+
+    ``changes`` maps room ids to how many students joined (positive) or left
+    (negative) them; ``None`` keys and zero changes are ignored.
+    """
+    changes = {room_id: delta for room_id, delta in changes.items() if room_id is not None and delta}
+    if not changes:
+        return
+    Room.objects.filter(pk__in=changes).update(
+        occupied_count=F('occupied_count') + Case(
+            *[When(pk=room_id, then=Value(delta)) for room_id, delta in changes.items()],
+            default=Value(0),
+            output_field=IntegerField(),
+        )
+    )
+    record_occupancy(changes)
+
+
+def recount_occupancy(rooms=None):
+    """Recompute occupied counts from the students table, to repair any drift"""
+    from accounts.models import Student
+    occupants = (
+        Student.objects.filter(room=OuterRef('pk')).values('room')
+        .annotate(total=Count('pk')).values('total')
+    )
+    rooms = Room.objects.all() if rooms is None else rooms
+    return rooms.update(occupied_count=Coalesce(Subquery(occupants), 0))
+
+
+def mark_rooms_full(rooms):
+    """Close every room of a queryset to new bookings with one UPDATE per table"""
+    room_ids = list(rooms.values_list('pk', flat=True))
+    RoomSeatShard.objects.filter(room_id__in=room_ids).update(available=0)
+    Room.objects.filter(pk__in=room_ids).update(available_seats=0)
+    invalidate_catalog()
+
+
+def reset_rooms_to_capacity(rooms):
+    """Put every seat of the given rooms back on sale with one UPDATE per table.
+
+    Sharded rooms get their seats on the room row; the next rebalance
+    spreads them over the shards again.
+    """
+    room_ids = list(rooms.values_list('pk', flat=True))
+    RoomSeatShard.objects.filter(room_id__in=room_ids).update(available=0)
+    Room.objects.filter(pk__in=room_ids).update(available_seats=F('capacity'))
+    invalidate_catalog()
+
+
+def with_total_seats(queryset):
+    """Annotate rooms with ``total_seats``: the room row plus its shards"""
+    sharded = (
+        RoomSeatShard.objects.filter(room=OuterRef('pk'))
+        .values('room')
+        .annotate(total=Sum('available'))
+        .values('total')
+    )
+    return queryset.annotate(
+        total_seats=F('available_seats') + Coalesce(Subquery(sharded), 0)
+    )
+
+
+def with_gender(queryset, gender):
+    """Rooms for one gender, counting unlinked rooms the way Room.gender does"""
+    match = Q(hostel__gender=gender)
+    if gender == Room.UNLINKED_GENDER:
+        match |= Q(hostel__isnull=True)
+    return queryset.filter(match)
+
+
+def _take(queryset, field, amount):
+    """Conditionally remove up to ``amount`` from one counter, returning what was taken"""
+    if amount > 0 and queryset.filter(**{f'{field}__gte': amount}).update(**{field: F(field) - amount}):
+        return amount
+    return 0
+
+
+@transaction.atomic
+def rebalance_seat_shards(room):
+    """Spread a sharded room's seats evenly over its shards.
+
+    Seats are moved with conditional decrements followed by increments, so
+    the total is conserved even while reservations keep running.
+    """
+    shards = list(RoomSeatShard.objects.filter(room=room).order_by('index'))
+    if not shards:
+        return
+
+    room_row = Room.objects.filter(pk=room.pk)
+    pool = _take(room_row, 'available_seats', room_row.values_list('available_seats', flat=True).get())
+    total = pool + sum(shard.available for shard in shards)
+    base, extra = divmod(total, len(shards))
+    targets = [base + (1 if i < extra else 0) for i in range(len(shards))]
+
+    for shard, target in zip(shards, targets):
+        if shard.available > target:
+            pool += _take(RoomSeatShard.objects.filter(pk=shard.pk), 'available', shard.available - target)
+    for shard, target in zip(shards, targets):
+        if shard.available < target and pool:
+            amount = min(target - shard.available, pool)
+            RoomSeatShard.objects.filter(pk=shard.pk).update(available=F('available') + amount)
+            pool -= amount
+    if pool:
+        release_seat(room.pk, pool)
+    room.refresh_from_db(fields=['available_seats'])
+
+
+@transaction.atomic
+def set_shard_count(room, shard_count):
+    """Split a room's seats over ``shard_count`` sub-counters (0 to unshard)"""
+    Room.objects.filter(pk=room.pk).update(shard_count=shard_count)
+    room.shard_count = shard_count
+
+    # Drain surplus shards back into the room row before dropping them
+    for shard in RoomSeatShard.objects.filter(room=room, index__gte=shard_count):
+        shard_row = RoomSeatShard.objects.filter(pk=shard.pk)
+        while not shard_row.filter(available=0).delete()[0]:
+            available = shard_row.values_list('available', flat=True).get()
+            release_seat(room.pk, _take(shard_row, 'available', available))
+
+    RoomSeatShard.objects.bulk_create(
+        [RoomSeatShard(room=room, index=index) for index in range(shard_count)],
+        ignore_conflicts=True,
+    )
+    rebalance_seat_shards(room)
@@ -1,3 +1,396 @@
-from django.test import TestCase
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.core.cache.backends.db import DatabaseCache
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+from hostel_management.testing import ChangelistQueryCountMixin
+from accounts.models import Student
+from .cache import VERSION_KEY, catalog_cache
+from .checks import check_catalog_cache
+from .inventory import assign_bed, assign_beds, build_physical_rooms, fill_beds, find_room_with_free_beds, vacate_beds
+from .models import BedAssignment, Hostel, PhysicalRoom, Room, RoomPhoto, RoomSeatShard
+from .services import (
+    mark_rooms_full, rebalance_seat_shards, recount_occupancy, release_seat, reserve_seat,
+    reset_rooms_to_capacity, set_shard_count
+)
 
-# Create your tests here.
+IN_PROCESS_CACHES = {**settings.CACHES, 'catalog': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+class SeatReservationTests(TestCase):
+    def setUp(self):
+        self.room = Room.objects.create(
+            category='2 AC A', location='BH2', menu='Veg',
+            rooms_count=1, pax_per_room=2, capacity=2, available_seats=2
+        )
+
+    def test_reserve_until_sold_out(self):
+        self.assertTrue(reserve_seat(self.room))
+        self.assertTrue(reserve_seat(self.room))
+        self.assertFalse(reserve_seat(self.room))
+        self.room.refresh_from_db()
+        self.assertEqual(self.room.available_seats, 0)
+
+    def test_release_returns_seat(self):
+        reserve_seat(self.room)
+        release_seat(self.room.id)
+        self.room.refresh_from_db()
+        self.assertEqual(self.room.available_seats, 2)
+
+
+class SeatShardTests(TestCase):
+    def setUp(self):
+        self.room = Room.objects.create(
+            category='6 Non AC C', location='Habitat', menu='Non Veg',
+            rooms_count=10, pax_per_room=6, capacity=60, available_seats=60
+        )
+
+    def shard_levels(self):
+        return list(RoomSeatShard.objects.filter(room=self.room).values_list('available', flat=True))
+
+    def test_sharding_spreads_seats_evenly(self):
+        set_shard_count(self.room, 8)
+        self.assertEqual(self.shard_levels(), [8, 8, 8, 8, 7, 7, 7, 7])
+        self.room.refresh_from_db()
+        self.assertEqual(self.room.available_seats, 0)
+        self.assertEqual(self.room.total_available_seats, 60)
+
+    def test_reservations_drain_shards_then_room_row(self):
+        set_shard_count(self.room, 4)
+        release_seat(self.room.id, 2)
+        results = [reserve_seat(self.room) for _ in range(63)]
+        self.assertEqual(results.count(True), 62)
+        self.room.refresh_from_db()
+        self.assertEqual(self.room.total_available_seats, 0)
+
+    def test_rebalance_conserves_seats(self):
+        set_shard_count(self.room, 4)
+        for _ in range(15):
+            reserve_seat(self.room)
+        RoomSeatShard.objects.filter(room=self.room, index=0).update(available=0)
+        release_seat(self.room.id, 5)
+        self.room.refresh_from_db()
+        total = self.room.total_available_seats
+        rebalance_seat_shards(self.room)
+        self.assertEqual(self.room.total_available_seats, total)
+        self.assertLessEqual(max(self.shard_levels()) - min(self.shard_levels()), 1)
+
+    def test_unsharding_moves_seats_back_to_the_room(self):
+        set_shard_count(self.room, 4)
+        reserve_seat(self.room)
+        set_shard_count(self.room, 0)
+        self.room.refresh_from_db()
+        self.assertEqual(self.room.available_seats, 59)
+        self.assertFalse(RoomSeatShard.objects.filter(room=self.room).exists())
+
+
+class RoomCatalogCacheTests(TestCase):
+    def setUp(self):
+        catalog_cache().clear()
+        self.room = Room.objects.create(
+            category='3 AC B', location='GH2', menu='Veg',
+            rooms_count=2, pax_per_room=3, capacity=6, available_seats=6
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('catalog', password='x'))
+
+    def get_catalog(self, **headers):
+        return self.client.get('/api/rooms/', {'gender': 'Female'}, headers=headers)
+
+    def test_unchanged_catalog_is_served_from_cache(self):
+        first = self.get_catalog()
+        self.assertEqual(first.status_code, 200)
+        self.assertIn('ETag', first)
+        self.assertNotIn('Last-Modified', first)
+        # the shared version, then the cached list
+        with self.assertNumQueries(2):
+            second = self.get_catalog()
+        self.assertEqual(second.json(), first.json())
+
+    def test_matching_etag_gets_304(self):
+        etag = self.get_catalog()['ETag']
+        response = self.get_catalog(if_none_match=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_if_modified_since_alone_gets_the_list(self):
+        self.get_catalog()
+        response = self.get_catalog(if_modified_since='Fri, 01 Jan 2100 00:00:00 GMT')
+        self.assertEqual(response.status_code, 200)
+
+    def test_filters_get_their_own_etag(self):
+        female = self.get_catalog()['ETag']
+        male = self.client.get('/api/rooms/', {'gender': 'Male'})['ETag']
+        self.assertNotEqual(female, male)
+
+    def test_seat_change_invalidates(self):
+        etag = self.get_catalog()['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            reserve_seat(self.room)
+        response = self.get_catalog(if_none_match=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()[0]['available_seats'], 5)
+
+    def test_photo_change_invalidates(self):
+        etag = self.get_catalog()['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            RoomPhoto.objects.create(room=self.room, title='Front', image='room_photos/front.jpg')
+        response = self.get_catalog(if_none_match=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()[0]['photos']), 1)
+
+    def test_hostel_change_invalidates(self):
+        etag = self.get_catalog()['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            hostel = Hostel.objects.get(name='GH2')
+            hostel.gender = 'Male'
+            hostel.save()
+        response = self.get_catalog(if_none_match=etag)
+        self.assertEqual((response.status_code, response.json()), (200, []))
+
+    def test_change_in_another_process_invalidates(self):
+        etag = self.get_catalog()['ETag']
+        # A separate handle on the same table, as a worker or command would hold
+        other_process = DatabaseCache(settings.CACHES['catalog']['LOCATION'], {})
+        other_process.set(VERSION_KEY, other_process.get(VERSION_KEY) + 1, None)
+        self.assertEqual(self.get_catalog(if_none_match=etag).status_code, 200)
+
+    def test_per_process_cache_is_refused(self):
+        self.assertEqual(check_catalog_cache(None), [])
+        with override_settings(CACHES=IN_PROCESS_CACHES):
+            self.assertEqual([error.id for error in check_catalog_cache(None)], ['rooms.E002'])
+        with override_settings(ROOM_CATALOG_CACHE='missing'):
+            self.assertEqual([error.id for error in check_catalog_cache(None)], ['rooms.E001'])
+
+
+class HostelGenderTests(TestCase):
+    def setUp(self):
+        catalog_cache().clear()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('hostels', password='x'))
+
+    def make_room(self, location):
+        return Room.objects.create(
+            category='2 AC A', location=location, menu='Veg',
+            rooms_count=1, pax_per_room=2, capacity=2, available_seats=2
+        )
+
+    def test_rooms_link_to_their_hostel(self):
+        room = self.make_room('GH3 (BH1)')
+        self.assertEqual(room.hostel.name, 'GH3 (BH1)')
+        self.assertEqual(room.gender, 'Female')
+        self.assertEqual(self.make_room('Thandalam').gender, 'Male')
+
+    def test_new_block_needs_no_code_change(self):
+        Hostel.objects.create(name='GH4', gender='Female')
+        self.make_room('GH4')
+        self.make_room('BH2')
+        rooms = self.client.get('/api/rooms/', {'gender': 'Female'}).json()
+        self.assertEqual([(room['location'], room['gender']) for room in rooms], [('GH4', 'Female')])
+
+    def locations(self, gender):
+        return {room['location'] for room in self.client.get('/api/rooms/', {'gender': gender}).json()}
+
+    def test_block_created_after_its_rooms_links_them(self):
+        room = self.make_room('GH5')
+        self.assertIsNone(room.hostel)
+        self.assertEqual(room.gender, 'Male')
+        self.assertEqual(self.locations('Male'), {'GH5'})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Hostel.objects.create(name='GH5', gender='Female')
+        room.refresh_from_db()
+        self.assertEqual(room.gender, 'Female')
+        self.assertEqual((self.locations('Male'), self.locations('Female')), (set(), {'GH5'}))
+
+
+# Keep cache reads and writes out of the count; only one process runs here
+@override_settings(CACHES=IN_PROCESS_CACHES)
+class RoomListQueryTests(TestCase):
+    def setUp(self):
+        catalog_cache().clear()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('lister', password='x'))
+
+    def add_rooms(self, count):
+        for _ in range(count):
+            room = Room.objects.create(
+                category=f'2 AC {Room.objects.count()}', location='BH1', menu='Veg',
+                rooms_count=1, pax_per_room=2, capacity=2, available_seats=2
+            )
+            RoomPhoto.objects.create(room=room, title='Inside', image='room_photos/inside.jpg')
+            RoomPhoto.objects.create(room=room, title='Front', image='room_photos/front.jpg', is_primary=True)
+            set_shard_count(room, 2)
+
+    def list_rooms(self):
+        catalog_cache().clear()
+        response = self.client.get('/api/rooms/')
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_room_list_query_count_is_constant(self):
+        self.add_rooms(2)
+        # rooms with their seat totals, then every photo in one go
+        with self.assertNumQueries(2):
+            self.list_rooms()
+        self.add_rooms(8)
+        with self.assertNumQueries(2):
+            rooms = self.list_rooms()
+        self.assertEqual(len(rooms), 10)
+        self.assertTrue(all(room['primary_photo']['title'] == 'Front' for room in rooms))
+        self.assertTrue(all(room['available_seats'] == 2 for room in rooms))
+
+
+class RoomPhotoChangelistTests(ChangelistQueryCountMixin, TestCase):
+    model = RoomPhoto
+
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser('photos', 'photos@example.com', 'x'))
+
+    def add_rows(self, count):
+        start = Room.objects.count()
+        rooms = [
+            Room.objects.create(
+                category=f'Block {start + i}', location='BH1', menu='Veg',
+                rooms_count=1, pax_per_room=2, capacity=2, available_seats=2
+            )
+            for i in range(count // 10)
+        ]
+        RoomPhoto.objects.bulk_create([
+            RoomPhoto(room=rooms[i % len(rooms)], title=f'Photo {i}', image='room_photos/view.jpg')
+            for i in range(count)
+        ])
+
+
+class RoomInventoryActionTests(TestCase):
+    def setUp(self):
+        self.rooms = [
+            Room.objects.create(
+                category=f'3 AC {letter}', location='BH1', menu='Veg',
+                rooms_count=5, pax_per_room=3, capacity=15, available_seats=7
+            )
+            for letter in 'ABC'
+        ]
+        set_shard_count(self.rooms[0], 2)
+
+    def seats(self):
+        return [room.total_available_seats for room in Room.objects.order_by('pk')]
+
+    def test_inventory_actions_are_single_updates(self):
+        with self.assertNumQueries(3):
+            mark_rooms_full(Room.objects.all())
+        self.assertEqual(self.seats(), [0, 0, 0])
+        with self.assertNumQueries(3):
+            reset_rooms_to_capacity(Room.objects.all())
+        self.assertEqual(self.seats(), [15, 15, 15])
+
+    def test_occupied_count_follows_students(self):
+        room, other = self.rooms[1], self.rooms[2]
+        user = User.objects.create(username='mover')
+        student = Student.objects.create(user=user, name='Mover', email='mover@example.com', gender='Male', room=room)
+        student = Student.objects.get(pk=student.pk)
+        student.room = other
+        student.save()
+        self.assertEqual([r.occupied_count for r in Room.objects.order_by('pk')], [0, 0, 1])
+        student.delete()
+        self.assertEqual([r.occupied_count for r in Room.objects.order_by('pk')], [0, 0, 0])
+
+    def test_recount_repairs_drift(self):
+        user = User.objects.create(username='drift')
+        Student.objects.create(user=user, name='Drift', email='drift@example.com', gender='Male', room=self.rooms[0])
+        Room.objects.update(occupied_count=42)
+        recount_occupancy()
+        self.assertEqual([r.occupied_count for r in Room.objects.order_by('pk')], [1, 0, 0])
+
+
+class BedInventoryTests(TestCase):
+    def setUp(self):
+        self.room = Room.objects.create(
+            category='4 Non AC C', location='GH2', menu='Veg',
+            rooms_count=3, pax_per_room=4, capacity=12, available_seats=12
+        )
+        build_physical_rooms(self.room)
+        self.students = []
+        for i in range(12):
+            user = User.objects.create(username=f'bed{i}')
+            self.students.append(Student.objects.create(
+                user=user, name=user.username, email=f'{user.username}@example.com', gender='Female'
+            ))
+
+    def test_partially_filled_rooms_fill_first(self):
+        first = assign_bed(self.students[0], self.room)
+        second = assign_bed(self.students[1], self.room)
+        self.assertEqual(first.physical_room, second.physical_room)
+        self.assertEqual((first.bed, second.bed), (0, 1))
+        second.physical_room.refresh_from_db()
+        self.assertEqual(second.physical_room.occupied_mask, 0b11)
+        self.assertEqual(second.physical_room.free_beds, 2)
+
+    def test_group_gets_a_room_with_enough_free_beds(self):
+        assign_beds(self.room, self.students[:3])
+        group = assign_beds(self.room, self.students[3:6])
+        self.assertEqual(len({a.physical_room_id for a in group}), 1)
+        self.assertEqual(group[0].physical_room.free_beds, 4)
+        self.assertIsNone(assign_beds(self.room, self.students[6:11]))
+
+    def test_vacancy_lookup_is_a_single_query(self):
+        fill_beds(self.room, [s.pk for s in self.students[:5]])
+        with self.assertNumQueries(1):
+            physical_room = find_room_with_free_beds(self.room, 3)
+        self.assertEqual(physical_room.free_beds, 3)
+
+    def test_vacating_frees_the_bed(self):
+        assignment = assign_bed(self.students[0], self.room)
+        vacate_beds([self.students[0]])
+        physical_room = PhysicalRoom.objects.get(pk=assignment.physical_room_id)
+        self.assertEqual((physical_room.occupied_mask, physical_room.free_beds), (0, 4))
+        self.assertFalse(BedAssignment.objects.exists())
+
+    def test_fill_beds_packs_rooms_in_bulk(self):
+        leftover = fill_beds(self.room, [s.pk for s in self.students] + [999999])
+        self.assertEqual(leftover, [999999])
+        self.assertEqual(PhysicalRoom.objects.filter(room=self.room, free_beds=0).count(), 3)
+
+
+# The in-memory test database fails rather than waits on a locked table, so keep
+# the catalog version writes off it; the threads all share this process anyway
+@override_settings(CACHES=IN_PROCESS_CACHES)
+class ConcurrentReservationTests(TransactionTestCase):
+    BOOKINGS = 1000
+    SEATS = 250
+
+    def make_room(self):
+        return Room.objects.create(
+            category='6 Non AC C', location='Habitat', menu='Non Veg',
+            rooms_count=1, pax_per_room=self.SEATS, capacity=self.SEATS,
+            available_seats=self.SEATS
+        )
+
+    def book_concurrently(self, room):
+        def book(_):
+            try:
+                return reserve_seat(room)
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=32) as pool:
+            return list(pool.map(book, range(self.BOOKINGS)))
+
+    def test_no_oversell_under_concurrent_bookings(self):
+        room = self.make_room()
+        results = self.book_concurrently(room)
+        room.refresh_from_db()
+        self.assertEqual(results.count(True), self.SEATS)
+        self.assertEqual(results.count(False), self.BOOKINGS - self.SEATS)
+        self.assertEqual(room.available_seats, 0)
+
+    def test_no_oversell_with_sharded_counters(self):
+        room = self.make_room()
+        set_shard_count(room, 8)
+        results = self.book_concurrently(room)
+        self.assertEqual(results.count(True), self.SEATS)
+        room.refresh_from_db()
+        self.assertEqual(room.total_available_seats, 0)
+        self.assertFalse(RoomSeatShard.objects.filter(room=room, available__lt=0).exists())
@@ -2,8 +2,12 @@ from django.shortcuts import render
 from rest_framework import viewsets, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from django.utils.cache import get_conditional_response
+from .cache import catalog_etag, catalog_version, get_catalog, set_catalog
 from .models import Room
 from .serializers import RoomSerializer
+from .services import with_gender, with_total_seats
+from bookings.admission import HasAdmission
 
 # Create your views here.
 
@@ -11,25 +15,15 @@ class RoomViewSet(viewsets.ModelViewSet):
     """API endpoint for rooms that can be viewed by students"""
     queryset = Room.objects.all()
     serializer_class = RoomSerializer
-    permission_classes = [permissions.IsAuthenticated]
+    permission_classes = [permissions.IsAuthenticated, HasAdmission]
     
     def get_queryset(self):
         """Filter rooms based on gender and availability"""
-        queryset = Room.objects.filter(available_seats__gt=0)
+        queryset = with_total_seats(Room.objects.select_related('hostel').prefetch_related('photos')).filter(total_seats__gt=0)
         
         gender = self.request.query_params.get('gender')
         if gender:
-            # Proper gender filtering based on location
-            # Girls' hostels: GH1, GH2, GH3
-            # Boys' hostels: BH1, BH2, Habitat, Thandalam
-            if gender == 'Female':
-                queryset = queryset.filter(
-                    location__in=['GH1 (BH3)', 'GH2', 'GH3 (BH1)']
-                )
-            elif gender == 'Male':
-                queryset = queryset.filter(
-                    location__in=['BH1', 'BH2', 'Habitat', 'Thandalam']
-                )
+            queryset = with_gender(queryset, gender)
             
         menu = self.request.query_params.get('menu')
         if menu:
@@ -41,8 +35,29 @@ class RoomViewSet(viewsets.ModelViewSet):
             
         return queryset
 
+    def list(self, request, *args, **kwargs):
+        """Serve the catalog from the versioned cache, with 304s for unchanged lists"""
+        params = request.query_params
+        # Photo URLs are absolute, so the host is part of the key
+        filters = (params.get('gender'), params.get('menu'), params.get('capacity'), request.get_host())
+        version = catalog_version()
+        etag = catalog_etag(version, *filters)
+
+        # No Last-Modified: it only has whole seconds, so two changes within one
+        # second would share a date and If-Modified-Since would get a stale 304
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            data = get_catalog(version, *filters)
+            if data is None:
+                data = super().list(request, *args, **kwargs).data
+                set_catalog(version, data, *filters)
+            response = Response(data)
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+
 class AdminRoomViewSet(viewsets.ModelViewSet):
     """API endpoint for admins to manage rooms"""
-    queryset = Room.objects.all()
+    queryset = Room.objects.select_related('hostel').prefetch_related('photos')
     serializer_class = RoomSerializer
     permission_classes = [permissions.IsAdminUser]
@@ -0,0 +1,193 @@
+from collections import Counter
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import Case, Count, DecimalField, F, Max, Q, Sum, Value, When
+from django.utils import timezone
+from rooms.models import Room
+from .models import StatCounter, StatDelta
+
+STUDENTS = 'students'
+ROOMS = 'rooms'
+OCCUPIED_ROOMS = 'rooms:occupied'
+PENDING_BOOKINGS = 'bookings:Pending'
+
+
+def registrations_key(day):
+    return f'registrations:{day.isoformat()}'
+
+
+def payment_keys(status):
+    return f'payments:{status}:count', f'payments:{status}:amount'
+
+
+def category_keys(category):
+    return f'category:{category}:rooms', f'category:{category}:occupied'
+
+
+def room_keys(room_id):
+    """Per-room rollup: pending payments holding a seat, and confirmed revenue"""
+    return f'room:{room_id}:pending', f'room:{room_id}:revenue'
+
+
+def add_to_counters(changes):
+    """Add per-key deltas to existing counters with one UPDATE; returns the rows updated"""
+    return StatCounter.objects.filter(pk__in=changes).update(
+        value=F('value') + Case(
+            *[When(pk=key, then=Value(Decimal(delta))) for key, delta in changes.items()],
+            default=Value(Decimal(0)),
+            output_field=DecimalField(max_digits=14, decimal_places=2),
+        )
+    )
+
+
+def bump(changes):
+    """Record per-key deltas to the counters with one INSERT.
+
+    The counter rows themselves are left alone, so a transaction that bumps
+    the same hot counters as every other (pending payments, pending
+    bookings) holds no lock on them until it commits. fold_deltas adds the
+    deltas in later; read_counters counts the ones still pending.
+    """
+    StatDelta.objects.bulk_create([
+        StatDelta(key=key, delta=Decimal(delta)) for key, delta in changes.items() if delta
+    ])
+
+
+def fold_deltas():
+    """Add every pending delta into its counter and delete it; returns the deltas folded.
+
+    Counters and deltas change in one transaction, so readers see each
+    change exactly once. A fold that finds some of its deltas already taken
+    by a concurrent one rolls back and leaves them to it.
+    """
+    with transaction.atomic():
+        last = StatDelta.objects.aggregate(last=Max('id'))['last']
+        if last is None:
+            return 0
+        pending = StatDelta.objects.filter(id__lte=last)
+        totals = pending.values('key').annotate(total=Sum('delta'), rows=Count('id'))
+        changes = {row['key']: row['total'] for row in totals}
+        folded = sum(row['rows'] for row in totals)
+        if pending.delete()[0] != folded:
+            transaction.set_rollback(True)
+            return 0
+        apply_to_counters(changes)
+    return folded
+
+
+def apply_to_counters(changes):
+    """Add per-key deltas to the counters with one UPDATE, creating missing counters"""
+    changes = {key: delta for key, delta in changes.items() if delta}
+    if not changes:
+        return
+    if add_to_counters(changes) < len(changes):
+        existing = set(StatCounter.objects.filter(pk__in=changes).values_list('pk', flat=True))
+        missing = {key: delta for key, delta in changes.items() if key not in existing}
+        # Create them at zero and add through the UPDATE too: a transaction that
+        # loses the insert to a concurrent one still gets its delta counted
+        StatCounter.objects.bulk_create([StatCounter(key=key) for key in missing], ignore_conflicts=True)
+        add_to_counters(missing)
+
+
+def payment_changes(old=None, new=None):
+    """Counter deltas for a payment going from ``old`` to ``new``.
+
+    Both are (status, amount, room id) tuples, or None when the payment is
+    being created or deleted.
+    """
+    changes = Counter()
+    for state, sign in ((old, -1), (new, 1)):
+        if not state:
+            continue
+        status, amount, room_id = state
+        count_key, amount_key = payment_keys(status)
+        changes[count_key] += sign
+        changes[amount_key] += sign * amount
+        if room_id:
+            pending_key, revenue_key = room_keys(room_id)
+            if status == 'Pending':
+                changes[pending_key] += sign
+            elif status == 'Confirmed':
+                changes[revenue_key] += sign * amount
+    return changes
+
+
+def record_occupancy(changes):
+    """Follow a rooms.services.adjust_occupancy call that has just been applied.
+
+    ``changes`` maps room ids to the occupant deltas. The rooms' new counts
+    are read back, still locked by the UPDATE, to tell which rooms became
+    empty or occupied.
+    """
+    deltas = Counter()
+    rooms = Room.objects.filter(pk__in=changes).values_list('pk', 'category', 'occupied_count')
+    for room_id, category, occupied in rooms:
+        before = occupied - changes[room_id]
+        deltas[category_keys(category)[1]] += changes[room_id]
+        deltas[OCCUPIED_ROOMS] += (occupied > 0) - (before > 0)
+    bump(deltas)
+
+
+def room_rollups(rooms):
+    """Attach ``occupied``, ``pending_holds`` and ``revenue`` to rooms with one counter read"""
+    rooms = list(rooms)
+    values = read_counters(Q(key__startswith='room:'))
+    for room in rooms:
+        pending_key, revenue_key = room_keys(room.pk)
+        room.occupied = room.occupied_count
+        room.pending_holds = int(values.get(pending_key, 0))
+        room.revenue = values.get(revenue_key, Decimal(0))
+    return rooms
+
+
+def read_counters(keys):
+    """Values of the counters matching the ``keys`` filter, pending deltas included, in one query"""
+    folded = StatCounter.objects.filter(keys).values_list('key', 'value')
+    pending = StatDelta.objects.filter(keys).values('key').annotate(total=Sum('delta')).values_list('key', 'total')
+    values = Counter()
+    for key, value in folded.union(pending, all=True):
+        values[key] += value
+    return values
+
+
+def dashboard_keys(today):
+    """Only the counters the dashboard shows: one per category and status, none per room or day"""
+    return (
+        Q(key__in=[STUDENTS, ROOMS, OCCUPIED_ROOMS, PENDING_BOOKINGS, registrations_key(today)])
+        | Q(key__startswith='payments:') | Q(key__startswith='category:')
+    )
+
+
+def dashboard_stats(today=None):
+    """Every dashboard figure, read from the counters in one query"""
+    today = today or timezone.localdate()
+    today_key = registrations_key(today)
+    values = read_counters(dashboard_keys(today))
+    total_rooms = int(values.get(ROOMS, 0))
+    occupied_rooms = int(values.get(OCCUPIED_ROOMS, 0))
+
+    categories = {}
+    statuses = {}
+    for key, value in values.items():
+        group, _, rest = key.partition(':')
+        if group == 'category':
+            name, _, field = rest.rpartition(':')
+            categories.setdefault(name, {'category': name, 'total': 0, 'occupied': 0})
+            categories[name]['total' if field == 'rooms' else 'occupied'] = int(value)
+        elif group == 'payments':
+            status, _, field = rest.partition(':')
+            statuses.setdefault(status, {'status': status, 'count': 0, 'total_amount': Decimal(0)})
+            statuses[status]['count' if field == 'count' else 'total_amount'] = int(value) if field == 'count' else value
+
+    return {
+        'total_students': int(values.get(STUDENTS, 0)),
+        'total_rooms': total_rooms,
+        'occupied_rooms': occupied_rooms,
+        'occupancy_percentage': round(occupied_rooms / total_rooms * 100, 1) if total_rooms else 0,
+        'pending_payments': statuses.get('Pending', {}).get('count', 0),
+        'total_revenue': statuses.get('Confirmed', {}).get('total_amount', 0),
+        'today_registrations': int(values.get(today_key, 0)),
+        'pending_bookings_count': int(values.get(PENDING_BOOKINGS, 0)),
+        'room_categories': [categories[name] for name in sorted(categories)],
+        'payment_stats': [statuses[status] for status in sorted(statuses)],
+    }
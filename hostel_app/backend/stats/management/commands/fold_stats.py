@@ -0,0 +1,21 @@
+import time
+from django.core.management.base import BaseCommand
+from stats.counters import fold_deltas
+
+class Command(BaseCommand):
+    help = 'Fold the appended counter deltas into the dashboard counters (run with --watch)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--watch', action='store_true',
+                            help='Keep running and fold new deltas instead of exiting once none are left')
+        parser.add_argument('--interval', type=float, default=2.0,
+                            help='Seconds between folds with --watch')
+
+    def handle(self, *args, **options):
+        while True:
+            count = fold_deltas()
+            if count or not options['watch']:
+                self.stdout.write(self.style.SUCCESS(f'Folded {count} counter delta(s)'))
+            if not options['watch']:
+                return
+            time.sleep(options['interval'])
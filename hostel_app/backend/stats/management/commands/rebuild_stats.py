@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from rooms.services import recount_occupancy
+from stats.rebuild import rebuild_counters
+
+class Command(BaseCommand):
+    help = 'Recompute the materialized dashboard statistics from scratch (run nightly)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recount-occupancy', action='store_true',
+                            help='Also recount Room.occupied_count from the students table first')
+
+    def handle(self, *args, **options):
+        if options['recount_occupancy']:
+            recount_occupancy()
+        count = rebuild_counters()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {count} statistics counter(s)'))
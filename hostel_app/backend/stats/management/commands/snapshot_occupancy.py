@@ -0,0 +1,27 @@
+import time
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from stats.snapshots import prune_snapshots, take_snapshot
+
+class Command(BaseCommand):
+    help = 'Record a per-room occupancy snapshot for the fill-curve charts (run every minute)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--watch', action='store_true',
+                            help='Keep running and take a snapshot every --interval seconds')
+        parser.add_argument('--interval', type=float, default=60.0,
+                            help='Seconds between snapshots with --watch')
+        parser.add_argument('--keep-days', type=int, default=None,
+                            help='Also delete per-minute snapshots older than this many days; '
+                                 'hour and day rollups are kept')
+
+    def handle(self, *args, **options):
+        while True:
+            count = take_snapshot()
+            if options['keep_days'] is not None:
+                prune_snapshots(timezone.now() - timedelta(days=options['keep_days']))
+            self.stdout.write(self.style.SUCCESS(f'Recorded occupancy for {count} room(s)'))
+            if not options['watch']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,85 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:38
+
+from collections import Counter
+from datetime import datetime, time, timedelta
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+
+def seed_counters(apps, schema_editor):
+    """Start every counter at its real figure, as stats.rebuild.compute_counters would"""
+    StatCounter = apps.get_model('stats', 'StatCounter')
+    Student = apps.get_model('accounts', 'Student')
+    BookingRequest = apps.get_model('bookings', 'BookingRequest')
+    Payment = apps.get_model('payments', 'Payment')
+    Room = apps.get_model('rooms', 'Room')
+
+    counters = Counter({'rooms': 0, 'rooms:occupied': 0})
+    for status in ('Pending', 'Confirmed', 'Failed'):
+        counters.update({f'payments:{status}:count': 0, f'payments:{status}:amount': 0})
+    counters['students'] = Student.objects.count()
+    today = timezone.localdate()
+    start = timezone.make_aware(datetime.combine(today, time.min))
+    end = timezone.make_aware(datetime.combine(today + timedelta(days=1), time.min))
+    counters[f'registrations:{today.isoformat()}'] = Student.objects.filter(
+        created_at__gte=start, created_at__lt=end
+    ).count()
+    counters['bookings:Pending'] = BookingRequest.objects.filter(status='Pending').count()
+
+    categories = Room.objects.values('category').annotate(
+        rooms=Count('id'), occupied=Sum('occupied_count'), busy=Count('id', filter=Q(occupied_count__gt=0))
+    )
+    for row in categories:
+        counters[f"category:{row['category']}:rooms"] = row['rooms']
+        counters[f"category:{row['category']}:occupied"] = row['occupied'] or 0
+        counters['rooms'] += row['rooms']
+        counters['rooms:occupied'] += row['busy']
+    for room_id in Room.objects.values_list('pk', flat=True):
+        counters.update({f'room:{room_id}:pending': 0, f'room:{room_id}:revenue': 0})
+
+    for row in Payment.objects.values('status').annotate(count=Count('id'), total=Sum('amount')):
+        counters[f"payments:{row['status']}:count"] = row['count']
+        counters[f"payments:{row['status']}:amount"] = row['total'] or 0
+    rooms = Payment.objects.filter(room__isnull=False).values('room').annotate(
+        pending=Count('id', filter=Q(status='Pending')),
+        revenue=Sum('amount', filter=Q(status='Confirmed')),
+    )
+    for row in rooms:
+        counters[f"room:{row['room']}:pending"] = row['pending']
+        counters[f"room:{row['room']}:revenue"] = row['revenue'] or 0
+
+    StatCounter.objects.bulk_create(
+        [StatCounter(key=key, value=value) for key, value in counters.items()], batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('accounts', '0004_student_department_student_first_name_and_more'),
+        ('bookings', '0004_allocationpreference'),
+        ('payments', '0004_payment_date_indexes'),
+        ('rooms', '0010_room_occupied_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatCounter',
+            fields=[
+                ('key', models.CharField(max_length=150, primary_key=True, serialize=False)),
+                ('value', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='StatDelta',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=150)),
+                ('delta', models.DecimalField(decimal_places=2, max_digits=14)),
+            ],
+        ),
+        migrations.RunPython(seed_counters, migrations.RunPython.noop),
+    ]
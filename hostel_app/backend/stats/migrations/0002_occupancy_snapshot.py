@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rooms', '0010_room_occupied_count'),
+        ('stats', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OccupancySnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('taken_at', models.DateTimeField()),
+                ('occupied', models.PositiveIntegerField()),
+                ('available', models.PositiveIntegerField()),
+                ('pending_holds', models.PositiveIntegerField()),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='occupancy_snapshots', to='rooms.room')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['taken_at', 'room'], name='snapshot_time_room_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Max, Min
+from django.db.models.functions import Trunc
+
+
+def roll_up_existing_snapshots(apps, schema_editor):
+    OccupancySnapshot = apps.get_model('stats', 'OccupancySnapshot')
+    OccupancyRollup = apps.get_model('stats', 'OccupancyRollup')
+    OccupancyRollup.objects.bulk_create([
+        OccupancyRollup(
+            room_id=bucket['room_id'], resolution=resolution, period_start=bucket['time'],
+            occupied=bucket['occupied'], available=bucket['available'], pending_holds=bucket['pending_holds'],
+        )
+        for resolution in ('hour', 'day')
+        for bucket in OccupancySnapshot.objects.annotate(time=Trunc('taken_at', resolution))
+        .values('room_id', 'time')
+        .annotate(occupied=Max('occupied'), pending_holds=Max('pending_holds'), available=Min('available'))
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rooms', '0010_room_occupied_count'),
+        ('stats', '0002_occupancy_snapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OccupancyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('resolution', models.CharField(choices=[('hour', 'hour'), ('day', 'day')], max_length=5)),
+                ('period_start', models.DateTimeField()),
+                ('occupied', models.PositiveIntegerField()),
+                ('available', models.PositiveIntegerField()),
+                ('pending_holds', models.PositiveIntegerField()),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='occupancy_rollups', to='rooms.room')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('resolution', 'period_start', 'room'), name='unique_occupancy_rollup')],
+            },
+        ),
+        migrations.RunPython(roll_up_existing_snapshots, migrations.RunPython.noop),
+    ]
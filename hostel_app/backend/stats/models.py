@@ -0,0 +1,64 @@
+from django.db import models
+
+
+class StatCounter(models.Model):
+    """One materialized dashboard figure; pending StatDelta rows are folded into it"""
+    key = models.CharField(max_length=150, primary_key=True)
+    value = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    def __str__(self):
+        return f"{self.key} = {self.value}"
+
+
+class StatDelta(models.Model):
+    """A change to a counter appended by stats.counters.bump, not yet folded into it.
+
+    Writers only ever INSERT here, so concurrent transactions never wait on a
+    shared counter row; stats.counters.fold_deltas adds them up later.
+    """
+    key = models.CharField(max_length=150)
+    delta = models.DecimalField(max_digits=14, decimal_places=2)
+
+    def __str__(self):
+        return f"{self.key} {self.delta:+}"
+
+
+class OccupancySnapshot(models.Model):
+    """One room's occupancy at a point in time, written by stats.snapshots.take_snapshot"""
+    room = models.ForeignKey('rooms.Room', on_delete=models.CASCADE, related_name='occupancy_snapshots')
+    taken_at = models.DateTimeField()
+    occupied = models.PositiveIntegerField()
+    available = models.PositiveIntegerField()
+    pending_holds = models.PositiveIntegerField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['taken_at', 'room'], name='snapshot_time_room_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.room_id} @ {self.taken_at:%Y-%m-%d %H:%M}: {self.occupied} occupied"
+
+
+class OccupancyRollup(models.Model):
+    """A room's snapshots over one hour or day: peak occupancy and holds, fewest seats left"""
+    RESOLUTION_CHOICES = (
+        ('hour', 'hour'),
+        ('day', 'day'),
+    )
+
+    room = models.ForeignKey('rooms.Room', on_delete=models.CASCADE, related_name='occupancy_rollups')
+    resolution = models.CharField(max_length=5, choices=RESOLUTION_CHOICES)
+    period_start = models.DateTimeField()
+    occupied = models.PositiveIntegerField()
+    available = models.PositiveIntegerField()
+    pending_holds = models.PositiveIntegerField()
+
+    class Meta:
+        constraints = [
+            # Also the index charts read through: one resolution, a window of periods
+            models.UniqueConstraint(fields=['resolution', 'period_start', 'room'], name='unique_occupancy_rollup'),
+        ]
+
+    def __str__(self):
+        return f"{self.room_id} {self.resolution} of {self.period_start:%Y-%m-%d %H:%M}: {self.occupied} occupied"
@@ -0,0 +1,78 @@
+from collections import Counter
+from django.db import transaction
+from django.db.models import Count, Max, Q, Sum
+from django.utils import timezone
+from accounts.models import Student
+from bookings.models import BookingRequest
+from payments.analytics import date_range
+from payments.models import Payment
+from rooms.models import Room
+from .counters import (
+    OCCUPIED_ROOMS, PENDING_BOOKINGS, ROOMS, STUDENTS, category_keys, payment_keys, registrations_key,
+    room_keys
+)
+from .models import StatCounter, StatDelta
+
+
+def compute_counters(today=None):
+    """Every counter recomputed from the source tables"""
+    today = today or timezone.localdate()
+    # Fixed counters are kept even at zero so folding never has to create them
+    counters = Counter({ROOMS: 0, OCCUPIED_ROOMS: 0})
+    for status, _ in Payment.STATUS_CHOICES:
+        counters.update(dict.fromkeys(payment_keys(status), 0))
+    counters[STUDENTS] = Student.objects.count()
+    start, end = date_range(today)
+    counters[registrations_key(today)] = Student.objects.filter(created_at__gte=start, created_at__lt=end).count()
+    counters[PENDING_BOOKINGS] = BookingRequest.objects.filter(status='Pending').count()
+
+    categories = Room.objects.values('category').annotate(
+        rooms=Count('id'), occupied=Sum('occupied_count'), busy=Count('id', filter=Q(occupied_count__gt=0))
+    )
+    for row in categories:
+        rooms_key, occupied_key = category_keys(row['category'])
+        counters[rooms_key] = row['rooms']
+        counters[occupied_key] = row['occupied'] or 0
+        counters[ROOMS] += row['rooms']
+        counters[OCCUPIED_ROOMS] += row['busy']
+    for room_id in Room.objects.values_list('pk', flat=True):
+        counters.update(dict.fromkeys(room_keys(room_id), 0))
+
+    for row in Payment.objects.values('status').annotate(count=Count('id'), total=Sum('amount')):
+        count_key, amount_key = payment_keys(row['status'])
+        counters[count_key] = row['count']
+        counters[amount_key] = row['total'] or 0
+
+    rooms = Payment.objects.filter(room__isnull=False).values('room').annotate(
+        pending=Count('id', filter=Q(status='Pending')),
+        revenue=Sum('amount', filter=Q(status='Confirmed')),
+    )
+    for row in rooms:
+        pending_key, revenue_key = room_keys(row['room'])
+        counters[pending_key] = row['pending']
+        counters[revenue_key] = row['revenue'] or 0
+    return counters
+
+
+@transaction.atomic
+def rebuild_counters(today=None):
+    """Overwrite every counter with a fresh computation.
+
+    Values are written in place with one upsert rather than deleted and
+    re-inserted, so a concurrent fold never lands on a missing row. Deltas
+    committed before the recount are already in it and are dropped; a
+    change that commits while the recount runs can still be counted twice,
+    so run it at a quiet hour. Counters of past days and deleted rooms are
+    dropped. Occupancy comes from Room.occupied_count; run recount_occupancy
+    first to repair that too. Returns the number of counters written.
+    """
+    seen = StatDelta.objects.aggregate(last=Max('id'))['last']
+    counters = compute_counters(today)
+    StatCounter.objects.exclude(pk__in=list(counters)).delete()
+    StatCounter.objects.bulk_create(
+        [StatCounter(key=key, value=value) for key, value in counters.items()],
+        update_conflicts=True, unique_fields=['key'], update_fields=['value'],
+    )
+    if seen is not None:
+        StatDelta.objects.filter(id__lte=seen).delete()
+    return len(counters)
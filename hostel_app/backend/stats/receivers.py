@@ -0,0 +1,96 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+from accounts.models import Student
+from bookings.models import BookingRequest
+from payments.models import Payment
+from rooms.models import Room
+from .counters import (
+    OCCUPIED_ROOMS, PENDING_BOOKINGS, ROOMS, STUDENTS, bump, category_keys, payment_changes, registrations_key,
+    room_keys
+)
+from .models import StatCounter, StatDelta
+
+# Single-row saves and deletes keep the counters current here. Set-based
+# writes (bulk_create, queryset.update) call stats.counters.bump themselves.
+# Either way the change is appended as a delta; nothing here locks a counter.
+
+
+def loaded(instance, name):
+    """A field's value before this save, or None when the instance was not loaded"""
+    return instance.initial_value(name) if hasattr(instance, '_loaded_values') else None
+
+
+@receiver(post_save, sender=Student)
+def count_student(sender, instance, created, **kwargs):
+    if created:
+        bump({STUDENTS: 1, registrations_key(timezone.localdate(instance.created_at)): 1})
+
+
+@receiver(post_delete, sender=Student)
+def uncount_student(sender, instance, **kwargs):
+    changes = {STUDENTS: -1}
+    # Only today's registrations are shown; past days are dropped by the rebuild
+    if timezone.localdate(instance.created_at) == timezone.localdate():
+        changes[registrations_key(timezone.localdate())] = -1
+    bump(changes)
+
+
+def payment_state(payment, loaded_values=False):
+    if loaded_values:
+        return loaded(payment, 'status'), loaded(payment, 'amount'), loaded(payment, 'room')
+    return payment.status, payment.amount, payment.room_id
+
+
+@receiver(post_save, sender=Payment)
+def count_payment(sender, instance, created, **kwargs):
+    if created:
+        bump(payment_changes(new=payment_state(instance)))
+    elif any(instance.has_changed(name) for name in ('status', 'amount', 'room')):
+        bump(payment_changes(payment_state(instance, loaded_values=True), payment_state(instance)))
+
+
+@receiver(post_delete, sender=Payment)
+def uncount_payment(sender, instance, **kwargs):
+    bump(payment_changes(old=payment_state(instance)))
+
+
+@receiver(post_save, sender=BookingRequest)
+def count_booking(sender, instance, created, **kwargs):
+    if created:
+        bump({PENDING_BOOKINGS: instance.status == 'Pending'})
+    elif instance.has_changed('status'):
+        bump({PENDING_BOOKINGS: (instance.status == 'Pending') - (loaded(instance, 'status') == 'Pending')})
+
+
+@receiver(post_delete, sender=BookingRequest)
+def uncount_booking(sender, instance, **kwargs):
+    bump({PENDING_BOOKINGS: -(instance.status == 'Pending')})
+
+
+@receiver(post_save, sender=Room)
+def count_room(sender, instance, created, **kwargs):
+    rooms_key, occupied_key = category_keys(instance.category)
+    if created:
+        bump({
+            ROOMS: 1, rooms_key: 1,
+            occupied_key: instance.occupied_count, OCCUPIED_ROOMS: instance.occupied_count > 0,
+        })
+        # Start the room's rollup at zero so folding its deltas only ever UPDATEs it
+        StatCounter.objects.bulk_create([StatCounter(key=key) for key in room_keys(instance.pk)], ignore_conflicts=True)
+    elif instance.has_changed('category'):
+        old_rooms_key, old_occupied_key = category_keys(loaded(instance, 'category'))
+        occupied = loaded(instance, 'occupied_count')
+        bump({old_rooms_key: -1, old_occupied_key: -occupied, rooms_key: 1, occupied_key: occupied})
+
+
+@receiver(post_delete, sender=Room)
+def uncount_room(sender, instance, **kwargs):
+    rooms_key, occupied_key = category_keys(instance.category)
+    bump({
+        ROOMS: -1, rooms_key: -1,
+        occupied_key: -instance.occupied_count, OCCUPIED_ROOMS: -(instance.occupied_count > 0),
+    })
+    # Its payments lose their room through SET_NULL, which sends no signals
+    StatCounter.objects.filter(pk__in=room_keys(instance.pk)).delete()
+    StatDelta.objects.filter(key__in=room_keys(instance.pk)).delete()
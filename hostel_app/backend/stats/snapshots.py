@@ -0,0 +1,131 @@
+from datetime import timedelta
+from django.db.models import F, Max, Min, Q
+from django.db.models.functions import Trunc
+from django.utils import timezone
+from rooms.models import Room
+from rooms.services import with_total_seats
+from .counters import room_rollups
+from .models import OccupancyRollup, OccupancySnapshot
+
+# Width of one bucket at each resolution the series can be downsampled to
+RESOLUTIONS = {
+    'minute': timedelta(minutes=1),
+    'hour': timedelta(hours=1),
+    'day': timedelta(days=1),
+}
+# Resolutions kept as rollup rows, so charts never group the raw snapshots
+ROLLUPS = ('hour', 'day')
+# Largest number of buckets per room one series request may ask for
+MAX_BUCKETS = 5000
+ROLLUP_FIELDS = ['occupied', 'available', 'pending_holds']
+
+
+def bucket_start(moment, resolution):
+    """Start of the local hour or day ``moment`` falls in"""
+    moment = timezone.localtime(moment).replace(minute=0, second=0, microsecond=0)
+    return moment.replace(hour=0) if resolution == 'day' else moment
+
+
+def save_rollups(rollups):
+    OccupancyRollup.objects.bulk_create(
+        rollups, update_conflicts=True,
+        unique_fields=['resolution', 'period_start', 'room'], update_fields=ROLLUP_FIELDS,
+    )
+
+
+def take_snapshot(now=None):
+    """Record every room's occupancy, available seats and pending holds.
+
+    Reads the maintained counters (one query for the rooms, one for the
+    rollups) and writes one row per room in a single INSERT, then folds
+    the snapshot into the current hour and day rollups with one read and
+    one upsert.
+    """
+    now = now or timezone.now()
+    rooms = room_rollups(with_total_seats(Room.objects.all()))
+    snapshots = OccupancySnapshot.objects.bulk_create([
+        OccupancySnapshot(
+            room_id=room.pk, taken_at=now, occupied=room.occupied,
+            available=max(room.total_seats, 0), pending_holds=room.pending_holds,
+        )
+        for room in rooms
+    ])
+    starts = {resolution: bucket_start(now, resolution) for resolution in ROLLUPS}
+    current = {
+        (rollup.resolution, rollup.room_id): rollup
+        for rollup in OccupancyRollup.objects.filter(
+            Q(resolution='hour', period_start=starts['hour']) | Q(resolution='day', period_start=starts['day'])
+        )
+    }
+    rollups = []
+    for resolution, start in starts.items():
+        for snapshot in snapshots:
+            rollup = current.get((resolution, snapshot.room_id))
+            rollups.append(OccupancyRollup(
+                room_id=snapshot.room_id, resolution=resolution, period_start=start,
+                occupied=max(snapshot.occupied, rollup.occupied) if rollup else snapshot.occupied,
+                available=min(snapshot.available, rollup.available) if rollup else snapshot.available,
+                pending_holds=max(snapshot.pending_holds, rollup.pending_holds) if rollup else snapshot.pending_holds,
+            ))
+    save_rollups(rollups)
+    return len(rooms)
+
+
+def grouped_snapshots(snapshots, resolution):
+    """Snapshots grouped per room and bucket, peaks and lows aggregated in the database"""
+    return (
+        snapshots.annotate(time=Trunc('taken_at', resolution))
+        .values('room_id', 'time')
+        .annotate(occupied=Max('occupied'), pending_holds=Max('pending_holds'), available=Min('available'))
+    )
+
+
+def roll_up(snapshots):
+    """Recompute the hour and day rollups of a set of snapshots covering whole days"""
+    save_rollups([
+        OccupancyRollup(
+            room_id=bucket['room_id'], resolution=resolution, period_start=bucket['time'],
+            **{name: bucket[name] for name in ROLLUP_FIELDS}
+        )
+        for resolution in ROLLUPS
+        for bucket in grouped_snapshots(snapshots, resolution)
+    ])
+
+
+def occupancy_series(start, end, resolution='hour', room_ids=None):
+    """Occupancy in [start, end) with one point per room and bucket.
+
+    Each point carries the peak occupancy and holds and the fewest seats
+    left seen in its bucket, which keeps fill-up spikes visible at coarse
+    resolutions. Hours and days are read from the rollups, one row per
+    point, starting with the bucket ``start`` falls in; minutes group the
+    raw snapshots. Returns {room id: [point, ...]} in time order.
+    """
+    if resolution not in RESOLUTIONS:
+        raise ValueError(f'Unknown resolution {resolution!r}')
+    if (end - start) / RESOLUTIONS[resolution] > MAX_BUCKETS:
+        raise ValueError(f'More than {MAX_BUCKETS} {resolution} buckets requested')
+
+    if resolution in ROLLUPS:
+        points = OccupancyRollup.objects.filter(
+            resolution=resolution, period_start__gte=bucket_start(start, resolution), period_start__lt=end
+        ).values('room_id', *ROLLUP_FIELDS, time=F('period_start'))
+    else:
+        points = grouped_snapshots(OccupancySnapshot.objects.filter(taken_at__gte=start, taken_at__lt=end), resolution)
+    if room_ids:
+        points = points.filter(room_id__in=room_ids)
+    series = {}
+    for point in points.order_by('room_id', 'time'):
+        series.setdefault(point.pop('room_id'), []).append(point)
+    return series
+
+
+def prune_snapshots(before):
+    """Drop raw snapshots from before the local day ``before`` falls in.
+
+    Their hour and day rollups are recomputed first, so coarse history
+    outlives them. Returns how many snapshots were deleted.
+    """
+    expired = OccupancySnapshot.objects.filter(taken_at__lt=bucket_start(before, 'day'))
+    roll_up(expired)
+    return expired.delete()[0]
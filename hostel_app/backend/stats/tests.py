@@ -0,0 +1,239 @@
+import io
+from datetime import timedelta
+from importlib import import_module
+from unittest import mock
+from django.apps import apps
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Q
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from accounts.models import Student
+from bookings.models import BookingRequest
+from bookings.services import approve_bookings, reject_bookings, release_expired_holds
+from rooms.models import Room
+from .counters import apply_to_counters, dashboard_keys, dashboard_stats, fold_deltas, read_counters, registrations_key
+from .models import OccupancyRollup, OccupancySnapshot, StatCounter, StatDelta
+from .rebuild import compute_counters, rebuild_counters
+from .snapshots import prune_snapshots, take_snapshot
+
+
+class DashboardCounterTests(TestCase):
+    def setUp(self):
+        self.rooms = [
+            Room.objects.create(
+                category=category, location=location, menu='Veg', rooms_count=5, pax_per_room=1,
+                capacity=5, available_seats=5, price=price
+            )
+            for category, location, price in [
+                ('2 AC A', 'BH2', 18000), ('2 AC A', 'BH1', 18000), ('4 Non AC A', 'BH2', 13000)
+            ]
+        ]
+        self.client = APIClient()
+
+    def make_student(self, email):
+        user = User.objects.create(username=email, email=email)
+        return Student.objects.create(user=user, name=email, email=email, gender='Male')
+
+    def pay(self, student, room, transaction_id):
+        self.client.force_authenticate(student.user)
+        response = self.client.post(
+            reverse('make-payment'), {'room_id': room.id, 'transaction_id': transaction_id}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def counters(self):
+        return {key: value for key, value in read_counters(Q()).items() if value}
+
+    def expected(self):
+        return {key: value for key, value in compute_counters().items() if value}
+
+    maxDiff = None
+
+    def test_incremental_counters_match_a_full_rebuild(self):
+        students = [self.make_student(f's{i}@example.com') for i in range(8)]
+        for i, student in enumerate(students):
+            self.pay(student, self.rooms[i % 3], f'TXN{i}')
+        self.pay(students[0], self.rooms[2], 'TXN-AGAIN')  # cancels the first booking
+        approve_bookings(BookingRequest.objects.filter(student__in=students[1:4]), None)
+        reject_bookings(BookingRequest.objects.filter(student=students[4]), None)
+        release_expired_holds(now=timezone.now() + timedelta(days=30))
+        students[1].delete()
+        room = Room.objects.get(pk=self.rooms[0].pk)
+        room.category = '3 AC A'
+        room.save()
+        self.assertEqual(self.counters(), self.expected())
+
+        rebuild_counters()
+        self.assertEqual(self.counters(), self.expected())
+
+    def test_migration_seeds_the_real_figures(self):
+        students = [self.make_student(f'm{i}@example.com') for i in range(4)]
+        for i, student in enumerate(students):
+            self.pay(student, self.rooms[i % 3], f'TXN{i}')
+        approve_bookings(BookingRequest.objects.filter(student__in=students[:2]), None)
+
+        StatCounter.objects.all().delete()
+        StatDelta.objects.all().delete()
+        import_module('stats.migrations.0001_initial').seed_counters(apps, None)
+        self.assertEqual(dict(StatCounter.objects.values_list('key', 'value')), compute_counters())
+        self.assertEqual(self.counters(), self.expected())
+
+    def test_dashboard_reads_one_query(self):
+        student = self.make_student('a@example.com')
+        self.pay(student, self.rooms[2], 'TXN1')
+        approve_bookings(BookingRequest.objects.all(), None)
+        self.pay(self.make_student('b@example.com'), self.rooms[0], 'TXN2')
+
+        with self.assertNumQueries(1):
+            stats = dashboard_stats()
+        self.assertEqual(stats['total_students'], 2)
+        self.assertEqual(stats['today_registrations'], 2)
+        self.assertEqual((stats['total_rooms'], stats['occupied_rooms'], stats['occupancy_percentage']), (3, 2, 66.7))
+        self.assertEqual((stats['pending_payments'], stats['total_revenue'], stats['pending_bookings_count']), (1, 13000, 1))
+        self.assertEqual(stats['room_categories'], [
+            {'category': '2 AC A', 'total': 2, 'occupied': 1},
+            {'category': '4 Non AC A', 'total': 1, 'occupied': 1},
+        ])
+        self.assertEqual(
+            [(row['status'], row['count'], row['total_amount']) for row in stats['payment_stats']],
+            [('Confirmed', 1, 13000), ('Failed', 0, 0), ('Pending', 1, 18000)]
+        )
+
+    def test_dashboard_read_does_not_grow_with_rooms(self):
+        fold_deltas()
+        read = StatCounter.objects.filter(dashboard_keys(timezone.localdate())).count()
+        for i in range(20):
+            Room.objects.create(
+                category='2 AC A', location=f'Block {i}', menu='Veg', rooms_count=5, pax_per_room=1,
+                capacity=5, available_seats=5, price=18000
+            )
+        fold_deltas()
+        self.assertEqual(StatCounter.objects.filter(dashboard_keys(timezone.localdate())).count(), read)
+        self.assertEqual(dashboard_stats()['total_rooms'], 23)
+
+    def test_rebuild_drops_past_days(self):
+        StatCounter.objects.create(key=registrations_key(timezone.localdate() - timedelta(days=3)), value=40)
+        out = io.StringIO()
+        call_command('rebuild_stats', '--recount-occupancy', stdout=out)
+        self.assertRegex(out.getvalue(), r'Rebuilt \d+ statistics counter\(s\)')
+        self.assertFalse(StatCounter.objects.filter(key__startswith='registrations:').exclude(
+            key=registrations_key(timezone.localdate())
+        ).exists())
+
+    def test_payments_only_append_deltas(self):
+        student = self.make_student('hot@example.com')
+        with CaptureQueriesContext(connection) as queries:
+            self.pay(student, self.rooms[0], 'TXN-HOT')
+        self.assertFalse([query['sql'] for query in queries if 'stats_statcounter' in query['sql']])
+
+    def test_folding_keeps_the_totals(self):
+        students = [self.make_student(f'f{i}@example.com') for i in range(3)]
+        for i, student in enumerate(students):
+            self.pay(student, self.rooms[i], f'TXN{i}')
+        before = self.counters()
+        self.assertTrue(StatDelta.objects.exists())
+        out = io.StringIO()
+        call_command('fold_stats', stdout=out)
+        self.assertRegex(out.getvalue(), r'Folded \d+ counter delta\(s\)')
+        self.assertFalse(StatDelta.objects.exists())
+        self.assertEqual(self.counters(), before)
+        self.assertEqual(self.counters(), self.expected())
+
+    def test_bump_survives_losing_the_insert_race(self):
+        key = registrations_key(timezone.localdate() + timedelta(days=1))
+        bulk_create = StatCounter.objects.bulk_create
+
+        def concurrent_insert(objs, **kwargs):
+            # Another transaction creates the counter between our read and our insert
+            StatCounter.objects.create(key=key, value=5)
+            return bulk_create(objs, **kwargs)
+
+        with mock.patch.object(StatCounter.objects, 'bulk_create', side_effect=concurrent_insert):
+            apply_to_counters({key: 1})
+        self.assertEqual(StatCounter.objects.get(key=key).value, 6)
+
+    def test_room_rollups_do_not_multiply_revenue(self):
+        first, second = self.rooms[2], self.rooms[0]
+        for i in range(3):
+            self.pay(self.make_student(f'r{i}@example.com'), first, f'TXN{i}')
+        approve_bookings(BookingRequest.objects.filter(student__email__in=['r0@example.com', 'r1@example.com']), None)
+        self.pay(self.make_student('other@example.com'), second, 'TXN-OTHER')
+        self.assertEqual(self.counters(), self.expected())
+
+        self.client.force_login(User.objects.create_superuser('warden', 'warden@example.com', 'x'))
+        # Session, user, the rooms, the counters and the admin permission lookups
+        with self.assertNumQueries(6):
+            response = self.client.get(reverse('admin:room-stats'))
+        rows = {room.pk: room for room in response.context['room_stats']}
+        self.assertEqual((rows[first.pk].occupied, rows[first.pk].pending_holds, rows[first.pk].revenue), (3, 1, 26000))
+        self.assertEqual((rows[second.pk].occupied, rows[second.pk].pending_holds, rows[second.pk].revenue), (1, 1, 0))
+        self.assertEqual((response.context['total_rooms'], response.context['total_occupied']), (3, 2))
+
+
+class OccupancySnapshotTests(TestCase):
+    def setUp(self):
+        self.room = Room.objects.create(
+            category='2 AC A', location='BH2', menu='Veg', rooms_count=5, pax_per_room=1,
+            capacity=5, available_seats=5, price=18000
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_superuser('warden', 'warden@example.com', 'x'))
+        self.start = timezone.now().replace(hour=9, minute=0, second=0, microsecond=0) - timedelta(days=1)
+
+    def snapshot_at(self, minutes, occupied):
+        Room.objects.filter(pk=self.room.pk).update(occupied_count=occupied, available_seats=5 - occupied)
+        take_snapshot(now=self.start + timedelta(minutes=minutes))
+
+    def test_snapshot_reads_counters_and_updates_its_rollups(self):
+        # Rooms, counters, the snapshot INSERT, then the rollup read and upsert
+        with self.assertNumQueries(5):
+            self.assertEqual(take_snapshot(), 1)
+        snapshot = OccupancySnapshot.objects.get()
+        self.assertEqual((snapshot.occupied, snapshot.available, snapshot.pending_holds), (0, 5, 0))
+        self.assertEqual(sorted(OccupancyRollup.objects.values_list('resolution', flat=True)), ['day', 'hour'])
+
+    def test_history_is_served_from_rollups(self):
+        for minutes, occupied in [(0, 0), (20, 2), (40, 3), (70, 4), (130, 5)]:
+            self.snapshot_at(minutes, occupied)
+        self.assertEqual(OccupancyRollup.objects.filter(resolution='hour').count(), 3)
+
+        params = {'resolution': 'hour', 'start': self.start.isoformat(), 'end': (self.start + timedelta(hours=3)).isoformat()}
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('occupancy-history'), params)
+        self.assertEqual(response.status_code, 200)
+        [series] = response.data['rooms']
+        self.assertEqual(series['room'], self.room.pk)
+        self.assertEqual(
+            [(point['time'], point['occupied'], point['available']) for point in series['points']],
+            [(self.start, 3, 2), (self.start + timedelta(hours=1), 4, 1), (self.start + timedelta(hours=2), 5, 0)]
+        )
+
+        response = self.client.get(reverse('occupancy-history'), dict(params, resolution='day'))
+        self.assertEqual([point['occupied'] for point in response.data['rooms'][0]['points']], [5])
+
+        response = self.client.get(reverse('occupancy-history'), dict(params, resolution='minute'))
+        self.assertEqual([point['occupied'] for point in response.data['rooms'][0]['points']], [0, 2, 3, 4, 5])
+
+    def test_pruning_keeps_the_rollups(self):
+        for minutes, occupied in [(0, 1), (30, 3), (90, 2)]:
+            self.snapshot_at(minutes, occupied)
+        # Rollups written before this change are rebuilt from the raw rows
+        OccupancyRollup.objects.all().delete()
+
+        self.assertEqual(prune_snapshots(timezone.now()), 3)
+        self.assertFalse(OccupancySnapshot.objects.exists())
+        self.assertEqual(
+            list(OccupancyRollup.objects.order_by('resolution', 'period_start').values_list('resolution', 'occupied')),
+            [('day', 3), ('hour', 3), ('hour', 2)]
+        )
+
+    def test_history_rejects_unbounded_windows(self):
+        response = self.client.get(reverse('occupancy-history'), {'resolution': 'minute', 'start': '2020-01-01'})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get(reverse('occupancy-history'), {'resolution': 'week'})
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,52 @@
+from datetime import datetime, time
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from .snapshots import RESOLUTIONS, occupancy_series
+
+# Span charted when the request gives no start
+DEFAULT_BUCKETS = 48
+
+
+def parse_moment(value):
+    """An ISO datetime, or a date meaning its midnight, in the current timezone"""
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(f'Invalid date or datetime {value!r}')
+        moment = datetime.combine(day, time.min)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def occupancy_history(request):
+    """Per-room occupancy over [start, end), downsampled to minute, hour or day buckets"""
+    params = request.query_params
+    resolution = params.get('resolution', 'hour')
+    if resolution not in RESOLUTIONS:
+        return Response(
+            {'detail': f'resolution must be one of: {", ".join(RESOLUTIONS)}.'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    try:
+        end = parse_moment(params['end']) if params.get('end') else timezone.now()
+        start = parse_moment(params['start']) if params.get('start') else end - DEFAULT_BUCKETS * RESOLUTIONS[resolution]
+        room_ids = [int(room_id) for room_id in params.getlist('room')]
+        series = occupancy_series(start, end, resolution, room_ids)
+    except ValueError as exc:
+        return Response({'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response({
+        'resolution': resolution,
+        'start': start,
+        'end': end,
+        'rooms': [{'room': room_id, 'points': points} for room_id, points in series.items()],
+    })
@@ -60,8 +60,23 @@ export const getPayments = () => {
   return api.get('payments/');
 };
 
-export const makePayment = (paymentData: { room_id: number, amount: number, transaction_id: string }) => {
-  return api.post('student/make-payment/', paymentData);
+// Retries with the same idempotency key replay the original submission
+export const makePayment = (
+  paymentData: { room_id: number, amount: number, transaction_id: string },
+  idempotencyKey?: string
+) => {
+  return api.post('student/make-payment/', paymentData, {
+    headers: idempotencyKey ? { 'Idempotency-Key': idempotencyKey } : {},
+  });
+};
+
+// Allocation-day waiting room
+export const joinQueue = () => {
+  return api.post('queue/join/');
+};
+
+export const getQueueStatus = (token: string) => {
+  return api.get('queue/status/', { params: { token } });
 };
 
 // OTP verification services